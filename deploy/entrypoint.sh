@@ -1,8 +1,20 @@
 #!/bin/bash
 # Inject Railway environment variables into Freqtrade config
 # Supports multi-strategy: STRATEGY env selects config (WeekendMomentum->s1, FundingReversion->s2, BasisHarvest->s6)
+# STRATEGY=RegimeService runs the shared regime publisher instead of Freqtrade
 
 STRATEGY="${STRATEGY:-WeekendMomentum}"
+
+# Regime service: fits regimes once for the fleet and publishes them to REGIME_DB_PATH
+# (shared volume). Strategy services read it when REGIME_DB_PATH is set.
+if [ "$STRATEGY" = "RegimeService" ]; then
+  cd /freqtrade
+  exec python -m utils.regime_service \
+    --symbols "${REGIME_SYMBOLS:-BTC/USDT,ETH/USDT,ETH/USDT:USDT,BTC/USDT:USDT}" \
+    --timeframe "${REGIME_TIMEFRAME:-1h}" \
+    --db "${REGIME_DB_PATH:-/freqtrade/user_data/regimes.sqlite}"
+fi
+
 case "$STRATEGY" in
   WeekendMomentum) CONFIG_SRC="/freqtrade/user_data/config-s1.json" ;;
   FundingReversion) CONFIG_SRC="/freqtrade/user_data/config-s2.json" ;;
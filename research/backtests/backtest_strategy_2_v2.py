@@ -10,12 +10,14 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')
 
 from utils.regime_detector import CryptoRegimeDetector
 from utils.data_loader import find_funding_path
+from utils.regime_gating import REGIME_GATING
 
 try:
-    from utils.cascade_detector import detect_cascade
+    from utils.cascade_detector import detect_cascade, cascade_panel_cached
 except ImportError:
     def detect_cascade(*args, **kwargs):
         return pd.Series(dtype=bool)
+    cascade_panel_cached = None
 
 
 def load_data(symbol, limit=2000):
@@ -69,7 +71,8 @@ class FundingBacktester:
         self.stoploss = 0.05
         self.z_threshold = 1.5
         
-    def prepare_data(self, price_df, funding_df):
+    def prepare_data(self, price_df, funding_df, regime=None):
+        """regime: precomputed regime labels (e.g. a CryptoRegimeDetector.fit_many panel column)."""
         # Merge
         df = price_df.copy()
         df = df.join(funding_df[['fundingRate']])
@@ -88,9 +91,11 @@ class FundingBacktester:
         
         # Regime Detection (HMM on 1h data)
         if self.use_regime_filter:
-            if len(df) > 200:
-                self.detector.fit(df)
-                regime_df = self.detector.predict(df)
+            if regime is not None:
+                df['regime'] = regime.reindex(df.index)
+                print(f"Regime Detection Complete. Counts:\n{df['regime'].value_counts()}")
+            elif len(df) > 200:
+                regime_df = self.detector.fit_cached(df, timeframe='1h')
                 df['regime'] = regime_df['regime_label']
                 print(f"Regime Detection Complete. Counts:\n{df['regime'].value_counts()}")
             else:
@@ -101,20 +106,30 @@ class FundingBacktester:
                  
         return df
 
-    def run(self, df):
+    def run(self, df, cascade=None):
+        """cascade: precomputed cascade flags (e.g. a detect_cascade_panel column)."""
         capital = 1000.0
         position = None
         trades = []
         equity_curve = [capital]
-        cascade_series = detect_cascade(df) if len(df) > 50 else pd.Series(dtype=bool)
+        if cascade is not None:
+            cascade_series = cascade
+        else:
+            cascade_series = detect_cascade(df) if len(df) > 50 else pd.Series(dtype=bool)
         cascade_series = cascade_series.reindex(df.index, fill_value=False)
         
+        # Regime gating for the whole series in one lookup (S2 rules: no longs in BEAR, no shorts in BULL)
+        if self.use_regime_filter and 'regime' in df.columns:
+            long_ok = REGIME_GATING.allowed_mask(df['regime'], 'FundingReversion', 'long')
+            short_ok = REGIME_GATING.allowed_mask(df['regime'], 'FundingReversion', 'short')
+        else:
+            long_ok = short_ok = np.ones(len(df), dtype=bool)
+        
         for i in range(50, len(df)):
             curr_row = df.iloc[i]
             date = df.index[i]
             price = curr_row['close']
             z_score = curr_row['funding_zscore']
-            regime = curr_row.get('regime', 'UNKNOWN')
             
             # EXIT
             if position:
@@ -157,7 +172,7 @@ class FundingBacktester:
                 
                 # LONG: Funding is negative (Z < -1.5)
                 if z_score < -self.z_threshold:
-                    if self.use_regime_filter and regime == 'BEAR':
+                    if not long_ok[i]:
                         continue 
                     
                     capital = capital * (1 - 0.0010)
@@ -165,7 +180,7 @@ class FundingBacktester:
                 
                 # SHORT
                 elif z_score > self.z_threshold:
-                    if self.use_regime_filter and regime == 'BULL':
+                    if not short_ok[i]:
                         continue
                     
                     capital = capital * (1 - 0.0010)
@@ -175,7 +190,9 @@ class FundingBacktester:
             
         return capital, trades, equity_curve
 
-def run_comparison(symbol='BTC/USDT', cascade_amplifier=1.0):
+def run_comparison(symbol='BTC/USDT', cascade_amplifier=1.0, data=None, regime=None, cascade=None):
+    """data: preloaded (price, funding); regime: precomputed labels for the filtered run;
+    cascade: precomputed cascade flags for both runs."""
     limit = 1500
 
     print(f"\n--- Strategy 2 Optimization (v2): Regime Gating Test ({symbol}) ---")
@@ -183,17 +200,17 @@ def run_comparison(symbol='BTC/USDT', cascade_amplifier=1.0):
         print(f"Cascade Amplifier: {cascade_amplifier}x stake when cascade fires")
 
     # Load Data (1h to match WFA methodology - funding reversion is intraday)
-    price, funding = load_data(symbol, limit)
+    price, funding = data if data is not None else load_data(symbol, limit)
 
     # 1. Baseline Run (no regime filter)
     tester_base = FundingBacktester(use_regime_filter=False, cascade_amplifier=cascade_amplifier)
     df_base = tester_base.prepare_data(price, funding)
-    cap_base, trades_base, eq_base = tester_base.run(df_base)
+    cap_base, trades_base, eq_base = tester_base.run(df_base, cascade=cascade)
 
     # 2. Optimized Run (regime filter ON)
     tester_opt = FundingBacktester(use_regime_filter=True, cascade_amplifier=cascade_amplifier)
-    df_opt = tester_opt.prepare_data(price, funding)
-    cap_opt, trades_opt, eq_opt = tester_opt.run(df_opt)
+    df_opt = tester_opt.prepare_data(price, funding, regime=regime)
+    cap_opt, trades_opt, eq_opt = tester_opt.run(df_opt, cascade=cascade)
 
     # Stats Calculation
     def get_max_dd(eq_curve):
@@ -238,12 +255,26 @@ if __name__ == "__main__":
     parser.add_argument('--symbol', default='BTC/USDT', help='Symbol to test (e.g. BTC/USDT, ETH/USDT)')
     parser.add_argument('--both', action='store_true', help='Run on both BTC and ETH (WFA showed +20%% on ETH)')
     parser.add_argument('--cascade', type=float, default=1.0, help='Cascade amplifier (2.0 = 2x stake when cascade fires)')
+    parser.add_argument('--jobs', type=int, default=2, help='With --both: fit regimes for all symbols in N processes')
     args = parser.parse_args()
 
     if args.both:
+        symbols = ['BTC/USDT', 'ETH/USDT']
+        data = {sym: load_data(sym, 1500) for sym in symbols}
+        # Fit all symbols' regimes in one batch, on the same merged frame the filtered run uses
+        frames = {sym: FundingBacktester().prepare_data(*data[sym]) for sym in symbols}
+        _, regime_panel = CryptoRegimeDetector.fit_many(frames, n_jobs=args.jobs, timeframe='1h', use_cache=True)
+        # Cascade flags for the whole universe in one cached scan
+        cascade_panel = None
+        if cascade_panel_cached is not None:
+            close = pd.DataFrame({sym: frames[sym]['close'] for sym in symbols})
+            volume = pd.DataFrame({sym: frames[sym]['volume'] for sym in symbols})
+            cascade_panel = cascade_panel_cached(close, volume)
         results = []
-        for sym in ['BTC/USDT', 'ETH/USDT']:
-            r = run_comparison(sym, cascade_amplifier=args.cascade)
+        for sym in symbols:
+            cascade = cascade_panel[sym].reindex(frames[sym].index) if cascade_panel is not None else None
+            r = run_comparison(sym, cascade_amplifier=args.cascade, data=data[sym], regime=regime_panel[sym],
+                               cascade=cascade)
             results.append(r)
         print("\n--- MULTI-ASSET SUMMARY ---")
         for r in results:
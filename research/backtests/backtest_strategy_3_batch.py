@@ -0,0 +1,141 @@
+"""
+Strategy 3 batch backtest over the full unlock calendar.
+Every token in the unlock store (utils/unlock_store.py; built-in list when empty) that has daily
+OHLCV on disk is evaluated with the V3 rules (trend filter, graduated sizing, fees and short
+funding cost), tokens in parallel, then combined into pooled equal-weight returns.
+
+    python research/backtests/backtest_strategy_3_batch.py --db data/unlocks.sqlite --jobs 4
+"""
+import sys
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from strategies.UnlockTrader import UnlockTrader
+from utils.unlock_data_loader import score_unlock_impact
+from utils.unlock_store import load_unlocks, DEFAULT_UNLOCK_DB_PATH
+from utils.data_loader import load_ohlcv
+
+FEE_PER_SIDE = 0.0010          # 0.10% per side
+FUNDING_COST_DAILY = 0.0003    # 0.03% per day held short
+MIN_BARS = 200                 # SMA200 trend filter warm-up
+
+
+def select_unlocks(unlocks: pd.DataFrame) -> pd.DataFrame:
+    """High impact negative, non-ecosystem unlocks (the V3 selection)."""
+    if unlocks.empty:
+        return unlocks
+    unlocks = unlocks.copy()
+    unlocks['impact_score'] = unlocks.apply(score_unlock_impact, axis=1)
+    return unlocks[(unlocks['impact_score'] < -1) & (unlocks['recipient_type'] != 'ecosystem')]
+
+
+def ohlcv_path(symbol: str, data_dir: str = "data/ohlcv") -> str:
+    return os.path.join(data_dir, f"{symbol.replace('/', '_')}_1d.csv")
+
+
+def unlock_returns(price_data: pd.DataFrame, unlocks: pd.DataFrame, symbol: str) -> pd.Series:
+    """Daily net returns: signal and size from the previous close, minus fees and short funding."""
+    signals_df = UnlockTrader(unlocks).generate_signals(price_data, symbol, use_trend_filter=True)
+    exec_signals = signals_df['signal'].shift(1).fillna(0)
+    exec_sizes = signals_df['size_multiplier'].shift(1).fillna(1.0)
+    asset_returns = price_data['close'].pct_change()
+
+    raw_pnl = asset_returns * exec_signals * exec_sizes
+    transaction_costs = exec_signals.diff().abs().fillna(0) * FEE_PER_SIDE
+    funding_penalty = (exec_signals == -1) * FUNDING_COST_DAILY
+    return (raw_pnl - funding_penalty - transaction_costs).dropna()
+
+
+def return_stats(returns: pd.Series) -> dict:
+    if returns.empty:
+        return {'total_return': 0.0, 'sharpe': 0.0, 'max_dd': 0.0, 'days_in_market': 0}
+    equity = (1 + returns).cumprod()
+    std = returns.std()
+    return {
+        'total_return': equity.iloc[-1] - 1,
+        'sharpe': returns.mean() / std * np.sqrt(365) if std else 0.0,
+        'max_dd': (equity / equity.cummax() - 1).min(),
+        'days_in_market': int((returns != 0).sum()),
+    }
+
+
+def _evaluate_token(task):
+    """Worker: (symbol, unlocks, data_dir) -> (symbol, net returns or None if data is missing)."""
+    symbol, unlocks, data_dir = task
+    try:
+        price_data = load_ohlcv(ohlcv_path(symbol, data_dir)).dropna()
+    except (FileNotFoundError, ValueError):
+        return symbol, None
+    if len(price_data) < MIN_BARS:
+        return symbol, None
+    return symbol, unlock_returns(price_data, unlocks, symbol)
+
+
+def run_batch(unlocks: pd.DataFrame, tokens=None, data_dir: str = "data/ohlcv", n_jobs: int = 1):
+    """
+    Backtest every token with unlocks and data. Returns (per-token stats DataFrame,
+    DataFrame of daily returns per token, pooled Series). The pooled portfolio splits capital
+    equally across the tokens with data on each day; idle tokens earn 0.
+    """
+    selected = select_unlocks(unlocks)
+    tokens = tokens or sorted(selected['symbol'].unique())
+    tasks = [(sym, selected[selected['symbol'] == sym], data_dir) for sym in tokens
+             if os.path.exists(ohlcv_path(sym, data_dir))]
+    if n_jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            outputs = list(pool.map(_evaluate_token, tasks))
+    else:
+        outputs = [_evaluate_token(task) for task in tasks]
+
+    returns = {sym: rets for sym, rets in outputs if rets is not None}
+    if not returns:
+        return pd.DataFrame(), pd.DataFrame(), pd.Series(dtype=float)
+    panel = pd.DataFrame(returns).sort_index()
+    pooled = panel.mean(axis=1, skipna=True).rename('pooled')
+    stats = pd.DataFrame({sym: return_stats(rets) for sym, rets in returns.items()}).T
+    stats['unlocks'] = [int((selected['symbol'] == sym).sum()) for sym in stats.index]
+    return stats, panel, pooled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Strategy 3 batch backtest over the unlock calendar")
+    parser.add_argument("--db", default=DEFAULT_UNLOCK_DB_PATH, help="Unlock store (built-in list if empty)")
+    parser.add_argument("--tokens", help="Comma-separated symbols (default: every token in the calendar)")
+    parser.add_argument("--exclude", default="", help="Comma-separated symbols to skip")
+    parser.add_argument("--data-dir", default="data/ohlcv")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="CSV path for pooled and per-token daily returns")
+    args = parser.parse_args()
+
+    unlocks = load_unlocks(args.db)
+    tokens = args.tokens.split(",") if args.tokens else None
+    excluded = set(filter(None, args.exclude.split(",")))
+    if excluded:
+        unlocks = unlocks[~unlocks['symbol'].isin(excluded)]
+    print(f"Strategy 3 batch: {len(unlocks)} unlock events, {unlocks['symbol'].nunique()} tokens")
+
+    stats, panel, pooled = run_batch(unlocks, tokens=tokens, data_dir=args.data_dir, n_jobs=args.jobs)
+    if stats.empty:
+        print("No tokens with unlocks and daily OHLCV data.")
+        return
+    print("\n| Token | Unlocks | Return | Sharpe | Max DD | Days in market |")
+    print("|-------|---------|--------|--------|--------|----------------|")
+    for sym, row in stats.sort_values('total_return', ascending=False).iterrows():
+        print(f"| {sym} | {row['unlocks']} | {row['total_return']:.2%} | {row['sharpe']:.2f} "
+              f"| {row['max_dd']:.2%} | {row['days_in_market']} |")
+    pooled_stats = return_stats(pooled)
+    print(f"\nPooled ({len(stats)} tokens, equal weight): Return={pooled_stats['total_return']:.2%} | "
+          f"Sharpe={pooled_stats['sharpe']:.2f} | MaxDD={pooled_stats['max_dd']:.2%}")
+    if args.output:
+        panel.assign(pooled=pooled).to_csv(args.output)
+        print(f"Saved daily returns to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@ import sys
 import os
 import pandas as pd
 import numpy as np
-import talib
 
 # Add project root to path
 sys.path.append(os.getcwd())
@@ -10,6 +9,7 @@ sys.path.append(os.getcwd())
 from strategies.UnlockTrader import UnlockTrader
 from utils.unlock_data_loader import get_upcoming_unlocks, score_unlock_impact
 from utils.data_loader import load_ohlcv
+from utils.indicator_engine import shared_engine
 
 # Tokens that consistently lose on unlock pattern; exclude from universe
 EXCLUDED_TOKENS = ['APT/USDT', 'TIA/USDT']
@@ -37,6 +37,7 @@ def run():
     high_impact_unlocks = unlocks_df[criterion]
     
     trader = UnlockTrader(high_impact_unlocks)
+    engine = shared_engine(rolling=False)
 
     tokens = [t for t in UNLOCK_UNIVERSE if t not in EXCLUDED_TOKENS]
     print(f"Universe: {tokens} (excluded: {EXCLUDED_TOKENS})")
@@ -52,7 +53,9 @@ def run():
             
         # 1. Generate Signals & Multipliers
         # generate_signals now returns DataFrame with ['signal', 'size_multiplier']
-        signals_df = trader.generate_signals(price_data, token, use_trend_filter=True)
+        # ADX/SMA200 are computed once here and reused for the funding-cost reconstruction
+        indicators = engine.frame(token, '1d', price_data)
+        signals_df = trader.generate_signals(price_data, token, use_trend_filter=True, indicators=indicators)
         
         signals = signals_df['signal']
         multipliers = signals_df['size_multiplier']
@@ -67,8 +70,8 @@ def run():
         # We need to reconstruct Short + Bull Trend status
         
         close = price_data['close'].values
-        adx = talib.ADX(price_data['high'], price_data['low'], close, timeperiod=14)
-        sma200 = talib.SMA(close, timeperiod=200)
+        adx = indicators.get('adx', timeperiod=14)
+        sma200 = indicators.get('sma', timeperiod=200)
         is_bull = (adx > 25) & (close > sma200)
         is_bull_series = pd.Series(is_bull, index=price_data.index).fillna(False)
         
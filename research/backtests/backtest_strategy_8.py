@@ -169,16 +169,18 @@ def backtest_whale_accumulation(
     }
 
 
-def run(include_midcaps=False, use_trend_filter=False, require_nansen=True):
+def run(include_midcaps=False, use_trend_filter=False, require_nansen=True, nansen_url=None):
     """
     Run backtest. require_nansen=True (default): use only real Nansen data; skip assets
     where TGM flows unavailable. require_nansen=False (--allow-synthetic): fall back
-    to momentum proxy when Nansen unavailable.
+    to momentum proxy when Nansen unavailable. nansen_url points the tracker at another
+    host (e.g. the local stand-in, utils/nansen_stub_server.py).
     """
     print("Strategy 8: Whale Accumulation Tracker Backtest")
-    from utils.nansen_whale_tracker import NansenWhaleTracker
+    from utils.nansen_whale_tracker import NansenWhaleTracker, BACKTEST_RESPONSE_CACHE_TTL
 
-    tracker = NansenWhaleTracker()
+    api_key = os.environ.get('NANSEN_API_KEY') or ('local' if nansen_url else None)
+    tracker = NansenWhaleTracker(api_key=api_key, response_cache_ttl=BACKTEST_RESPONSE_CACHE_TTL, base_url=nansen_url)
     results = {}
     universe = S8_UNIVERSE + (S8_MIDCAP_UNIVERSE if include_midcaps else [])
     skipped = []
@@ -230,5 +232,7 @@ if __name__ == "__main__":
     p.add_argument('--midcap', action='store_true', help='Include mid-caps (AVAX, LINK, ARB, OP)')
     p.add_argument('--trend-filter', action='store_true', help='Use EMA200 trend filter on synthetic signal')
     p.add_argument('--allow-synthetic', action='store_true', help='Fall back to momentum proxy when Nansen unavailable (default: real data only)')
+    p.add_argument('--nansen-url', default=None, help='Nansen API base URL (e.g. http://127.0.0.1:8765 for utils/nansen_stub_server.py)')
     args = p.parse_args()
-    run(include_midcaps=args.midcap, use_trend_filter=args.trend_filter, require_nansen=not args.allow_synthetic)
+    run(include_midcaps=args.midcap, use_trend_filter=args.trend_filter, require_nansen=not args.allow_synthetic,
+        nansen_url=args.nansen_url)
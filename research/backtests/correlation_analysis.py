@@ -7,6 +7,7 @@ import sys
 sys.path.append(os.getcwd())
 
 from research.backtests.backtest_strategy_1_v2 import WeekendMomentumBacktester, fetch_data
+from utils.ewm_covariance import ewm_correlation
 # We'll need to slightly modify backtesters to return equity curves reliably or reconstruct them.
 # For simplicity, we'll re-run a simplified version of each here.
 
@@ -75,6 +76,16 @@ def analyze():
     corr_matrix = merged.corr()
     print("\nPearson Correlation Matrix:")
     print(corr_matrix)
+
+    # Time-varying view: the static matrix hides correlation spikes in sell-offs
+    ewm_corr = ewm_correlation(merged, halflife=30)
+    names = list(merged.columns)
+    print("\nEWM Correlation (half-life 30 days):")
+    for i in range(len(names)):
+        for j in range(i + 1, len(names)):
+            series = ewm_corr[30:, i, j]
+            if len(series):
+                print(f"  {names[i]} / {names[j]}: last {series[-1]:.2f}, min {series.min():.2f}, max {series.max():.2f}")
     
     # Combined Portfolio
     # Assume equal weight (rough proxy)
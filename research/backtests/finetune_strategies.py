@@ -25,7 +25,7 @@ from research.backtests.backtest_strategy_8 import (
     S8_UNIVERSE, load_or_fetch_ohlcv, compute_synthetic_accumulation_signal,
     load_nansen_flows_or_synthetic, backtest_whale_accumulation,
 )
-from utils.nansen_whale_tracker import NansenWhaleTracker
+from utils.nansen_whale_tracker import NansenWhaleTracker, BACKTEST_RESPONSE_CACHE_TTL
 
 
 def backtest_rotation_tunable(funding_dict, init_capital=1000, window=90,
@@ -192,7 +192,7 @@ def run_s8_finetune():
     print("S8 FINE-TUNING: Whale Accumulation Tracker")
     print("="*60)
 
-    tracker = NansenWhaleTracker()
+    tracker = NansenWhaleTracker(response_cache_ttl=BACKTEST_RESPONSE_CACHE_TTL)
     data = {}
     for sym in S8_UNIVERSE:
         df = load_or_fetch_ohlcv(sym, days=365, timeframe='1d')
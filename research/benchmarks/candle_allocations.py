@@ -0,0 +1,129 @@
+"""
+Per-candle allocation benchmark for the strategy indicator path (FundingReversion on 1h).
+Replays a sliding Freqtrade-style window for several pairs and measures, per pair and candle,
+the peak memory allocated (tracemalloc) and the time spent in:
+
+- before: the frame copy FundingReversion kept (self._last_df = dataframe.copy()), a full
+  detector.predict() with its deep feature-frame copy, and TA-Lib ADX over the whole window;
+- after: RegimeColumnCache and the shared IndicatorEngine (only the new candle is computed,
+  inputs compared against views of the frame) plus the narrow per-pair Z-score.
+
+    python research/benchmarks/candle_allocations.py --pairs 8 --candles 48 --window 1000
+"""
+import sys
+import os
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import talib
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from utils.regime_detector import CryptoRegimeDetector
+from utils.regime_cache import RegimeColumnCache
+from utils.indicator_engine import IndicatorEngine
+
+
+def synthetic_ohlcv(n: int, seed: int) -> pd.DataFrame:
+    """Freqtrade-shaped 1h candles with a funding_zscore column."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n) + np.repeat(rng.normal(0, 0.003, n // 200 + 1), 200)[:n]))
+    df = pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n, freq='1h', tz='UTC'),
+        'open': close, 'high': close * (1 + np.abs(rng.normal(0, 0.004, n))),
+        'low': close * (1 - np.abs(rng.normal(0, 0.004, n))), 'close': close,
+        'volume': rng.integers(1000, 10000, n).astype(float),
+        'funding_rate': rng.normal(0.0001, 0.0002, n),
+    })
+    funding = df['funding_rate']
+    df['funding_zscore'] = (funding - funding.rolling(24).mean()) / funding.rolling(24).std()
+    return df
+
+
+class Before:
+    def __init__(self, detector):
+        self.detector = detector
+
+    def candle(self, pair, dataframe):
+        self._last_df = dataframe.copy()
+        regime = self.detector.predict(dataframe.copy())['regime_label']   # prepare_features copied its input
+        adx = talib.ADX(dataframe['high'], dataframe['low'], dataframe['close'], timeperiod=14)
+        self._last_funding_zscore = dataframe['funding_zscore'].iloc[-1]
+        return regime, adx
+
+
+class After:
+    def __init__(self, detector):
+        self.detector = detector
+        self.engine = IndicatorEngine()
+        self.caches = {}
+        self.zscores = {}
+
+    def candle(self, pair, dataframe):
+        frame = self.engine.frame(pair, '1h', dataframe)
+        cache = self.caches.get(pair)
+        if cache is None:
+            cache = self.caches[pair] = RegimeColumnCache(self.detector)
+        regime = cache.column(dataframe, indicators=frame)
+        adx = frame.get('adx', timeperiod=14)
+        self.zscores[pair] = float(dataframe['funding_zscore'].iloc[-1])
+        return regime, adx
+
+
+def run(path, frames: dict, window: int, candles: int, traced: bool) -> list:
+    """Per (pair, candle) peak allocation in bytes (traced) or seconds; warm-up candle excluded."""
+    samples = []
+    for step in range(candles + 1):
+        for pair, df in frames.items():
+            view = df.iloc[step:step + window]
+            if traced:
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                path.candle(pair, view)
+                sample = tracemalloc.get_traced_memory()[1] - base
+            else:
+                started = time.perf_counter()
+                path.candle(pair, view)
+                sample = time.perf_counter() - started
+            if step > 0:
+                samples.append(sample)
+    return samples
+
+
+def benchmark(pairs: int = 8, candles: int = 48, window: int = 1000) -> dict:
+    frames = {f"PAIR{i}/USDT:USDT": synthetic_ohlcv(window + candles, seed=i) for i in range(pairs)}
+    detector = CryptoRegimeDetector()
+    detector.fit(next(iter(frames.values())).iloc[:window])
+    result = {}
+    for label, factory in (('before', Before), ('after', After)):
+        seconds = run(factory(detector), frames, window, candles, traced=False)
+        tracemalloc.start()
+        try:
+            peaks = run(factory(detector), frames, window, candles, traced=True)
+        finally:
+            tracemalloc.stop()
+        result[label] = {'peak_kib_per_candle': float(np.mean(peaks)) / 1024,
+                         'max_peak_kib': float(np.max(peaks)) / 1024,
+                         'ms_per_candle': float(np.mean(seconds)) * 1000}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-candle allocations of the strategy indicator path")
+    parser.add_argument("--pairs", type=int, default=8)
+    parser.add_argument("--candles", type=int, default=48, help="New candles replayed per pair")
+    parser.add_argument("--window", type=int, default=1000, help="Dataframe rows per populate_indicators call")
+    args = parser.parse_args()
+
+    result = benchmark(args.pairs, args.candles, args.window)
+    print(f"{args.pairs} pairs x {args.candles} candles, {args.window}-row window")
+    print(f"{'':8s} {'peak KiB/candle':>16s} {'max KiB':>10s} {'ms/candle':>10s}")
+    for label, row in result.items():
+        print(f"{label:8s} {row['peak_kib_per_candle']:16.1f} {row['max_peak_kib']:10.1f} {row['ms_per_candle']:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
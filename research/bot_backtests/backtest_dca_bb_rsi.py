@@ -14,6 +14,7 @@ from bots.report_utils import write_backtest_report
 
 try:
     import talib
+    from utils.indicator_engine import cached_indicator
     HAS_TALIB = True
 except ImportError:
     HAS_TALIB = False
@@ -21,7 +22,7 @@ except ImportError:
 
 def compute_rsi(close, period=7):
     if HAS_TALIB:
-        return talib.RSI(close, timeperiod=period).fillna(50)
+        return cached_indicator('rsi', close, timeperiod=period).fillna(50)
     delta = close.diff()
     gain = delta.where(delta > 0, 0)
     loss = (-delta).where(delta < 0, 0)
@@ -16,7 +16,7 @@ from bots.base_bot import load_ohlcv_for_bot
 from bots.report_utils import write_backtest_report
 
 try:
-    import talib
+    from utils.indicator_engine import cached_indicator   # needs talib
     HAS_TALIB = True
 except ImportError:
     HAS_TALIB = False
@@ -25,7 +25,7 @@ except ImportError:
 def compute_rsi(close: pd.Series, period: int = 7) -> pd.Series:
     """RSI with talib or fallback."""
     if HAS_TALIB:
-        rsi = talib.RSI(close, timeperiod=period)
+        rsi = cached_indicator('rsi', close, timeperiod=period)
     else:
         delta = close.diff()
         gain = delta.where(delta > 0, 0)
@@ -67,8 +67,7 @@ def run_backtest(symbol: str, initial_capital: float = 10000.0, regime_gate: boo
         try:
             from utils.regime_detector import CryptoRegimeDetector
             det = CryptoRegimeDetector(n_regimes=4)
-            det.fit(df)
-            df_regime = det.predict(df)
+            df_regime = det.fit_cached(df)
             regime_ok = df_regime["regime_label"] != "BEAR"
             regime_ok = regime_ok.reindex(signal.index, fill_value=True)
             signal = signal & regime_ok
@@ -13,7 +13,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../.
 from bots.dca_bot import DCABotSimulator
 
 try:
-    import talib
+    from utils.indicator_engine import cached_indicator   # needs talib
     HAS_TALIB = True
 except ImportError:
     HAS_TALIB = False
@@ -27,7 +27,7 @@ except ImportError:
 
 def compute_rsi(close, period=7):
     if HAS_TALIB:
-        return talib.RSI(close, timeperiod=period).fillna(50)
+        return cached_indicator('rsi', close, timeperiod=period).fillna(50)
     delta = close.diff()
     gain = delta.where(delta > 0, 0)
     loss = (-delta).where(delta < 0, 0)
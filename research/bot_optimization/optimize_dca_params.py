@@ -5,15 +5,17 @@ import sys
 import os
 import argparse
 from itertools import product
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 from bots.dca_bot import DCABotSimulator
+from utils.shared_frames import SharedFrameStore, resolve_frame
 
 try:
-    import talib
+    from utils.indicator_engine import cached_indicator   # needs talib
     HAS_TALIB = True
 except ImportError:
     HAS_TALIB = False
@@ -21,7 +23,7 @@ except ImportError:
 
 def compute_rsi(close, period=7):
     if HAS_TALIB:
-        return talib.RSI(close, timeperiod=period).fillna(50)
+        return cached_indicator('rsi', close, timeperiod=period).fillna(50)
     delta = close.diff()
     gain = delta.where(delta > 0, 0)
     loss = (-delta).where(delta < 0, 0)
@@ -57,18 +59,46 @@ PARAM_GRID = {
 }
 
 
-def grid_search_dca(ohlcv, signal_series, param_grid=None):
+def _evaluate_combo(ohlcv, signal_series, params):
+    bot = DCABotSimulator(params)
+    metrics = bot.run(ohlcv, signal_series, initial_capital=10000)
+    return {**params, **{k: metrics.get(k, v) for k, v in [
+        ("sharpe_ratio", 0), ("max_drawdown", 0), ("win_rate", 0),
+        ("total_deals", 0), ("total_profit_pct", 0),
+    ]}}
+
+
+# Per-process data for pool workers (attached once from shared memory)
+_WORKER_DATA = {}
+
+
+def _init_worker(ohlcv_handle, signal_handle):
+    _WORKER_DATA["ohlcv"] = resolve_frame(ohlcv_handle)
+    _WORKER_DATA["signal"] = resolve_frame(signal_handle)["signal"]
+
+
+def _worker_evaluate(params):
+    return _evaluate_combo(_WORKER_DATA["ohlcv"], _WORKER_DATA["signal"], params)
+
+
+def grid_search_dca(ohlcv, signal_series, param_grid=None, n_jobs=1):
+    """
+    Evaluate every param combination. n_jobs > 1 fans combos out to a process pool;
+    OHLCV and signal are published once to shared memory instead of pickled per task.
+    """
     param_grid = param_grid or PARAM_GRID
     keys = list(param_grid.keys())
-    results = []
-    for combo in product(*param_grid.values()):
-        params = dict(zip(keys, combo))
-        bot = DCABotSimulator(params)
-        metrics = bot.run(ohlcv, signal_series, initial_capital=10000)
-        results.append({**params, **{k: metrics.get(k, v) for k, v in [
-            ("sharpe_ratio", 0), ("max_drawdown", 0), ("win_rate", 0),
-            ("total_deals", 0), ("total_profit_pct", 0),
-        ]}})
+    combos = [dict(zip(keys, combo)) for combo in product(*param_grid.values())]
+    if n_jobs > 1:
+        with SharedFrameStore() as store:
+            ohlcv_handle = store.publish(ohlcv)
+            signal_handle = store.publish(signal_series.rename("signal").to_frame())
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                     initargs=(ohlcv_handle, signal_handle)) as pool:
+                results = list(pool.map(_worker_evaluate, combos,
+                                        chunksize=max(1, len(combos) // (n_jobs * 4))))
+    else:
+        results = [_evaluate_combo(ohlcv, signal_series, params) for params in combos]
     df = pd.DataFrame(results)
     df = df.sort_values("sharpe_ratio", ascending=False)
     return df
@@ -78,6 +108,7 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--symbol", default="BTC/USDT")
     parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes (shared-memory OHLCV)")
     args = parser.parse_args()
 
     print(f"Loading {args.symbol}...")
@@ -91,7 +122,7 @@ def main():
     signal = s.where(s.notna(), False).astype(bool)
 
     print("Running grid search...")
-    results = grid_search_dca(df, signal)
+    results = grid_search_dca(df, signal, n_jobs=args.jobs)
     top = results.head(args.top)
     print(f"\nTop {args.top} by Sharpe:")
     print(top[["base_order_volume", "safety_order_volume", "max_safety_orders",
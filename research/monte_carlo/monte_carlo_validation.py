@@ -2,54 +2,104 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from utils.shared_frames import SharedFrameStore
+
+
+def _simulate_paths(values, n_simulations, seed, initial_capital, additive):
+    """Bootstrap n equity paths from per-trade values (returns, or USDT profits when additive)."""
+    rng = np.random.default_rng(seed)
+    final_equities = np.empty(n_simulations)
+    max_drawdowns = np.empty(n_simulations)
+    curves = []
+    for i in range(n_simulations):
+        shuffled = rng.choice(values, size=len(values), replace=True)
+        if additive:
+            equity_curve = initial_capital + np.cumsum(shuffled)
+        else:
+            equity_curve = initial_capital * np.cumprod(1 + shuffled)
+        equity_curve = np.insert(equity_curve, 0, initial_capital)
+        peak = np.maximum.accumulate(equity_curve)
+        if additive:
+            drawdown = np.where(peak > 0, (equity_curve - peak) / peak, 0)
+        else:
+            drawdown = (equity_curve - peak) / peak
+        final_equities[i] = equity_curve[-1]
+        max_drawdowns[i] = drawdown.min()
+        curves.append(equity_curve)
+    return final_equities, max_drawdowns, curves
+
+
+def _mc_chunk_worker(handle, n_simulations, seed, initial_capital, additive):
+    values = handle.attach()['value'].to_numpy()
+    return _simulate_paths(values, n_simulations, seed, initial_capital, additive)
+
+
+SIMULATIONS_PER_SEED = 100
+
+
+def _seed_blocks(n_simulations, random_state):
+    """
+    Fixed-size blocks of simulations, each with its own child seed of random_state.
+    Blocks do not depend on n_jobs, so every parallel run with the same seed draws the same paths.
+    """
+    sizes = [SIMULATIONS_PER_SEED] * (n_simulations // SIMULATIONS_PER_SEED)
+    if n_simulations % SIMULATIONS_PER_SEED:
+        sizes.append(n_simulations % SIMULATIONS_PER_SEED)
+    return sizes, np.random.SeedSequence(random_state).spawn(len(sizes))
+
+
+def _simulate(values, n_simulations, random_state, n_jobs, initial_capital, additive):
+    """
+    n_jobs <= 1: one default_rng(random_state) stream in-process (same paths as before
+    parallel runs existed). n_jobs > 1: seed blocks across a process pool over trade values
+    published once to shared memory; reproducible for any n_jobs > 1, but not the same paths
+    as the serial stream.
+    """
+    if n_jobs <= 1:
+        return _simulate_paths(values, n_simulations, random_state, initial_capital, additive)
+    sizes, seeds = _seed_blocks(n_simulations, random_state)
+    n_blocks = len(sizes)
+    with SharedFrameStore() as store:
+        handle = store.publish(pd.DataFrame({'value': np.asarray(values, dtype=float)}))
+        with ProcessPoolExecutor(max_workers=min(n_jobs, n_blocks)) as pool:
+            chunks = list(pool.map(_mc_chunk_worker, [handle] * n_blocks, sizes, seeds,
+                                   [initial_capital] * n_blocks, [additive] * n_blocks))
+    final_equities = np.concatenate([c[0] for c in chunks])
+    max_drawdowns = np.concatenate([c[1] for c in chunks])
+    curves = [curve for c in chunks for curve in c[2]]
+    return final_equities, max_drawdowns, curves
+
 
 class MonteCarloValidator:
     def __init__(self, trades_df, initial_capital=1000):
         self.trades_df = trades_df.copy()
         self.initial_capital = initial_capital
 
-    def run_simulation(self, n_simulations=1000, plot=False, random_state=None):
+    def run_simulation(self, n_simulations=1000, plot=False, random_state=None, n_jobs=1):
         """
         Reshuffle trades n times and calculate equity curves.
         random_state: int for reproducible results (e.g. 42).
+        n_jobs: >1 splits simulations across processes over a shared-memory pnl array (its own seeding,
+        identical for any n_jobs > 1 but not to the serial run).
         """
         if self.trades_df.empty:
             print("No trades to simulate.")
             return None
 
         pnl_pcts = self.trades_df['pnl'].values
-        rng = np.random.default_rng(random_state)
-
-        simulation_results = []
-        final_equities = []
-        max_drawdowns = []
 
         print(f"Running {n_simulations} Monte Carlo simulations...")
 
-        for i in range(n_simulations):
-            # 1. Shuffle returns
-            shuffled_pnls = rng.choice(pnl_pcts, size=len(pnl_pcts), replace=True)
-            
-            # 2. Calculate equity curve
-            # equity = start * (1+r1) * (1+r2) ...
-            equity_curve = self.initial_capital * np.cumprod(1 + shuffled_pnls)
-            equity_curve = np.insert(equity_curve, 0, self.initial_capital)
-            
-            final_equity = equity_curve[-1]
-            final_equities.append(final_equity)
-            
-            # 3. Calculate Max Drawdown for this path
-            peak = np.maximum.accumulate(equity_curve)
-            drawdown = (equity_curve - peak) / peak
-            max_dd = drawdown.min()
-            max_drawdowns.append(max_dd)
-            
-            simulation_results.append(equity_curve)
-            
+        final_equities, max_drawdowns, simulation_results = _simulate(
+            pnl_pcts, n_simulations, random_state, n_jobs, self.initial_capital, additive=False)
+
         # Statistics
-        final_equities = np.array(final_equities)
-        max_drawdowns = np.array(max_drawdowns)
-        
         ruin_prob = (final_equities < self.initial_capital).mean()
         dd_prob_20 = (max_drawdowns < -0.20).mean()
         var_95 = np.percentile(final_equities, 5)
@@ -91,38 +141,20 @@ class MonteCarloValidatorGrid:
         # trades_df['pnl'] is return fraction per cell
         self.profit_per_trade = self.trades_df['pnl'].values * self.capital_per_trade
 
-    def run_simulation(self, n_simulations=1000, plot=False, random_state=None):
-        """Reshuffle trades n times; equity = initial + cumsum(profit_usdt). random_state for reproducibility."""
+    def run_simulation(self, n_simulations=1000, plot=False, random_state=None, n_jobs=1):
+        """
+        Reshuffle trades n times; equity = initial + cumsum(profit_usdt). random_state for reproducibility.
+        n_jobs: >1 splits simulations across processes over a shared-memory profit array (its own seeding,
+        identical for any n_jobs > 1 but not to the serial run).
+        """
         if self.trades_df.empty:
             print("No trades to simulate.")
             return None
 
-        rng = np.random.default_rng(random_state)
-        simulation_results = []
-        final_equities = []
-        max_drawdowns = []
-
         print(f"Running {n_simulations} Monte Carlo simulations (grid, additive)...")
 
-        for i in range(n_simulations):
-            shuffled_profits = rng.choice(
-                self.profit_per_trade, size=len(self.profit_per_trade), replace=True
-            )
-            equity_curve = self.initial_capital + np.cumsum(shuffled_profits)
-            equity_curve = np.insert(equity_curve, 0, self.initial_capital)
-
-            final_equity = equity_curve[-1]
-            final_equities.append(final_equity)
-
-            peak = np.maximum.accumulate(equity_curve)
-            drawdown = np.where(peak > 0, (equity_curve - peak) / peak, 0)
-            max_dd = drawdown.min()
-            max_drawdowns.append(max_dd)
-
-            simulation_results.append(equity_curve)
-
-        final_equities = np.array(final_equities)
-        max_drawdowns = np.array(max_drawdowns)
+        final_equities, max_drawdowns, simulation_results = _simulate(
+            self.profit_per_trade, n_simulations, random_state, n_jobs, self.initial_capital, additive=True)
 
         ruin_prob = (final_equities < self.initial_capital).mean()
         dd_prob_20 = (max_drawdowns < -0.20).mean()
@@ -1,6 +1,8 @@
 """
 Monte Carlo validation for DCA bot WFA trades.
 Usage: python run_mc_dca.py --strategy sa --symbol BTC/USDT
+--jobs > 1 seeds each block of 100 simulations from --seed, so its results are the same for
+any --jobs > 1 but differ from the default serial run (one stream from --seed).
 """
 import sys
 import os
@@ -18,6 +20,7 @@ def main():
     parser.add_argument("--capital", type=float, default=1000)
     parser.add_argument("--simulations", type=int, default=1000)
     parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible MC (default 42)")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes for simulations")
     args = parser.parse_args()
 
     wfa_file = f"research/walk_forward/results/wfa_dca_{args.strategy}_{args.symbol.replace('/', '_')}.csv"
@@ -32,7 +35,7 @@ def main():
         return
 
     validator = MonteCarloValidator(trades, initial_capital=args.capital)
-    stats, _ = validator.run_simulation(n_simulations=args.simulations, random_state=args.seed)
+    stats, _ = validator.run_simulation(n_simulations=args.simulations, random_state=args.seed, n_jobs=args.jobs)
     validator.generate_report(stats)
 
     os.makedirs("research/monte_carlo/results", exist_ok=True)
@@ -16,13 +16,22 @@ from research.walk_forward.walk_forward_analysis import WalkForwardAnalyzer
 from bots.dca_bot import DCABotSimulator
 
 
-def _make_regime_gate_hook():
-    """Return pre_test_hook that skips DCA when test window regime is BEAR (mean reversion fails)."""
+def _make_regime_gate_hook(n_restarts=1, warm_start=False):
+    """
+    Return pre_test_hook that skips DCA when test window regime is BEAR (mean reversion fails).
+    n_restarts: HMM random restarts per window (best likelihood kept).
+    warm_start: initialise each window's HMM from the previous window's fit (windows in run order).
+    """
+    state = {"prev": None}
+
     def hook(train_price, test_price, best_params):
         try:
             from utils.regime_detector import CryptoRegimeDetector
             det = CryptoRegimeDetector(n_regimes=4)
-            det.fit(train_price)
+            det.fit_cached(train_price, n_restarts=n_restarts,
+                           warm_start=state["prev"] if warm_start else None)
+            if det.model is not None:
+                state["prev"] = det
             regime = det.current_regime(test_price)
             if regime == "BEAR":
                 return False  # Skip DCA in bear regime
@@ -34,6 +43,7 @@ def _make_regime_gate_hook():
 
 try:
     import talib
+    from utils.indicator_engine import cached_indicator
     HAS_TALIB = True
 except ImportError:
     HAS_TALIB = False
@@ -41,7 +51,7 @@ except ImportError:
 
 def compute_rsi(close: pd.Series, period: int = 7) -> pd.Series:
     if HAS_TALIB:
-        return talib.RSI(close, timeperiod=period).fillna(50)
+        return cached_indicator('rsi', close, timeperiod=period).fillna(50)
     delta = close.diff()
     gain = delta.where(delta > 0, 0)
     loss = (-delta).where(delta < 0, 0)
@@ -74,8 +84,7 @@ def dca_strategy_sa(price_df: pd.DataFrame, funding_df=None, **params) -> pd.Dat
         try:
             from utils.regime_detector import CryptoRegimeDetector
             det = CryptoRegimeDetector(n_regimes=4)
-            det.fit(df)
-            df_regime = det.predict(df)
+            df_regime = det.fit_cached(df)
             regime_ok = df_regime["regime_label"] != "BEAR"
             regime_ok = regime_ok.reindex(signal.index, fill_value=True)
             signal = signal & regime_ok
@@ -161,7 +170,17 @@ def main():
                         help="compound=total return, ev=EV×win_rate for optimization")
     parser.add_argument("--optuna-trials", type=int, default=None,
                         help="When --score-mode ev: use Optuna instead of grid search (e.g. 50)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Evaluate WFA windows in N processes (price data shared via shared memory)")
+    parser.add_argument("--regime-restarts", type=int, default=1,
+                        help="With --regime-gate: HMM random restarts per window, best likelihood kept")
+    parser.add_argument("--regime-warm-start", action="store_true",
+                        help="With --regime-gate: warm-start each window's HMM from the previous window "
+                             "(requires --jobs 1)")
     args = parser.parse_args()
+    # Warm starts chain through the hook's state; forked window workers would each see an empty chain
+    if args.regime_warm_start and args.jobs > 1:
+        parser.error("--regime-warm-start needs the windows in run order; use it with --jobs 1")
 
     strategy_map = {"sa": dca_strategy_sa, "sc": dca_strategy_sc}
     strategy_func = strategy_map.get(args.strategy, dca_strategy_sa)
@@ -191,8 +210,6 @@ def main():
     if args.regime_gate:
         param_grid["regime_gate"] = [True]
 
-    pre_test_hook = _make_regime_gate_hook() if args.regime_gate else None
-
     symbols = ["BTC/USDT", "ETH/USDT", "SOL/USDT"] if args.pool else [args.symbol]
     all_results = []
     for sym in symbols:
@@ -201,6 +218,10 @@ def main():
             print(f"Insufficient data for {sym}.")
             continue
         print(f"\n--- WFA {sym} ---")
+        # One hook per symbol so warm starts never chain across symbols
+        pre_test_hook = _make_regime_gate_hook(
+            n_restarts=args.regime_restarts, warm_start=args.regime_warm_start,
+        ) if args.regime_gate else None
         analyzer = WalkForwardAnalyzer(
             strategy_func,
             param_grid,
@@ -211,6 +232,7 @@ def main():
             score_mode=args.score_mode,
             pre_test_hook=pre_test_hook,
             optuna_trials=args.optuna_trials,
+            n_jobs=args.jobs,
         )
         res = analyzer.run()
         if not res.empty:
@@ -21,7 +21,7 @@ def _make_regime_gate_hook():
         try:
             from utils.regime_detector import CryptoRegimeDetector
             det = CryptoRegimeDetector(n_regimes=4)
-            det.fit(train_price)
+            det.fit_cached(train_price)
             regime = det.current_regime(test_price)
             if regime == "BULL":
                 return False  # Skip grid in strong trend
@@ -10,6 +10,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 
 from research.walk_forward.walk_forward_analysis import WalkForwardAnalyzer
 from utils.data_loader import find_funding_path
+from utils.risk_overlay import RiskOverlay
 
 # Re-implement strategy logic function that accepts dataframes directly
 # (Importing from backtest_strategy_2 might be messy if it relies on loading files internally)
@@ -78,6 +79,7 @@ def strategy_logic(price_df, funding_df, z_score_threshold=2.0, adx_threshold=25
                     
             if should_exit:
                 trades.append({
+                    'entry_time': position['entry_time'],
                     'exit_time': curr_time,
                     'pnl': pnl_pct
                 })
@@ -86,9 +88,9 @@ def strategy_logic(price_df, funding_df, z_score_threshold=2.0, adx_threshold=25
         if position is None:
             if adx < adx_threshold:
                 if z_score < -z_score_threshold:
-                    position = {'side': 'long', 'entry_price': curr_close}
+                    position = {'side': 'long', 'entry_price': curr_close, 'entry_time': curr_time}
                 elif z_score > z_score_threshold:
-                    position = {'side': 'short', 'entry_price': curr_close}
+                    position = {'side': 'short', 'entry_price': curr_close, 'entry_time': curr_time}
                     
     return pd.DataFrame(trades)
 
@@ -108,6 +110,8 @@ if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument('--symbol', default='ETH/USDT')
+    parser.add_argument('--risk-overlay', action='store_true',
+                        help='Apply RiskManager limits, 20%% position cap and the drawdown throttle to test trades')
     args = parser.parse_args()
     
     print(f"Loading data for {args.symbol}...")
@@ -129,7 +133,8 @@ if __name__ == "__main__":
         price, 
         funding,
         train_window_days=180, # 6 months train
-        test_window_days=30    # 1 month test
+        test_window_days=30,   # 1 month test
+        risk_overlay=RiskOverlay({'throttle': 'funding_reversion'}) if args.risk_overlay else None,
     )
     
     results = analyzer.run()
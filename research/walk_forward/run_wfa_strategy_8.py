@@ -25,8 +25,8 @@ _wfa_tracker = None
 def _get_tracker():
     global _wfa_tracker
     if _wfa_tracker is None:
-        from utils.nansen_whale_tracker import NansenWhaleTracker
-        _wfa_tracker = NansenWhaleTracker()
+        from utils.nansen_whale_tracker import NansenWhaleTracker, BACKTEST_RESPONSE_CACHE_TTL
+        _wfa_tracker = NansenWhaleTracker(response_cache_ttl=BACKTEST_RESPONSE_CACHE_TTL)
     return _wfa_tracker
 
 
@@ -2,9 +2,18 @@
 import pandas as pd
 import numpy as np
 import itertools
+import io
+import contextlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import timedelta
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from utils.shared_frames import SharedFrameStore, resolve_frame
+
 try:
     import optuna
     HAS_OPTUNA = True
@@ -32,15 +41,47 @@ def _optuna_to_dca_params(trial_params: dict, extra: dict = None) -> dict:
     }
 
 
+def _slice_window(df, start, end):
+    """Rows with start <= index < end. Positional slice (a view) when the index is sorted."""
+    if df.index.is_monotonic_increasing:
+        lo, hi = df.index.searchsorted([start, end], side="left")
+        return df.iloc[lo:hi]
+    return df.loc[(df.index >= start) & (df.index < end)]
+
+
+# Per-process analyzer used by pool workers (built once in the initializer).
+_WORKER_STATE = {}
+
+
+def _init_wfa_worker(strategy_func, param_grid, price_handle, funding_handle, config):
+    _WORKER_STATE["analyzer"] = WalkForwardAnalyzer(
+        strategy_func, param_grid, resolve_frame(price_handle),
+        funding_df=resolve_frame(funding_handle), **config,
+    )
+
+
+def _wfa_window_worker(window):
+    """Evaluate one (train_start, train_end, test_end) window; returns (log text, test trades)."""
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        result = _WORKER_STATE["analyzer"]._run_window(*window)
+    return buf.getvalue(), result
+
+
 class WalkForwardAnalyzer:
     def __init__(self, strategy_func, param_grid, price_df, funding_df=None,
                  train_window_days=180, test_window_days=30, score_mode="compound",
-                 pre_test_hook=None, optuna_trials=None):
+                 pre_test_hook=None, optuna_trials=None, n_jobs=1, risk_overlay=None):
         """
         score_mode: "compound" for DCA/Signal (equity compounds), "sum" for Grid (fixed capital per cell),
         "ev" for DCA EV-based optimization (ev_per_deal * win_rate).
         pre_test_hook: optional (train_price, test_price, best_params) -> bool. If False, skip test window.
         optuna_trials: when set with score_mode="ev", use Optuna instead of grid search (e.g. 50).
+        n_jobs: >1 evaluates windows in a process pool. Price/funding are published once to shared
+        memory and workers attach zero-copy views. strategy_func (and pre_test_hook) must be
+        module-level functions unless the platform forks.
+        risk_overlay: optional trades -> trades applied to each test window's trades before they
+        are scored and stored, e.g. utils.risk_overlay.RiskOverlay(config).
         """
         self.strategy = strategy_func
         self.param_grid = param_grid
@@ -51,6 +92,8 @@ class WalkForwardAnalyzer:
         self.score_mode = score_mode
         self.pre_test_hook = pre_test_hook
         self.optuna_trials = optuna_trials
+        self.n_jobs = n_jobs or 1
+        self.risk_overlay = risk_overlay
         
     def generate_windows(self):
         """Generator for (train_start, train_end, test_end)"""
@@ -70,13 +113,11 @@ class WalkForwardAnalyzer:
         best_params = None
         best_score = -np.inf
 
-        mask = (self.price_df.index >= start_date) & (self.price_df.index < end_date)
-        train_price = self.price_df.loc[mask]
+        train_price = _slice_window(self.price_df, start_date, end_date)
 
         train_funding = None
         if self.funding_df is not None:
-            mask_f = (self.funding_df.index >= start_date) & (self.funding_df.index < end_date)
-            train_funding = self.funding_df.loc[mask_f]
+            train_funding = _slice_window(self.funding_df, start_date, end_date)
 
         # Extra params from grid to pass through (e.g. regime_gate)
         optuna_extra = {k: v[0] for k, v in self.param_grid.items()
@@ -162,57 +203,91 @@ class WalkForwardAnalyzer:
 
         return best_params, best_score
 
+    def _run_window(self, train_start, train_end, test_end):
+        """Optimize on one train window and evaluate on its test window. Returns test trades or None."""
+        print(f"  Window: {train_start.date()} -> {train_end.date()} (Test -> {test_end.date()})")
+
+        # 1. Optimize
+        best_params, train_score = self.optimize(train_start, train_end)
+
+        if best_params is None:
+            print("    No profitable params found in train.")
+            return None
+
+        score_fmt = f"{train_score:.2f}" if self.score_mode == "ev" else f"{train_score:.2%}"
+        print(f"    Best Params: {best_params} (Score: {score_fmt})")
+
+        # 2. Test
+        test_price = _slice_window(self.price_df, train_end, test_end)
+        train_price = _slice_window(self.price_df, train_start, train_end)
+
+        if self.pre_test_hook is not None:
+            if not self.pre_test_hook(train_price, test_price, best_params):
+                print(f"    Test skipped (pre_test_hook)")
+                return None
+
+        test_funding = None
+        if self.funding_df is not None:
+            test_funding = _slice_window(self.funding_df, train_end, test_end)
+
+        test_results = self.strategy(test_price, test_funding, **best_params)
+
+        if self.risk_overlay is not None and test_results is not None and not test_results.empty:
+            n_trades = len(test_results)
+            test_results = self.risk_overlay(test_results)
+            if len(test_results) < n_trades:
+                print(f"    Risk overlay: {n_trades - len(test_results)}/{n_trades} trades blocked")
+
+        if test_results is not None and not test_results.empty:
+            if self.score_mode == "sum":
+                ret = test_results['pnl'].sum()
+            elif self.score_mode == "ev":
+                ret = (test_results['pnl'] + 1).prod() - 1  # OOS return for display
+            else:
+                ret = (test_results['pnl'] + 1).prod() - 1
+            print(f"    Test Return: {ret:.2%}")
+
+            # Store trades
+            test_results['window_start'] = train_end
+            return test_results
+
+        print(f"    Test Return: 0.00%")
+        return None
+
+    def _run_parallel(self, windows):
+        """Evaluate windows in a process pool over shared-memory price/funding. Logs print in window order."""
+        config = {
+            "train_window_days": self.train_window / timedelta(days=1),
+            "test_window_days": self.test_window / timedelta(days=1),
+            "score_mode": self.score_mode,
+            "pre_test_hook": self.pre_test_hook,
+            "optuna_trials": self.optuna_trials,
+            "risk_overlay": self.risk_overlay,
+        }
+        results = []
+        with SharedFrameStore() as store:
+            price_handle = store.publish(self.price_df)
+            funding_handle = store.publish(self.funding_df)
+            with ProcessPoolExecutor(
+                max_workers=min(self.n_jobs, len(windows)),
+                initializer=_init_wfa_worker,
+                initargs=(self.strategy, self.param_grid, price_handle, funding_handle, config),
+            ) as pool:
+                for output, result in pool.map(_wfa_window_worker, windows):
+                    print(output, end="")
+                    results.append(result)
+        return results
+
     def run(self):
-        walk_forward_results = []
-        
         print(f"Starting Walk-Forward Analysis...")
         print(f"Train: {self.train_window.days}d, Test: {self.test_window.days}d")
-        
-        for train_start, train_end, test_end in self.generate_windows():
-            print(f"  Window: {train_start.date()} -> {train_end.date()} (Test -> {test_end.date()})")
-            
-            # 1. Optimize
-            best_params, train_score = self.optimize(train_start, train_end)
-            
-            if best_params is None:
-                print("    No profitable params found in train.")
-                continue
-                
-            score_fmt = f"{train_score:.2f}" if self.score_mode == "ev" else f"{train_score:.2%}"
-            print(f"    Best Params: {best_params} (Score: {score_fmt})")
-            
-            # 2. Test
-            mask_test = (self.price_df.index >= train_end) & (self.price_df.index < test_end)
-            test_price = self.price_df.loc[mask_test]
-            mask_train = (self.price_df.index >= train_start) & (self.price_df.index < train_end)
-            train_price = self.price_df.loc[mask_train]
-
-            if self.pre_test_hook is not None:
-                if not self.pre_test_hook(train_price, test_price, best_params):
-                    print(f"    Test skipped (pre_test_hook)")
-                    continue
-
-            test_funding = None
-            if self.funding_df is not None:
-                mask_tf = (self.funding_df.index >= train_end) & (self.funding_df.index < test_end)
-                test_funding = self.funding_df.loc[mask_tf]
-                
-            test_results = self.strategy(test_price, test_funding, **best_params)
-            
-            if test_results is not None and not test_results.empty:
-                if self.score_mode == "sum":
-                    ret = test_results['pnl'].sum()
-                elif self.score_mode == "ev":
-                    ret = (test_results['pnl'] + 1).prod() - 1  # OOS return for display
-                else:
-                    ret = (test_results['pnl'] + 1).prod() - 1
-                print(f"    Test Return: {ret:.2%}")
-                
-                # Store trades
-                test_results['window_start'] = train_end
-                walk_forward_results.append(test_results)
-            else:
-                print(f"    Test Return: 0.00%")
+
+        windows = list(self.generate_windows())
+        if self.n_jobs > 1 and len(windows) > 1:
+            outcomes = self._run_parallel(windows)
+        else:
+            outcomes = (self._run_window(*window) for window in windows)
+        walk_forward_results = [r for r in outcomes if r is not None]
         
         if not walk_forward_results:
             return pd.DataFrame()
@@ -76,7 +76,7 @@ class BasisHarvest(BaseStrategy):
                             time_in_force: str, current_time: str, entry_tag: str,
                             side: str, **kwargs) -> bool:
         # Block in BULL regime
-        if self.risk_manager.current_regime == 'BULL':
+        if self.pair_regime(pair) == 'BULL':
             logger.warning("BasisHarvest: Blocked in BULL regime (short gamma risk)")
             return False
         return super().confirm_trade_entry(pair, order_type, amount, rate,
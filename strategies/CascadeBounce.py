@@ -1,13 +1,13 @@
 
 import pandas as pd
 import numpy as np
-import talib
 import os
 import sys
 
 # Add parent directory to path to allow importing utils if needed
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.data_loader import load_ohlcv
+from utils.indicator_engine import shared_engine
 
 def backtest_cascade_bounce(symbol='BTC_USDT'):
     # file paths
@@ -26,19 +26,20 @@ def backtest_cascade_bounce(symbol='BTC_USDT'):
         print(f"Error loading data: {e}")
         return
 
-    # --- INDICATORS ---
+    # --- INDICATORS --- (shared cache: other scripts in this process reuse the columns)
+    indicators = shared_engine(rolling=False).frame(symbol, '1h', df)
     # 1. RSI
-    df['rsi'] = talib.RSI(df['close'], timeperiod=14)
+    df['rsi'] = indicators.get('rsi', timeperiod=14)
     
     # 2. ATR
-    df['atr'] = talib.ATR(df['high'], df['low'], df['close'], timeperiod=14)
+    df['atr'] = indicators.get('atr', timeperiod=14)
     
     # 3. EMA for Trend/Entry
-    df['ema9'] = talib.EMA(df['close'], timeperiod=9)
-    df['ema200'] = talib.EMA(df['close'], timeperiod=200)
+    df['ema9'] = indicators.get('ema', timeperiod=9)
+    df['ema200'] = indicators.get('ema', timeperiod=200)
     
     # 4. Volume SMA
-    df['vol_sma'] = talib.SMA(df['volume'], timeperiod=24)
+    df['vol_sma'] = indicators.get('sma', timeperiod=24, column='volume')
     
     # Signals
     df['oversold'] = df['rsi'] < 30 
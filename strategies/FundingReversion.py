@@ -1,16 +1,16 @@
 # Strategies/FundingReversion.py
 from pandas import DataFrame
-import talib.abstract as ta
 import pandas as pd
 import numpy as np
 import logging
 
 from base_strategy import BaseStrategy
+from utils.risk_overlay import FUNDING_REVERSION_THROTTLE, drawdown_throttle
 
 try:
-    from utils.cascade_detector import cascade_fires_now
+    from utils.cascade_detector import CascadeDetector
 except ImportError:
-    cascade_fires_now = lambda df, fd=None: False
+    CascadeDetector = None
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +49,15 @@ class FundingReversion(BaseStrategy):
         "adx_threshold": 20
     }
     
+    def __init__(self, config: dict) -> None:
+        super().__init__(config)
+        # Per-pair streaming cascade state (Phase 2B.5); fed once per new candle
+        self.cascade_detector = CascadeDetector() if CascadeDetector is not None else None
+        # Per-pair funding Z-score at the last candle, for custom_stake_amount (Phase 2B.3)
+        self._funding_zscores = {}
+        # Drawdown throttle halt (Phase 2B.3): set at 15% drawdown, cleared below 8%
+        self._throttle_halted = False
+
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         # 1. Base Strategy Indicators (Regime Detection)
         dataframe = super().populate_indicators(dataframe, metadata)
@@ -64,16 +73,15 @@ class FundingReversion(BaseStrategy):
         dataframe['funding_zscore'] = (dataframe['funding_rate'] - dataframe['funding_mean']) / dataframe['funding_std']
         
         # ADX for Trend Filtering
-        dataframe['adx'] = ta.ADX(dataframe, timeperiod=14)
+        dataframe['adx'] = self.indicator_frame(dataframe, metadata).get('adx', timeperiod=14)
         
-        # Store last funding zscore for dynamic position sizing (Phase 2B.3)
-        if len(dataframe) > 0 and 'funding_zscore' in dataframe.columns:
-            self._last_funding_zscore = dataframe['funding_zscore'].iloc[-1]
-        else:
-            self._last_funding_zscore = 0.0
+        # Keep only the pair's last funding zscore for dynamic position sizing (Phase 2B.3)
+        self._funding_zscores[metadata.get('pair')] = (
+            float(dataframe['funding_zscore'].iloc[-1]) if len(dataframe) > 0 else 0.0)
         
-        # Store last df for cascade detection (Phase 2B.5)
-        self._last_df = dataframe.copy() if len(dataframe) > 0 else None
+        # Advance cascade detection to the last candle (Phase 2B.5)
+        if self.cascade_detector is not None:
+            self.cascade_detector.sync(metadata.get('pair'), dataframe)
         
         return dataframe
 
@@ -83,34 +91,39 @@ class FundingReversion(BaseStrategy):
                             **kwargs) -> float:
         """
         Dynamic position sizing (Phase 2B.3): Z=1.5->0.5%, Z=2.0->1.0%, Z=2.5+->1.5%.
-        Drawdown throttle: >10% halve size, >15% zero until recovers to 8%.
+        Drawdown throttle: >10% halve size, >15% no entry (stake 0) until recovers below 8%.
         """
-        # 1. Drawdown throttle (Phase 2B.3)
+        # 1. Drawdown throttle (Phase 2B.3), same table as the backtest RiskOverlay
         rm = self.risk_manager
         if rm.peak_capital > 0:
             drawdown = (rm.peak_capital - rm.current_capital) / rm.peak_capital
-            if drawdown >= 0.15:
-                logger.warning(f"Drawdown throttle: {drawdown:.1%} >= 15%, blocking new position")
-                return min_stake
-            throttle_mult = 0.5 if drawdown >= 0.10 else 1.0
+            throttle_mult, self._throttle_halted = drawdown_throttle(
+                drawdown, self._throttle_halted, FUNDING_REVERSION_THROTTLE['levels'],
+                FUNDING_REVERSION_THROTTLE['resume_below'])
+            if throttle_mult == 0.0:
+                logger.warning(f"Drawdown throttle: {drawdown:.1%}, blocking new position until below "
+                               f"{FUNDING_REVERSION_THROTTLE['resume_below']:.0%}")
+                return 0
         else:
             throttle_mult = 1.0
         
         # 2. Z-based risk (Phase 2B.3)
-        z = getattr(self, '_last_funding_zscore', 1.5)
+        z = self._funding_zscores.get(pair, 1.5)
         risk_pct = _z_to_risk(z)
         
         stop_distance_pct = abs(self.stoploss)
         stop_price = current_rate * (1 - stop_distance_pct) if side == 'long' else current_rate * (1 + stop_distance_pct)
         
-        safe_amount = rm.calculate_position_size(current_rate, stop_price, risk_per_trade=risk_pct)
+        safe_amount = rm.calculate_position_size(current_rate, stop_price, risk_per_trade=risk_pct,
+                                                  strategy_id=self.__class__.__name__, symbol=pair, side=side,
+                                                  regime=self.pair_regime(pair))
         stake = safe_amount * current_rate * throttle_mult
         
         # Cascade amplifier (Phase 2B.5): boost stake when cascade fires.
         # Phase 3A: 2x caused DD > 25%; reduced to 1.5x. Set to 1.0 to disable.
         CASCADE_AMPLIFIER = 1.5
-        if CASCADE_AMPLIFIER > 1.0 and getattr(self, '_last_df', None) is not None and len(self._last_df) > 50:
-            if cascade_fires_now(self._last_df, None):
+        if CASCADE_AMPLIFIER > 1.0 and self.cascade_detector is not None:
+            if self.cascade_detector.fires_now(pair):
                 stake *= CASCADE_AMPLIFIER
                 logger.info(f"Cascade amplifier: {CASCADE_AMPLIFIER}x stake for {pair}")
         
@@ -2,14 +2,65 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+# Signal windows around an unlock: short from 30 days before to 1 day before (inclusive),
+# long (relief bounce) from 14 to 20 days after.
+SHORT_WINDOW = (timedelta(days=30), timedelta(days=1))
+LONG_WINDOW = (timedelta(days=14), timedelta(days=20))
+
+
+def _window_bars(index, starts, ends):
+    """Bar positions [first, stop) inside each inclusive [start, end] window."""
+    return index.searchsorted(starts, side='left'), index.searchsorted(ends, side='right')
+
+
+def _coverage(index, starts, ends):
+    """Number of windows covering each bar (difference array over window edges)."""
+    first, stop = _window_bars(index, starts, ends)
+    diff = np.zeros(len(index) + 1, dtype=np.int64)
+    np.add.at(diff, first, 1)
+    np.add.at(diff, stop, -1)
+    return np.cumsum(diff[:-1])
+
+
+def _last_covering(index, starts, ends, order):
+    """
+    Largest `order` among the windows covering each bar, -1 where none does. All windows have
+    the same length, so sorted by start their stops are sorted too and the windows covering a
+    bar form one contiguous run; its maximum comes from a sparse table (log2(events) levels).
+    """
+    by_start = np.argsort(starts.asi8, kind='stable')
+    first, stop = _window_bars(index, starts[by_start], ends[by_start])
+    values = np.asarray(order)[by_start]
+    bars = np.arange(len(index))
+    hi = np.searchsorted(first, bars, side='right')   # windows starting at or before the bar
+    lo = np.searchsorted(stop, bars, side='right')    # ...of which these already ended
+
+    table = [values]
+    while 2 ** len(table) <= len(values):
+        prev, width = table[-1], 2 ** (len(table) - 1)
+        table.append(np.maximum(prev[:-width], prev[width:]))
+
+    out = np.full(len(index), -1, dtype=np.int64)
+    covered = np.flatnonzero(hi > lo)
+    level = np.frexp((hi - lo)[covered])[1] - 1        # floor(log2(run length))
+    for lv in np.unique(level):
+        rows = covered[level == lv]
+        out[rows] = np.maximum(table[lv][lo[rows]], table[lv][hi[rows] - 2 ** lv])
+    return out
+
+
 class UnlockTrader:
     def __init__(self, unlock_data):
         self.unlocks = unlock_data
         
-    def generate_signals(self, price_data, token_symbol, use_trend_filter=False):
+    def generate_signals(self, price_data, token_symbol, use_trend_filter=False, unlock_dates=None,
+                         indicators=None):
         """
         Generates buy/sell signals based on unlock events.
         Returns a DataFrame with columns: ['signal', 'size_multiplier']
+        unlock_dates overrides the token's rows of the unlock table (used by the panel mode).
+        indicators: IndicatorFrame over price_data, so the trend filter's ADX/SMA200 come from
+        (and stay in) the shared indicator cache.
         """
         import talib
         
@@ -24,11 +75,15 @@ class UnlockTrader:
             high = price_data['high'].values
             low = price_data['low'].values
             
-            # ADX for trend strength
-            adx = talib.ADX(high, low, close, timeperiod=14)
-            
-            # SMA200 for trend direction
-            sma200 = talib.SMA(close, timeperiod=200)
+            if indicators is not None:
+                adx = indicators.get('adx', timeperiod=14)
+                sma200 = indicators.get('sma', timeperiod=200)
+            else:
+                # ADX for trend strength
+                adx = talib.ADX(high, low, close, timeperiod=14)
+
+                # SMA200 for trend direction
+                sma200 = talib.SMA(close, timeperiod=200)
             
             # Bull Trend Condition: High ADX (>25) AND Price > SMA200
             is_bull_trend = (adx > 25) & (close > sma200)
@@ -45,43 +100,54 @@ class UnlockTrader:
             is_bull_trend = pd.Series(False, index=price_data.index)
             narrative_filter = pd.Series(False, index=price_data.index)
         
-        token_unlocks = self.unlocks[self.unlocks['symbol'] == token_symbol]
-        
-        for _, row in token_unlocks.iterrows():
-            unlock_date = row['unlock_date']
-            
-            # Short Window: 30 days before
-            short_start = unlock_date - timedelta(days=30)
-            short_end = unlock_date - timedelta(days=1)
-            
-            # Long Window: 14 days after
-            long_start = unlock_date + timedelta(days=14)
-            long_end = unlock_date + timedelta(days=20) 
-            
-            # SHORT SIGNALS
-            if ((results.index >= short_start) & (results.index <= short_end)).any():
-                mask = (results.index >= short_start) & (results.index <= short_end)
-                if use_trend_filter:
-                    # Filter out: bull trend, narrative momentum > 50%, ADX > 40 (Phase 2B.4)
-                    trend_mask = is_bull_trend.reindex(results.index).fillna(False)
-                    narr_mask = narrative_filter.reindex(results.index).fillna(False)
-                    final_mask = mask & (~trend_mask) & (~narr_mask)
-                    results.loc[final_mask, 'signal'] = -1
-                else:
-                    results.loc[mask, 'signal'] = -1
-            
-            # LONG SIGNALS (Relief Bounce)
-            # Re-enter long after unlock.
+        if unlock_dates is None:
+            unlock_dates = self.unlocks.loc[self.unlocks['symbol'] == token_symbol, 'unlock_date']
+        return self._apply_unlocks(results, unlock_dates, use_trend_filter,
+                                   is_bull_trend, narrative_filter)
+
+    def generate_signals_panel(self, price_panel, use_trend_filter=False):
+        """
+        generate_signals for several tokens at once: {symbol: price DataFrame} ->
+        {symbol: DataFrame['signal', 'size_multiplier']}. The unlock calendar is grouped by
+        symbol once instead of filtered per token.
+        """
+        by_symbol = {sym: events['unlock_date'] for sym, events in self.unlocks.groupby('symbol', sort=False)}
+        empty = pd.Series([], dtype='datetime64[ns]')
+        results = {}
+        for symbol, price_data in price_panel.items():
+            results[symbol] = self.generate_signals(price_data, symbol, use_trend_filter,
+                                                    unlock_dates=by_symbol.get(symbol, empty))
+        return results
+
+    @staticmethod
+    def _apply_unlocks(results, unlock_dates, use_trend_filter, is_bull_trend, narrative_filter):
+        """
+        Signals from every unlock's short window [-30d, -1d] and long window [+14d, +20d].
+        Where windows of different unlocks overlap, the later row of the unlock table wins (as
+        when each event's masks were written in turn), shorts only land on bars the trend
+        filter allows, and longs in a bull trend get 1.5x size.
+        Window edges are found with searchsorted, so this is O(events log events + bars).
+        """
+        index = results.index
+        n = len(index)
+        unlock_dates = pd.to_datetime(pd.Series(unlock_dates)).reset_index(drop=True)
+        order = np.flatnonzero(unlock_dates.notna().to_numpy())
+        if n == 0 or len(order) == 0:
+            return results
+        dates = pd.DatetimeIndex(unlock_dates.iloc[order])
+
+        last_short = _last_covering(index, dates - SHORT_WINDOW[0], dates - SHORT_WINDOW[1], order)
+        last_long = _last_covering(index, dates + LONG_WINDOW[0], dates + LONG_WINDOW[1], order)
+        if use_trend_filter:
+            # Filter out: bull trend, narrative momentum > 50%, ADX > 40 (Phase 2B.4)
+            blocked = is_bull_trend.to_numpy(dtype=bool) | narrative_filter.to_numpy(dtype=bool)
+            last_short[blocked] = -1
+
+        results['signal'] = np.where(last_long > last_short, 1, np.where(last_short >= 0, -1, 0))
+        if use_trend_filter:
             # Graduated Sizing: If Bull Trend, increase size by 50%
-            
-            long_mask = (results.index >= long_start) & (results.index <= long_end)
-            results.loc[long_mask, 'signal'] = 1
-            
-            # Apply Sizing Multiplier for Longs in Bull Trend
-            if use_trend_filter:
-                bull_rows = long_mask & is_bull_trend
-                results.loc[bull_rows, 'size_multiplier'] = 1.5
-            
+            in_long = _coverage(index, dates + LONG_WINDOW[0], dates + LONG_WINDOW[1]) > 0
+            results.loc[in_long & is_bull_trend.to_numpy(dtype=bool), 'size_multiplier'] = 1.5
         return results
 
     def run_backtest(self, price_df, token_symbol):
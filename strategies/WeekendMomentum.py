@@ -10,7 +10,6 @@ from freqtrade.strategy import (BooleanParameter, CategoricalParameter, DecimalP
                                 IStrategy, IntParameter)
 
 # --- Add your lib to import here ---
-import talib.abstract as ta
 import freqtrade.vendor.qtpylib.indicators as qtpylib
 from base_strategy import BaseStrategy
 
@@ -61,13 +60,15 @@ class WeekendMomentum(BaseStrategy):
         # 1. Base Strategy Indicators (Regime Detection)
         dataframe = super().populate_indicators(dataframe, metadata)
         
+        indicators = self.indicator_frame(dataframe, metadata)
+
         # Trend Indicators
-        dataframe['ema50'] = ta.EMA(dataframe, timeperiod=50)
-        dataframe['ema200'] = ta.EMA(dataframe, timeperiod=200)
+        dataframe['ema50'] = indicators.get('ema', timeperiod=50)
+        dataframe['ema200'] = indicators.get('ema', timeperiod=200)
         
         # Momentum & Volatility
-        dataframe['adx'] = ta.ADX(dataframe)
-        dataframe['atr'] = ta.ATR(dataframe, timeperiod=14)
+        dataframe['adx'] = indicators.get('adx', timeperiod=14)
+        dataframe['atr'] = indicators.get('atr', timeperiod=14)
         # Volatility gate: only trade when ATR is below 75th percentile (avoid high-vol weekends)
         dataframe['atr_p75'] = dataframe['atr'].rolling(200).quantile(0.75)
         
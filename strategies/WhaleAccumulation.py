@@ -1,7 +1,8 @@
 """
 Strategy 8: On-Chain Whale Accumulation Tracker
 Long when Smart Money net inflow > threshold. Regime filter: BULL/SIDEWAYS preferred.
-Uses Nansen API when available; falls back to synthetic momentum proxy in backtest.
+Uses universe-wide Nansen score snapshots when available (live lookups from memory, stored
+history in backtest); falls back to synthetic momentum proxy where no snapshot covers a candle.
 """
 from pandas import DataFrame
 import pandas as pd
@@ -20,8 +21,10 @@ logger = logging.getLogger(__name__)
 
 try:
     from utils.nansen_whale_tracker import NansenWhaleTracker, TOKEN_MAP, SYMBOL_TO_PAIR
+    from utils.whale_snapshot import WhaleScoreSnapshotter
 except ImportError:
     NansenWhaleTracker = None
+    WhaleScoreSnapshotter = None
     TOKEN_MAP = {}
     SYMBOL_TO_PAIR = {'BTC': 'BTC/USDT', 'ETH': 'ETH/USDT', 'SOL': 'SOL/USDT'}
 
@@ -54,26 +57,23 @@ class WhaleAccumulation(BaseStrategy):
     def __init__(self, config: dict) -> None:
         super().__init__(config)
         self._tracker = NansenWhaleTracker() if NansenWhaleTracker else None
-        self._cached_scores = {}
-        self._cache_time = None
         self._cache_ttl_sec = 3600  # Refresh hourly
+        # One snapshot for the whole TOKEN_MAP universe, shared by every pair
+        self._snapshots = WhaleScoreSnapshotter(
+            self._tracker if self._live else None,
+            interval_sec=self._cache_ttl_sec,
+            threshold=self.buy_params.get('accumulation_threshold', 0.5),
+        ) if self._tracker else None
+
+    @staticmethod
+    def _symbol(pair: str) -> str:
+        return pair.split('/')[0].split(':')[0] if pair else ''
 
     def _get_accumulation_score(self, pair: str) -> float:
-        """Get cached accumulation score for pair. Returns 0 if unavailable."""
-        if self._tracker and self._tracker.api_key:
-            import time
-            symbol = pair.replace('/USDT', '').replace('/BUSD', '') if pair else ''
-            now = time.time()
-            if self._cache_time and (now - self._cache_time) < self._cache_ttl_sec and symbol in self._cached_scores:
-                return self._cached_scores.get(symbol, 0)
-            scores = self._tracker.get_accumulation_scores(
-                symbols=[symbol] if symbol else list(SYMBOL_TO_PAIR.keys()),
-                threshold=self.buy_params.get('accumulation_threshold', 0.5),
-            )
-            self._cached_scores = {sym: s['score'] for sym, s in scores.items()}
-            self._cache_time = now
-            return self._cached_scores.get(symbol, 0)
-        return 0
+        """Latest snapshot score for pair (refreshed when the snapshot is due). NaN if unavailable."""
+        if self._snapshots is None or not self._tracker.api_key:
+            return float('nan')
+        return self._snapshots.score(self._symbol(pair))
 
     def populate_indicators(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         dataframe = super().populate_indicators(dataframe, metadata)
@@ -82,13 +82,17 @@ class WhaleAccumulation(BaseStrategy):
         if not pair:
             return dataframe
 
-        score = self._get_accumulation_score(pair)
-        if score > 0:
-            dataframe['accumulation_score'] = score
+        lookback = self.buy_params.get('lookback', 7)
+        synthetic = compute_synthetic_signal(dataframe, lookback=lookback).astype(float)
+        if self._snapshots is not None:
+            # Score in effect at each candle close from the stored snapshots; the latest candle
+            # takes the in-memory score live when it is > 0. Synthetic wherever Nansen has no score.
+            close_times = dataframe['date'] + pd.to_timedelta(self.timeframe)
+            live_score = self._get_accumulation_score(pair) if self._live and self._tracker.api_key else None
+            dataframe['accumulation_score'] = self._snapshots.accumulation_scores(
+                self._symbol(pair), close_times, synthetic, live_score=live_score)
         else:
-            lookback = self.buy_params.get('lookback', 7)
-            signal = compute_synthetic_signal(dataframe, lookback=lookback)
-            dataframe['accumulation_score'] = signal.astype(float)
+            dataframe['accumulation_score'] = synthetic
 
         threshold = self.buy_params.get('accumulation_threshold', 0.5)
         dataframe['accumulation_signal'] = (dataframe['accumulation_score'] >= threshold).astype(int)
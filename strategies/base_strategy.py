@@ -1,8 +1,13 @@
 from freqtrade.strategy import IStrategy
+from freqtrade.enums import RunMode
+from freqtrade.persistence import Trade
+from freqtrade.exchange import timeframe_to_seconds
 from pandas import DataFrame
+import pandas as pd
 import logging
 import sys
 import os
+from datetime import timedelta
 
 # Add possible paths for utils module (container: /freqtrade, local: project root)
 for p in ['/freqtrade', os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))]:
@@ -10,7 +15,12 @@ for p in ['/freqtrade', os.path.abspath(os.path.join(os.path.dirname(__file__),
         sys.path.insert(0, p)
 
 from utils.risk_manager import RiskManager
+from utils.ewm_covariance import ReturnReplay
 from utils.regime_detector import CryptoRegimeDetector
+from utils.regime_cache import RegimeColumnCache
+from utils.indicator_engine import shared_engine
+from utils.regime_refit import RegimeRefitScheduler, DEFAULT_REFIT_INTERVAL_SEC
+from utils.regime_service import RegimeClient
 
 logger = logging.getLogger(__name__)
 
@@ -34,9 +44,39 @@ class BaseStrategy(IStrategy):
     
     def __init__(self, config: dict) -> None:
         super().__init__(config)
-        self.risk_manager = RiskManager(self.risk_config)
+        live = config.get('runmode') in (RunMode.LIVE, RunMode.DRY_RUN)
+
+        # Shared portfolio risk state: every strategy container pointing at the same
+        # RISK_STATE_DB enforces one daily-loss / drawdown limit (survives restarts)
+        risk_state_db = os.environ.get('RISK_STATE_DB')
+        risk_config = dict(self.risk_config, state_path=risk_state_db) if risk_state_db and live else dict(self.risk_config)
+        # Optional correlation-aware exposure cap across this bot's pairs
+        if config.get('max_correlated_exposure'):
+            risk_config['max_correlated_exposure'] = config['max_correlated_exposure']
+            risk_config['correlation_halflife'] = config.get('correlation_halflife')
+        # Optional regime gating table (dict or JSON path), see utils/regime_gating.py
+        if config.get('regime_gating'):
+            risk_config['regime_gating'] = config['regime_gating']
+        self.risk_manager = RiskManager(risk_config)
+        self._live = live
+        # Backtests: candle returns are replayed into the correlation tracker as time advances
+        self._return_replay = ReturnReplay() if not live and self.risk_manager.covariance is not None else None
         self.regime_detector = CryptoRegimeDetector()
         self.is_regime_model_fitted = False
+
+        # Regime refits run in the background live; backtest/hyperopt fit inline (deterministic)
+        refit_hours = config.get('regime_refit_interval_hours')
+        self.regime_refit = RegimeRefitScheduler(
+            refit_interval_sec=refit_hours * 3600 if refit_hours else DEFAULT_REFIT_INTERVAL_SEC,
+            blocking=not live,
+        )
+        # Shared regime service (deploy: STRATEGY=RegimeService); local fitting is the fallback
+        regime_db = os.environ.get('REGIME_DB_PATH')
+        self.regime_client = RegimeClient(regime_db) if regime_db and live else None
+        self._regime_caches = {}
+        self._pair_regimes = {}   # pair -> regime at its last candle (gating and sizing per pair)
+        # Indicator columns shared with every strategy in this process, computed once per candle
+        self.indicators = shared_engine()
         
         logger.info(f"BaseStrategy Initialized. Risk Config: {self.risk_config}")
 
@@ -46,6 +86,10 @@ class BaseStrategy(IStrategy):
         """
         pass
 
+    def bot_cleanup(self) -> None:
+        """Stop the background regime refit worker."""
+        self.regime_refit.shutdown()
+
     def confirm_trade_entry(self, pair: str, order_type: str, amount: float, rate: float,
                             time_in_force: str, current_time: str, entry_tag: str,
                             side: str, **kwargs) -> bool:
@@ -58,13 +102,65 @@ class BaseStrategy(IStrategy):
             logger.warning(f"Trade blocked by Risk Manager: {pair}")
             return False
         
-        # 2. Regime Master Switch (Phase 2B.1): strategy/side gating by regime
-        if not self.risk_manager.is_strategy_allowed(self.__class__.__name__, side):
-            logger.warning(f"Trade blocked by Regime Master Switch: {self.__class__.__name__} {side} not allowed in {self.risk_manager.current_regime}")
+        # 2. Regime Master Switch (Phase 2B.1): strategy/side gating by this pair's regime
+        regime = self.pair_regime(pair)
+        if not self.risk_manager.is_strategy_allowed(self.__class__.__name__, side, regime=regime):
+            logger.warning(f"Trade blocked by Regime Master Switch: {self.__class__.__name__} {side} not allowed in {regime}")
             return False
         
+        # 3. Shared risk state: atomically reserve this trade's risk against the portfolio budget
+        if self.risk_manager.state is not None:
+            risk_amount = amount * rate * abs(self.stoploss)
+            if not self.risk_manager.reserve_risk(pair, self.__class__.__name__, risk_amount):
+                logger.warning(f"Trade blocked by shared risk budget: {pair}")
+                return False
         return True
 
+    def bot_loop_start(self, current_time, **kwargs) -> None:
+        """
+        Reconcile risk state with this bot's open trades: with the correlated exposure cap on,
+        open exposure is rebuilt from filled positions, and shared reservations whose trade no
+        longer exists (entry cancelled or timed out, closed while the bot was down) are released.
+        In backtests, returns of candles closed by current_time are fed to the correlation tracker.
+        """
+        if self._return_replay is not None:
+            closed_by = current_time - timedelta(seconds=timeframe_to_seconds(self.timeframe))
+            self._return_replay.feed(self.risk_manager.covariance, closed_by)
+        if self.risk_manager.covariance is None and self.risk_manager.state is None:
+            return
+        open_trades = Trade.get_trades_proxy(is_open=True)
+        if self.risk_manager.covariance is not None:
+            self.risk_manager.open_exposure = {}
+            for trade in open_trades:
+                self.risk_manager.set_open_exposure(trade.pair, self._filled_notional(trade))
+        if self.risk_manager.state is None:
+            return
+        open_pairs = {trade.pair for trade in open_trades}
+        for pair in self.risk_manager.release_stale_reservations(self.__class__.__name__, open_pairs):
+            logger.info(f"Released risk reservation of {pair}: no open trade")
+
+    def order_filled(self, pair: str, trade, order, current_time, **kwargs) -> None:
+        """
+        Freqtrade callback after every fill (entry, exit, stoploss on exchange, adjustment).
+        With the correlated exposure cap on, open exposure follows the filled position. With shared
+        risk state, exit-side fills record the trade's realized PnL (once per trade id) and the
+        closing fill releases its reservation.
+        """
+        if self.risk_manager.covariance is not None:
+            self.risk_manager.set_open_exposure(pair, self._filled_notional(trade))
+        if self.risk_manager.state is None or order.ft_order_side == trade.entry_side:
+            return
+        realized = trade.realized_profit if trade.is_open else trade.close_profit_abs
+        self.risk_manager.record_exit_fill(trade.id, pair, self.__class__.__name__, realized, trade.is_open)
+
+    @staticmethod
+    def _filled_notional(trade) -> float:
+        """Signed notional of the trade's filled position (0 before the first entry fill or once closed)."""
+        if not trade.is_open or not trade.nr_of_successful_entries:
+            return 0.0
+        notional = trade.amount * trade.open_rate
+        return -notional if trade.is_short else notional
+
     def custom_stake_amount(self, pair: str, current_time: str, current_rate: float,
                             proposed_stake: float, min_stake: float, max_stake: float,
                             leverage: float, entry_tag: str, side: str,
@@ -85,7 +181,7 @@ class BaseStrategy(IStrategy):
         # Risk Manager Sizing
         safe_amount = self.risk_manager.calculate_position_size(
             current_rate, stop_price, risk_per_trade=strategy_risk,
-            strategy_id=self.__class__.__name__
+            strategy_id=self.__class__.__name__, symbol=pair, side=side, regime=self.pair_regime(pair)
         )
         
         # Convert to stake currency (e.g. USDT)
@@ -99,31 +195,79 @@ class BaseStrategy(IStrategy):
         Common indicators (Regime Detection).
         Subclasses MUST call super().populate_indicators() or handle this logic.
         """
+        # Candle returns per pair feed the correlated exposure cap: live the latest candle, in
+        # backtests (one call over the whole history) the series replayed by bot_loop_start
+        if self.risk_manager.covariance is not None and len(dataframe) > 1:
+            close = dataframe['close']
+            if self._return_replay is not None:
+                self._return_replay.add(metadata.get('pair'),
+                                        pd.Series(close.pct_change().to_numpy(), index=dataframe['date']))
+            else:
+                self.risk_manager.observe_return(metadata.get('pair'), dataframe['date'].iloc[-1],
+                                                 close.iloc[-1] / close.iloc[-2] - 1.0)
+
+        # Published regime series from the regime service, when configured and fresh
+        if self.regime_client is not None and len(dataframe) > 0:
+            try:
+                published = self.regime_client.regime_for(metadata.get('pair'), self.timeframe, dataframe['date'])
+            except Exception as e:
+                logger.warning(f"Regime service unavailable ({e}); fitting locally")
+                published = None
+            if published is not None:
+                dataframe['regime'] = published['regime'].to_numpy()
+                self._set_pair_regime(metadata.get('pair'), published['filtered_regime'].iloc[-1])
+                return dataframe
+
         # Train/Predict Regime
-        # In a real live run, we'd need to persist the model or retrain periodically.
-        # For simplicity here, we check if fitted.
-        
-        if not self.is_regime_model_fitted:
-            # We need valid data to fit. 
-            # Freqtrade often passes startup candles. 
-            # We assume dataframe is large enough.
-            if len(dataframe) > 200:
-                self.regime_detector.fit(dataframe)
-                self.is_regime_model_fitted = True
-                logger.info("Regime Model Fitted")
+        # Fits run on the refit scheduler (cadence: regime_refit_interval_hours); the model
+        # is swapped in once ready, so candles before the first fit are UNKNOWN.
+        if len(dataframe) > 200:
+            self.regime_refit.maybe_refit(dataframe, symbol=metadata.get('pair'), timeframe=self.timeframe)
+        if self.regime_refit.detector is not None and self.regime_refit.detector is not self.regime_detector:
+            self.regime_detector = self.regime_refit.detector
+            self.is_regime_model_fitted = True
+            logger.info(f"Regime Model v{self.regime_refit.version} active")
         
         if self.is_regime_model_fitted:
-             df_regime = self.regime_detector.predict(dataframe)
-             dataframe['regime'] = df_regime['regime_label']
+             # Only candles newer than the pair's cached column are decoded
+             dataframe['regime'] = self._regime_cache(metadata.get('pair')).column(
+                 dataframe, indicators=self.indicator_frame(dataframe, metadata))
         else:
              dataframe['regime'] = 'UNKNOWN'
         
-        # Regime Master Switch: sync latest regime to risk manager for gating
-        self._last_regime = dataframe['regime'].iloc[-1] if len(dataframe) > 0 else 'UNKNOWN'
-        self.risk_manager.set_regime(self._last_regime)
+        # Regime Master Switch: sync latest regime to risk manager for gating.
+        # Live gating uses the forward-filtered state (causal, O(1) per new candle).
+        if self.is_regime_model_fitted and len(dataframe) > 0:
+            regime = self._filtered_regime(dataframe, metadata.get('pair'))
+        else:
+            regime = dataframe['regime'].iloc[-1] if len(dataframe) > 0 else 'UNKNOWN'
+        self._set_pair_regime(metadata.get('pair'), regime)
              
         return dataframe
 
+    def _set_pair_regime(self, pair, regime) -> None:
+        self._pair_regimes[pair] = str(regime).upper() if regime else 'UNKNOWN'
+
+    def pair_regime(self, pair) -> str:
+        """Regime of pair at its last candle ('UNKNOWN' before its first populate_indicators)."""
+        return self._pair_regimes.get(pair, 'UNKNOWN')
+
+    def indicator_frame(self, dataframe: DataFrame, metadata: dict):
+        """Shared indicator columns for this pair's dataframe: frame.get('adx', timeperiod=14)."""
+        return self.indicators.frame(metadata.get('pair'), self.timeframe, dataframe)
+
+    def _regime_cache(self, pair) -> RegimeColumnCache:
+        """The pair's regime column cache, rebuilt when the active model changes."""
+        cache = self._regime_caches.get(pair)
+        if cache is None or cache.model is not self.regime_detector.model:
+            cache = RegimeColumnCache(self.regime_detector)
+            self._regime_caches[pair] = cache
+        return cache
+
+    def _filtered_regime(self, dataframe: DataFrame, pair) -> str:
+        """Online (forward-filtered) regime label at the last candle; the column cache keeps it in step."""
+        return self._regime_cache(pair).filtered_regime()
+
     def populate_entry_trend(self, dataframe: DataFrame, metadata: dict) -> DataFrame:
         return dataframe
 
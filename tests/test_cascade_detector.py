@@ -6,7 +6,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 import pytest
 import pandas as pd
 import numpy as np
-from utils.cascade_detector import detect_cascade, cascade_fires_now
+from utils.cascade_detector import (detect_cascade, cascade_fires_now, CascadeDetector, detect_cascade_panel,
+                                    CascadePanelCache, cascade_panel_cached)
 
 
 @pytest.fixture
@@ -47,3 +48,108 @@ def test_detect_cascade_with_oversold(sample_ohlcv):
     sample_ohlcv.loc[sample_ohlcv.index[-1], 'volume'] = 5000  # Spike
     result = detect_cascade(sample_ohlcv)
     assert isinstance(result, pd.Series)
+
+
+@pytest.fixture
+def crash_ohlcv():
+    """Random walk with a sharp sell-off on heavy volume and a funding flip inside it."""
+    rng = np.random.default_rng(1)
+    n = 600
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    close[400:410] *= np.linspace(1, 0.8, 10)
+    volume = rng.random(n) * 1000 + 100
+    volume[405:410] = 8000
+    idx = pd.date_range('2024-01-01', periods=n, freq='1h')
+    funding = np.full(n, 1e-4)
+    funding[407:] = -1e-4
+    df = pd.DataFrame({'close': close, 'volume': volume, 'high': close, 'low': close,
+                       'funding_rate': funding}, index=idx)
+    return df
+
+
+def test_streaming_detector_matches_batch(crash_ohlcv):
+    expected = detect_cascade(crash_ohlcv).to_numpy()
+    detector = CascadeDetector()
+    streamed = [detector.update('BTC', c, v) for c, v in zip(crash_ohlcv['close'], crash_ohlcv['volume'])]
+    assert expected.any()
+    assert (np.array(streamed) == expected).all()
+
+    funding_df = crash_ohlcv[['funding_rate']].rename(columns={'funding_rate': 'fundingRate'})
+    expected = detect_cascade(crash_ohlcv, funding_df).to_numpy()
+    detector = CascadeDetector()
+    streamed = [detector.update('BTC', c, v, f) for c, v, f in
+                zip(crash_ohlcv['close'], crash_ohlcv['volume'], crash_ohlcv['funding_rate'])]
+    assert expected.sum() == 1
+    assert (np.array(streamed) == expected).all()
+
+
+def test_streaming_rsi_matches_talib(crash_ohlcv):
+    talib = pytest.importorskip('talib')
+    detector = CascadeDetector()
+    rsi = []
+    for c, v in zip(crash_ohlcv['close'], crash_ohlcv['volume']):
+        detector.update('BTC', c, v)
+        rsi.append(detector.rsi('BTC'))
+    np.testing.assert_allclose(rsi, talib.RSI(crash_ohlcv['close'].to_numpy(), 14), atol=1e-9)
+
+
+def test_sync_feeds_only_new_candles_per_pair(crash_ohlcv):
+    frame = crash_ohlcv.reset_index().rename(columns={'index': 'date'})
+    expected = detect_cascade(crash_ohlcv).to_numpy()
+    detector = CascadeDetector()
+    for end in (300, 406, 407, 420):
+        window = frame.iloc[max(0, end - 300):end]   # rolling Freqtrade-style window
+        assert detector.sync('BTC', window) == (bool(expected[end - 1]) if end > 50 else False)
+    assert detector._pairs['BTC'].n == 420
+    assert detector.fires_now('ETH') is False
+
+    # A frame that does not continue the stream rebuilds from scratch
+    assert detector.sync('BTC', frame.iloc[:100]) is False
+    assert detector._pairs['BTC'].n == 100
+
+
+@pytest.fixture
+def universe(crash_ohlcv):
+    """Three symbols; SOL lists 150 bars late."""
+    rng = np.random.default_rng(7)
+    close = pd.DataFrame({'BTC': crash_ohlcv['close']})
+    volume = pd.DataFrame({'BTC': crash_ohlcv['volume']})
+    funding = pd.DataFrame({'BTC': crash_ohlcv['funding_rate']})
+    for sym in ('ETH', 'SOL'):
+        close[sym] = crash_ohlcv['close'].to_numpy() * np.exp(rng.normal(0, 0.003, len(crash_ohlcv)))
+        volume[sym] = crash_ohlcv['volume'].to_numpy() * rng.uniform(0.8, 1.2, len(crash_ohlcv))
+        funding[sym] = crash_ohlcv['funding_rate'].to_numpy()
+    close.iloc[:150, 2] = np.nan
+    volume.iloc[:150, 2] = np.nan
+    return close, volume, funding
+
+
+def test_panel_matches_per_symbol_detect(universe):
+    close, volume, funding = universe
+    panel = detect_cascade_panel(close, volume)
+    with_funding = detect_cascade_panel(close, volume, funding)
+    assert panel.shape == close.shape
+    assert panel.to_numpy().dtype == bool
+    for sym in close.columns:
+        rows = close[sym].dropna().index
+        ohlcv = pd.DataFrame({'close': close[sym], 'volume': volume[sym]}).loc[rows]
+        assert (panel.loc[rows, sym] == detect_cascade(ohlcv)).all()
+        funding_df = funding[[sym]].rename(columns={sym: 'fundingRate'}).loc[rows]
+        assert (with_funding.loc[rows, sym] == detect_cascade(ohlcv, funding_df)).all()
+        assert not panel[sym].drop(rows).any()
+    assert panel.to_numpy().any()
+
+
+def test_panel_cache_per_parameter_set(universe, tmp_path, monkeypatch):
+    close, volume, _ = universe
+    cache = CascadePanelCache(str(tmp_path))
+    first = cascade_panel_cached(close, volume, cache=cache)
+    assert len(list(tmp_path.iterdir())) == 1
+
+    import utils.cascade_detector as cd
+    monkeypatch.setattr(cd, 'detect_cascade_panel', lambda *a, **k: pytest.fail("cache miss"))
+    pd.testing.assert_frame_equal(cascade_panel_cached(close, volume, cache=cache), first)
+
+    monkeypatch.undo()
+    cascade_panel_cached(close, volume, cache=cache, vol_spike_mult=2.0)
+    assert len(list(tmp_path.iterdir())) == 2
@@ -0,0 +1,138 @@
+"""Unit tests for utils/dns_patch.py (resolver cache; no network)"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import socket
+import threading
+
+from utils import dns_patch
+from utils.dns_patch import DNSCache
+
+
+class FakeResolver:
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = 0
+        self.gate = None
+
+    def __call__(self, host):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(2)
+        answer = self.answers.pop(0) if len(self.answers) > 1 else self.answers[0]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+class Clock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_ttl_hit_miss_and_round_robin():
+    resolver, clock = FakeResolver([(['10.0.0.1', '10.0.0.2'], 60)]), Clock()
+    cache = DNSCache(resolve=resolver, min_ttl=30, refresh_ahead=1.0, clock=clock)
+    assert cache.addresses('api.binance.com') == ['10.0.0.1', '10.0.0.2']
+    assert cache.addresses('api.binance.com') == ['10.0.0.2', '10.0.0.1']
+    clock.t += 61
+    cache.addresses('api.binance.com')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['lookups'], resolver.calls) == (1, 2, 2, 2)
+    assert stats['entries']['api.binance.com']['ttl'] == 60
+
+
+def test_ttl_is_clamped():
+    cache = DNSCache(resolve=FakeResolver([(['10.0.0.1'], 1)]), min_ttl=30, max_ttl=100)
+    cache.addresses('h')
+    assert cache.stats()['entries']['h']['ttl'] == 30
+
+
+def test_failed_ip_goes_last_until_republished_without_it():
+    resolver, clock = FakeResolver([(['10.0.0.1', '10.0.0.2', '10.0.0.3'], 60), (['10.0.0.2', '10.0.0.3'], 60)]), Clock()
+    cache = DNSCache(resolve=resolver, refresh_ahead=1.0, clock=clock)
+    cache.addresses('h')
+    cache.report_failure('h', '10.0.0.1')
+    for _ in range(3):
+        assert cache.addresses('h')[-1] == '10.0.0.1'
+    clock.t += 61
+    assert sorted(cache.addresses('h')) == ['10.0.0.2', '10.0.0.3']
+
+
+def test_refresh_ahead_in_background_keeps_serving():
+    resolver, clock = FakeResolver([(['10.0.0.1'], 100), (['10.0.0.9'], 100)]), Clock()
+    cache = DNSCache(resolve=resolver, refresh_ahead=0.8, clock=clock)
+    cache.addresses('h')
+    resolver.gate = threading.Event()
+    clock.t += 85
+    assert cache.addresses('h') == ['10.0.0.1']     # served from cache while refreshing
+    assert cache.addresses('h') == ['10.0.0.1']
+    resolver.gate.set()
+    for _ in range(200):
+        if cache.stats()['lookups'] == 2:
+            break
+        threading.Event().wait(0.01)
+    assert cache.addresses('h') == ['10.0.0.9']
+    assert cache.stats()['refreshes'] == 1
+
+
+def test_stale_then_system_fallback_when_resolver_fails():
+    resolver, clock = FakeResolver([(['10.0.0.1'], 60), OSError('timeout')]), Clock()
+    cache = DNSCache(resolve=resolver, refresh_ahead=1.0, stale_ttl=120, clock=clock)
+    cache.addresses('h')
+    clock.t += 100
+    assert cache.addresses('h') == ['10.0.0.1']
+    clock.t += 100
+    assert cache.addresses('h') is None
+    stats = cache.stats()
+    assert (stats['stale'], stats['fallbacks'], stats['errors']) == (1, 1, 2)
+
+
+def test_getaddrinfo_returns_every_cached_ip(monkeypatch):
+    cache = DNSCache(resolve=FakeResolver([(['127.0.0.2', '127.0.0.3'], 60)]))
+    monkeypatch.setattr(dns_patch, '_dns_cache', cache)
+    infos = dns_patch.secure_getaddrinfo('api.binance.com', 443, socket.AF_INET, socket.SOCK_STREAM)
+    assert [i[4][0] for i in infos] == ['127.0.0.2', '127.0.0.3']
+    infos = dns_patch.secure_getaddrinfo('api.binance.com', 443, socket.AF_INET, socket.SOCK_STREAM)
+    assert infos[0][4][0] == '127.0.0.3'
+    assert dns_patch.secure_getaddrinfo('127.0.0.1', 80)[0][4][0] == '127.0.0.1'   # untouched host
+
+
+def test_one_thread_re_resolves_expired_entry():
+    resolver, clock = FakeResolver([(['10.0.0.1'], 60), (['10.0.0.9'], 60)]), Clock()
+    cache = DNSCache(resolve=resolver, refresh_ahead=1.0, clock=clock)
+    cache.addresses('h')
+    resolver.gate = threading.Event()
+    clock.t += 61
+    leader = threading.Thread(target=cache.addresses, args=('h',))
+    leader.start()
+    for _ in range(200):
+        if resolver.calls == 2:
+            break
+        threading.Event().wait(0.01)
+    assert cache.addresses('h') == ['10.0.0.1']     # served stale, no second lookup
+    assert resolver.calls == 2
+    resolver.gate.set()
+    leader.join(2)
+    assert cache.addresses('h') == ['10.0.0.9']
+    assert cache.stats()['stale'] == 1
+
+
+def test_create_connection_fails_over_and_reports(monkeypatch):
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    port = server.getsockname()[1]
+    cache = DNSCache(resolve=FakeResolver([(['127.0.0.2', '127.0.0.1'], 60)]))
+    monkeypatch.setattr(dns_patch, '_dns_cache', cache)
+    try:
+        with dns_patch.secure_create_connection(('api.binance.com', port), timeout=2) as sock:
+            assert sock.getpeername() == ('127.0.0.1', port)
+        assert cache.stats()['entries']['api.binance.com']['failures'] == {'127.0.0.2': 1}
+        assert cache.addresses('api.binance.com') == ['127.0.0.1', '127.0.0.2']   # dead IP last
+    finally:
+        server.close()
@@ -0,0 +1,98 @@
+"""Unit tests for utils/ewm_covariance.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.ewm_covariance import EWMCovariance, ReturnReplay, ewm_covariance, ewm_correlation
+from utils.risk_manager import RiskManager
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(0)
+    common = rng.normal(0, 0.01, 600)
+    return pd.DataFrame({
+        'BTC': common + rng.normal(0, 0.002, 600),
+        'ETH': common + rng.normal(0, 0.004, 600),
+        'XAU': rng.normal(0, 0.005, 600),
+    })
+
+
+def test_online_matches_pandas_and_batch(returns):
+    tracker = EWMCovariance(list(returns.columns), halflife=48)
+    for row in returns.to_numpy():
+        tracker.update(row)
+    alpha = 1 - np.exp(-np.log(2) / 48)
+    expected = returns.ewm(alpha=alpha, adjust=False).cov(bias=True).loc[len(returns) - 1]
+    np.testing.assert_allclose(tracker.cov, expected.to_numpy(), atol=1e-15)
+
+    batch = ewm_covariance(returns, halflife=48)
+    assert batch.shape == (600, 3, 3)
+    np.testing.assert_allclose(batch[-1], tracker.cov, atol=1e-15)
+    np.testing.assert_allclose(ewm_correlation(returns, halflife=48)[-1], tracker.correlation().to_numpy(), atol=1e-12)
+
+
+def test_observe_commits_cross_section_on_new_candle(returns):
+    tracker = EWMCovariance(halflife=48)
+    direct = EWMCovariance(list(returns.columns), halflife=48)
+    for t, row in returns.iterrows():
+        for asset, ret in row.items():
+            tracker.observe(asset, t, ret)
+        direct.update(row.to_numpy())
+    tracker.observe('BTC', len(returns), 0.0)   # next candle flushes the last one
+    np.testing.assert_allclose(tracker.cov, direct.cov)
+
+
+def test_headroom_shrinks_with_correlation(returns):
+    tracker = EWMCovariance(list(returns.columns), halflife=48)
+    for row in returns.to_numpy():
+        tracker.update(row)
+    corr = tracker.correlation()
+    assert corr.loc['BTC', 'ETH'] > 0.8
+    assert abs(corr.loc['BTC', 'XAU']) < 0.3
+
+    open_btc = {'BTC': 2000.0}
+    correlated = tracker.headroom(open_btc, 'ETH', 1, 3000.0)
+    diversifier = tracker.headroom(open_btc, 'XAU', 1, 3000.0)
+    hedge = tracker.headroom(open_btc, 'ETH', -1, 3000.0)
+    assert correlated < diversifier < hedge
+    assert tracker.correlated_exposure({'BTC': 2000.0, 'ETH': correlated}) == pytest.approx(3000.0)
+
+
+def test_unwarmed_assets_count_as_fully_correlated():
+    tracker = EWMCovariance(['BTC', 'ETH'], min_periods=20)
+    assert tracker.correlated_exposure({'BTC': 100.0, 'ETH': 100.0}) == pytest.approx(200.0)
+
+
+def test_risk_manager_caps_correlated_exposure(returns):
+    rm = RiskManager({'max_risk_per_trade': 0.05, 'initial_capital': 10000.0, 'max_correlated_exposure': 0.30,
+                      'correlation_halflife': 48})
+    for t, row in returns.iterrows():
+        for asset, ret in row.items():
+            rm.observe_return(asset, t, ret)
+    rm.set_open_exposure('BTC', 2000.0)
+    eth_qty = rm.calculate_position_size(100.0, 95.0, symbol='ETH', side='long')
+    xau_qty = rm.calculate_position_size(100.0, 95.0, symbol='XAU', side='long')
+    assert eth_qty * 100.0 < 1100.0            # correlated with the open BTC long
+    assert xau_qty * 100.0 == pytest.approx(2000.0)   # only the 20% single-position cap binds
+    assert rm.calculate_position_size(100.0, 95.0) * 100.0 == pytest.approx(2000.0)   # no symbol: unchanged
+
+
+def test_replay_feeds_tracker_causally(returns):
+    dates = pd.date_range('2024-01-01', periods=len(returns), freq='1h', tz='UTC')
+    replay = ReturnReplay()
+    for asset in returns.columns:
+        replay.add(asset, pd.Series(returns[asset].to_numpy(), index=dates))
+    replayed = EWMCovariance(halflife=48)
+    direct = EWMCovariance(list(returns.columns), halflife=48)
+    assert replay.feed(replayed, dates[9]) == 30          # nothing after the cutoff is seen
+    for t in range(10, len(returns)):
+        assert replay.feed(replayed, dates[t]) == 3
+    for row in returns.to_numpy()[:-1]:
+        direct.update(row)
+    np.testing.assert_allclose(replayed.cov, direct.cov)   # last candle pending, as live
+    assert (replayed.count >= replayed.min_periods).all()
+    assert replayed.correlation().loc['BTC', 'XAU'] < 0.5  # warmed: no longer treated as 1.0
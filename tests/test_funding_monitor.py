@@ -0,0 +1,76 @@
+"""Unit tests for utils/funding_monitor.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+
+from utils.funding_monitor import FundingMonitor, AlertBatcher, parse_funding_update, format_batch
+
+BTC, ETH = 'BTC/USDT:USDT', 'ETH/USDT:USDT'
+
+
+def _tick(monitor, now, **rates):
+    sym = {'btc': BTC, 'eth': ETH}
+    return monitor.on_tick({sym[k]: {'rate': v, 'next_funding_time': None} for k, v in rates.items()}, now=now)
+
+
+def test_alert_once_then_rearm_with_hysteresis_and_cooldown():
+    monitor = FundingMonitor({BTC: 0.0002}, cooldown_sec=600)
+    assert [a['side'] for a in _tick(monitor, 0, btc=0.0003)] == [1]
+    assert _tick(monitor, 60, btc=0.00035) == []          # still active: no repeat
+    assert _tick(monitor, 120, btc=0.00018) == []         # inside 0.8x band: stays active
+    assert _tick(monitor, 180, btc=0.0001) == []          # re-armed
+    assert _tick(monitor, 240, btc=0.0003) == []          # within cooldown
+    assert _tick(monitor, 240, btc=0.0001) == []
+    assert len(_tick(monitor, 700, btc=0.0003)) == 1
+
+
+def test_side_flip_alerts_immediately():
+    monitor = FundingMonitor({BTC: 0.0002})
+    _tick(monitor, 0, btc=0.0003)
+    alerts = _tick(monitor, 10, btc=-0.0003)
+    assert len(alerts) == 1 and alerts[0]['flipped'] and alerts[0]['side'] == -1
+
+
+def test_zscore_from_settled_history_and_universe_only_symbols():
+    monitor = FundingMonitor({BTC: 0.01}, universe=[ETH], min_history=5)
+    monitor.seed_history(ETH, [0.0001, 0.0002, 0.0001, 0.0002])
+    assert _tick(monitor, 0, eth=0.001) == []             # not enough history yet
+    # Funding settles: the last rate of the period joins the history
+    monitor.on_tick({ETH: {'rate': 0.00015, 'next_funding_time': 1}}, now=1)
+    monitor.on_tick({ETH: {'rate': 0.00015, 'next_funding_time': 2}}, now=2)
+    assert len(monitor.states[ETH].history) == 5
+    alerts = _tick(monitor, 3, eth=0.001)
+    assert alerts[0]['symbol'] == ETH and alerts[0]['zscore'] > 2
+    assert _tick(monitor, 4, btc=0.0005) == []            # BTC below its fixed threshold
+    assert 'DOGE/USDT:USDT' not in monitor.states
+
+
+def test_parse_stream_ticker_and_rest_funding():
+    ticker = {'symbol': BTC, 'markPrice': 65000.0, 'info': {'e': 'markPriceUpdate', 'r': '0.00010000', 'T': 1700000000000, 'p': '65000.1'}}
+    assert parse_funding_update(ticker) == {'rate': 0.0001, 'next_funding_time': 1700000000000, 'mark_price': 65000.0}
+    rest = {'symbol': ETH, 'fundingRate': -0.0002, 'fundingTimestamp': 1700000000000, 'markPrice': None, 'info': {'markPrice': '3000'}}
+    assert parse_funding_update(rest)['rate'] == -0.0002
+    assert parse_funding_update({'info': {}}) is None
+
+
+def test_batcher_sends_one_message_per_window():
+    sent = []
+
+    async def send(text):
+        sent.append(text)
+
+    async def scenario():
+        batcher = AlertBatcher(send, batch_window=0.05)
+        task = asyncio.create_task(batcher.run())
+        monitor = FundingMonitor({BTC: 0.0002, ETH: 0.0002})
+        batcher.put(_tick(monitor, 0, btc=0.0003))
+        batcher.put(_tick(monitor, 1, eth=-0.0004))
+        await asyncio.sleep(0.15)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert len(sent) == 1
+    assert 'BTC/USDT:USDT' in sent[0] and 'ETH/USDT:USDT' in sent[0]
+    assert format_batch([]) == ''
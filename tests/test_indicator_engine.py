@@ -0,0 +1,99 @@
+"""Unit tests for utils/indicator_engine.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+import talib
+from utils.indicator_engine import IndicatorEngine, cached_indicator
+from utils.regime_features import compute_regime_features, FEATURE_COLUMNS
+
+TALIB = {
+    ('adx', 14): lambda d: talib.ADX(d['high'], d['low'], d['close'], timeperiod=14),
+    ('atr', 14): lambda d: talib.ATR(d['high'], d['low'], d['close'], timeperiod=14),
+    ('rsi', 14): lambda d: talib.RSI(d['close'], timeperiod=14),
+    ('ema', 200): lambda d: talib.EMA(d['close'], timeperiod=200),
+    ('sma', 200): lambda d: talib.SMA(d['close'], timeperiod=200),
+}
+
+
+@pytest.fixture
+def ohlcv_df():
+    rng = np.random.default_rng(11)
+    n = 700
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n, freq='1h', tz='UTC'),
+        'open': close,
+        'high': close * (1 + np.abs(rng.normal(0, 0.01, n))),
+        'low': close * (1 - np.abs(rng.normal(0, 0.01, n))),
+        'close': close,
+        'volume': rng.integers(1000, 10000, n).astype(float),
+    })
+
+
+@pytest.mark.parametrize('name,period', list(TALIB))
+@pytest.mark.parametrize('start', [5, 450])
+def test_appending_candles_matches_talib(ohlcv_df, name, period, start):
+    engine = IndicatorEngine(rolling=False)
+    engine.get('BTC/USDT', '1h', name, ohlcv_df.iloc[:start], timeperiod=period)
+    for end in range(start + 1, len(ohlcv_df) + 1, 23):
+        engine.get('BTC/USDT', '1h', name, ohlcv_df.iloc[:end], timeperiod=period)
+    values = engine.get('BTC/USDT', '1h', name, ohlcv_df, timeperiod=period)
+    np.testing.assert_allclose(values, TALIB[(name, period)](ohlcv_df), rtol=1e-9)
+    assert engine.stats()['computed'] == 1
+
+
+def test_same_candle_is_computed_once_across_callers(ohlcv_df):
+    engine = IndicatorEngine()
+    frame = engine.frame('BTC/USDT', '1h', ohlcv_df)
+    adx = frame.get('adx', timeperiod=14)
+    features = compute_regime_features(ohlcv_df, indicators=frame)
+    assert engine.stats() == {'hits': 1, 'computed': 2, 'appended': 0, 'entries': 2}   # adx hit, sma200 computed
+    np.testing.assert_array_equal(features['adx'].to_numpy(), adx)
+    np.testing.assert_allclose(features[FEATURE_COLUMNS].to_numpy(),
+                               compute_regime_features(ohlcv_df)[FEATURE_COLUMNS].to_numpy(), rtol=1e-10)
+    with pytest.raises(ValueError):
+        adx[-1] = 0.0                      # cached values are read-only
+
+
+def test_rolling_window_appends_and_rewrites_recompute(ohlcv_df):
+    engine = IndicatorEngine(rolling=True)
+    first = engine.get('ETH/USDT', '1h', 'ema', ohlcv_df.iloc[:500], timeperiod=50)
+    slid = engine.get('ETH/USDT', '1h', 'ema', ohlcv_df.iloc[3:503], timeperiod=50)
+    assert engine.stats()['appended'] == 3
+    np.testing.assert_array_equal(slid[:497], first[3:])
+    np.testing.assert_allclose(slid, talib.EMA(ohlcv_df['close'], timeperiod=50)[3:503], rtol=1e-9)
+
+    rewritten = ohlcv_df.iloc[3:504].copy()
+    rewritten.loc[400, 'close'] *= 1.05
+    engine.get('ETH/USDT', '1h', 'ema', rewritten, timeperiod=50)
+    assert engine.stats()['computed'] == 2
+
+
+def test_anchored_entries_per_window_and_lru(ohlcv_df):
+    engine = IndicatorEngine(rolling=False, max_entries=2)
+    for start in (0, 100, 200):
+        window = ohlcv_df.iloc[start:start + 300]
+        np.testing.assert_allclose(engine.get(None, None, 'rsi', window, timeperiod=7),
+                                   talib.RSI(window['close'], timeperiod=7), rtol=1e-9)
+    assert engine.stats()['entries'] == 2
+    series = cached_indicator('rsi', ohlcv_df.set_index('date')['close'], timeperiod=7)
+    assert series.index.equals(pd.DatetimeIndex(ohlcv_df['date']))
+    np.testing.assert_allclose(series, talib.RSI(ohlcv_df['close'], timeperiod=7), rtol=1e-9)
+
+
+def test_lookup_reads_frame_columns_without_copying(ohlcv_df):
+    import tracemalloc
+    engine = IndicatorEngine()
+    engine.get('BTC/USDT', '1h', 'adx', ohlcv_df, timeperiod=14)
+    tracemalloc.start()
+    try:
+        engine.get('BTC/USDT', '1h', 'adx', ohlcv_df, timeperiod=14)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert engine.stats()['hits'] == 1
+    assert peak < 8 * len(ohlcv_df)        # less than one float64 column
@@ -52,3 +52,32 @@ def test_monte_carlo_grid_vs_compound():
     grid_stats, _ = grid_validator.run_simulation(n_simulations=50)
     # Compound: (1.005)^500 ~12k. Grid: additive 500*0.005*50=125 profit ~1125. Grid << compound.
     assert grid_stats["median_final_equity"] < compound_stats["median_final_equity"]
+
+
+def test_monte_carlo_parallel_is_reproducible():
+    """n_jobs > 1 splits simulations across processes; same seed gives same stats."""
+    trades = pd.DataFrame({"pnl": np.random.default_rng(1).normal(0.005, 0.02, 200)})
+    validator = MonteCarloValidator(trades, initial_capital=1000)
+    stats_a, curves = validator.run_simulation(n_simulations=60, random_state=7, n_jobs=2)
+    stats_b, _ = validator.run_simulation(n_simulations=60, random_state=7, n_jobs=2)
+    assert stats_a == stats_b
+    assert stats_a["simulations"] == 60
+    assert len(curves) == 60
+
+
+@pytest.mark.parametrize("validator_cls", [MonteCarloValidator, MonteCarloValidatorGrid])
+def test_monte_carlo_seeding_serial_and_parallel(validator_cls):
+    """Serial runs keep the single default_rng(seed) stream; parallel runs agree for any n_jobs."""
+    trades = pd.DataFrame({"pnl": np.random.default_rng(3).normal(0.005, 0.02, 150)})
+    validator = validator_cls(trades, initial_capital=1000)
+    _, serial_curves = validator.run_simulation(n_simulations=250, random_state=11)
+    values = trades["pnl"].to_numpy() * getattr(validator, "capital_per_trade", 1.0)
+    rng = np.random.default_rng(11)
+    first = rng.choice(values, size=len(values), replace=True)
+    expected = 1000 + np.cumsum(first) if validator_cls is MonteCarloValidatorGrid else 1000 * np.cumprod(1 + first)
+    np.testing.assert_allclose(serial_curves[0][1:], expected)
+
+    two, two_curves = validator.run_simulation(n_simulations=250, random_state=11, n_jobs=2)
+    three, three_curves = validator.run_simulation(n_simulations=250, random_state=11, n_jobs=3)
+    assert two == three
+    np.testing.assert_array_equal(np.array(two_curves), np.array(three_curves))
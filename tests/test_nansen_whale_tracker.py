@@ -3,13 +3,11 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-import pytest
 import pandas as pd
-import numpy as np
 from unittest.mock import Mock, patch
 
 from utils.nansen_whale_tracker import (
-    NansenWhaleTracker, TOKEN_MAP, SYMBOL_TO_PAIR,
+    NansenWhaleTracker, TOKEN_MAP, SYMBOL_TO_PAIR, RETRY_STATUSES,
 )
 
 
@@ -44,23 +42,23 @@ def test_compute_accumulation_score_negative_flow():
     assert score == 0
 
 
-def test_get_accumulation_scores_empty_without_api_key():
-    tracker = NansenWhaleTracker(api_key='')
+def test_get_accumulation_scores_empty_without_api_key(tmp_path):
+    tracker = NansenWhaleTracker(api_key='', cache_dir=str(tmp_path))
     scores = tracker.get_accumulation_scores(['BTC', 'ETH'])
     assert scores == {}
 
 
-@patch('utils.nansen_whale_tracker.requests.post')
-def test_get_smart_money_netflow_returns_none_on_failure(mock_post):
+@patch('utils.nansen_whale_tracker.requests.Session.post')
+def test_get_smart_money_netflow_returns_none_on_failure(mock_post, tmp_path):
     import requests
     mock_post.side_effect = requests.RequestException("API Error")
-    tracker = NansenWhaleTracker(api_key='test-key')
+    tracker = NansenWhaleTracker(api_key='test-key', cache_dir=str(tmp_path))
     result = tracker.get_smart_money_netflow(chains=['ethereum'])
     assert result is None
 
 
-@patch('utils.nansen_whale_tracker.requests.post')
-def test_get_smart_money_netflow_returns_df_on_success(mock_post):
+@patch('utils.nansen_whale_tracker.requests.Session.post')
+def test_get_smart_money_netflow_returns_df_on_success(mock_post, tmp_path):
     mock_post.return_value.json.return_value = {
         'data': [
             {
@@ -73,8 +71,71 @@ def test_get_smart_money_netflow_returns_df_on_success(mock_post):
         ]
     }
     mock_post.return_value.raise_for_status = Mock()
-    tracker = NansenWhaleTracker(api_key='test-key')
+    tracker = NansenWhaleTracker(api_key='test-key', cache_dir=str(tmp_path))
     result = tracker.get_smart_money_netflow(chains=['ethereum'])
     assert result is not None
     assert not result.empty
     assert 'token_symbol' in result.columns or 'symbol' in result.columns
+
+
+def _paged_flows(n_rows, per_page, fail_page=None):
+    """Session.post stand-in serving n_rows flow rows over pages of per_page."""
+    def post(url, json=None, **kwargs):
+        page = json['pagination']['page']
+        resp = Mock()
+        if page == fail_page:
+            import requests
+            resp.raise_for_status.side_effect = requests.HTTPError("500 Server Error")
+            resp.text = ''
+            return resp
+        start = (page - 1) * per_page
+        rows = [{'date': str(pd.Timestamp('2024-01-01') + pd.Timedelta(days=i)), 'total_inflows_count': i,
+                 'total_outflows_count': 0} for i in range(start, min(start + per_page, n_rows))]
+        resp.raise_for_status = Mock()
+        resp.json.return_value = {'data': rows, 'pagination': {
+            'page': page, 'per_page': per_page, 'is_last_page': start + per_page >= n_rows}}
+        return resp
+    return post
+
+
+def test_get_token_flows_reads_every_page(tmp_path):
+    tracker = NansenWhaleTracker(api_key='test-key', cache_dir=str(tmp_path), max_workers=3)
+    with patch('utils.nansen_whale_tracker.requests.Session.post', side_effect=_paged_flows(2350, 500)) as post:
+        flows = tracker.get_token_flows('ethereum', TOKEN_MAP['LINK'][1], '2024-01-01', '2030-01-01', per_page=500)
+    assert len(flows) == 2350
+    assert flows.index.is_monotonic_increasing
+    assert flows['total_inflows_count'].tolist() == list(range(2350))
+    assert sorted(c.kwargs['json']['pagination']['page'] for c in post.call_args_list) == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_get_token_flows_failed_page_returns_none(tmp_path):
+    tracker = NansenWhaleTracker(api_key='test-key', cache_dir=str(tmp_path))
+    with patch('utils.nansen_whale_tracker.requests.Session.post', side_effect=_paged_flows(2350, 500, fail_page=3)):
+        assert tracker.get_token_flows('ethereum', TOKEN_MAP['LINK'][1], '2024-01-01', '2030-01-01', per_page=500) is None
+
+
+def test_response_cache_reuses_and_expires(tmp_path):
+    tracker = NansenWhaleTracker(api_key='test-key', cache_dir=str(tmp_path), response_cache_ttl=3600)
+    args = ('ethereum', TOKEN_MAP['LINK'][1], '2024-01-01', '2024-03-01')
+    with patch('utils.nansen_whale_tracker.requests.Session.post', side_effect=_paged_flows(60, 1000)) as post:
+        first = tracker.get_token_flows(*args)
+        second = tracker.get_token_flows(*args)
+        assert post.call_count == 1
+        pd.testing.assert_frame_equal(first, second)
+
+        tracker.get_token_flows('ethereum', TOKEN_MAP['LINK'][1], '2024-01-01', '2024-04-01')
+        assert post.call_count == 2   # different payload, different key
+
+        tracker.response_cache_ttl = 1e-9   # everything on disk is now stale
+        tracker.get_token_flows(*args)
+        assert post.call_count == 3
+
+
+def test_session_retries_transient_statuses(tmp_path):
+    tracker = NansenWhaleTracker(api_key='test-key', cache_dir=str(tmp_path), max_workers=6)
+    adapter = tracker.session.get_adapter('https://api.nansen.ai')
+    retry = adapter.max_retries
+    assert set(RETRY_STATUSES) <= set(retry.status_forcelist)
+    assert 'POST' in retry.allowed_methods
+    assert retry.backoff_factor > 0 and retry.total >= 3
+    assert adapter._pool_maxsize == 6
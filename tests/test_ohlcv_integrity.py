@@ -0,0 +1,91 @@
+"""Unit tests for utils/ohlcv_integrity.py"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from utils.ohlcv_integrity import (
+    timeframe_to_ms, build_integrity_index, dedupe_ohlcv, repair_ohlcv,
+    ohlcv_rows_to_frame, update_catalog, load_catalog, is_clean,
+)
+
+HOUR = 3_600_000
+T0 = 1_704_067_200_000  # 2024-01-01 00:00 UTC
+
+
+def _rows(hours):
+    return [[T0 + h * HOUR, 100 + h, 101 + h, 99 + h, 100.5 + h, 1000] for h in hours]
+
+
+def test_timeframe_to_ms():
+    assert timeframe_to_ms('1h') == HOUR
+    assert timeframe_to_ms('8h') == 8 * HOUR
+    assert timeframe_to_ms('1d') == 24 * HOUR
+    with pytest.raises(ValueError):
+        timeframe_to_ms('1x')
+
+
+def test_clean_dataset():
+    df = ohlcv_rows_to_frame(_rows(range(48)))
+    index = build_integrity_index(df, '1h')
+    assert is_clean(index)
+    assert index['rows'] == index['expected_rows'] == 48
+
+
+def test_gaps_and_duplicates_detected():
+    hours = list(range(10)) + [9, 10] + list(range(15, 20))  # dup at 9, gap 11..14
+    df = ohlcv_rows_to_frame(_rows(hours))
+    index = build_integrity_index(df, '1h')
+    assert index['duplicates'] == 1
+    assert index['duplicate_timestamps'] == [T0 + 9 * HOUR]
+    assert index['gaps'] == [{'start': T0 + 11 * HOUR, 'end': T0 + 14 * HOUR, 'missing_bars': 4}]
+    assert index['missing_bars'] == 4
+    assert not is_clean(index)
+
+
+def test_index_uses_datetime_index_without_timestamp_column():
+    df = ohlcv_rows_to_frame(_rows([0, 1, 3])).drop(columns=['timestamp'])
+    index = build_integrity_index(df, '1h')
+    assert index['missing_bars'] == 1
+    assert index['first_ts'] == T0
+
+
+def test_dedupe_keeps_last_and_sorts():
+    rows = _rows([2, 0, 1])
+    dup = _rows([1])[0]
+    dup[4] = 999.0
+    df = ohlcv_rows_to_frame(rows + [dup])
+    out = dedupe_ohlcv(df)
+    assert list(out['timestamp']) == [T0, T0 + HOUR, T0 + 2 * HOUR]
+    assert out['close'].iloc[1] == 999.0
+
+
+def test_repair_fetches_only_missing_ranges():
+    df = ohlcv_rows_to_frame(_rows([0, 1, 2, 6, 7, 7, 8]))
+    calls = []
+
+    def fetch_range(start, end):
+        calls.append((start, end))
+        # Exchange returns a little extra around the gap
+        return _rows(range((start - T0) // HOUR - 1, (end - T0) // HOUR + 2))
+
+    repaired, index = repair_ohlcv(df, '1h', fetch_range=fetch_range)
+    assert calls == [(T0 + 3 * HOUR, T0 + 5 * HOUR)]
+    assert is_clean(index)
+    assert len(repaired) == 9
+
+
+def test_repair_reports_unfillable_gap():
+    df = ohlcv_rows_to_frame(_rows([0, 1, 5]))
+    _, index = repair_ohlcv(df, '1h', fetch_range=lambda s, e: [])
+    assert index['missing_bars'] == 3
+
+
+def test_catalog_roundtrip():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'catalog.json')
+        index = build_integrity_index(ohlcv_rows_to_frame(_rows([0, 2])), '1h')
+        update_catalog('data/ohlcv/BTC_USDT_1h.csv', index, catalog_path=path)
+        catalog = load_catalog(path)
+        assert catalog['data/ohlcv/BTC_USDT_1h.csv']['missing_bars'] == 1
@@ -0,0 +1,71 @@
+"""Unit tests for utils/regime_cache.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.regime_detector import CryptoRegimeDetector
+from utils.regime_cache import RegimeColumnCache
+
+
+@pytest.fixture(scope='module')
+def price_df():
+    rng = np.random.default_rng(7)
+    n = 420
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n) + np.repeat(rng.normal(0, 0.004, 7), 60)))
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n, freq='1h', tz='UTC'),
+        'open': close, 'high': close * 1.005, 'low': close * 0.995, 'close': close,
+        'volume': rng.integers(1000, 10000, n),
+    })
+
+
+@pytest.fixture(scope='module')
+def detector(price_df):
+    det = CryptoRegimeDetector()
+    det.fit(price_df.iloc[:300])
+    return det
+
+
+def _predicted(detector, df):
+    labels = detector.predict(df)['regime_label'].reindex(df.index)
+    return labels.to_numpy(dtype=object)
+
+
+def test_first_call_matches_predict(detector, price_df):
+    cache = RegimeColumnCache(detector)
+    labels = cache.column(price_df.iloc[:300])
+    expected = _predicted(detector, price_df.iloc[:300])
+    assert pd.Series(labels).equals(pd.Series(expected))
+    assert cache.full_recomputes == 1
+
+
+def test_appended_labels_match_full_decode_at_each_candle(detector, price_df):
+    cache = RegimeColumnCache(detector)
+    cache.column(price_df.iloc[:300])
+    for end in range(301, 340):
+        labels = cache.column(price_df.iloc[:end])
+        assert labels[-1] == _predicted(detector, price_df.iloc[:end])[-1]
+    assert (cache.full_recomputes, cache.appended) == (1, 39)
+    assert cache.filtered_regime() == cache.filter.warm_start(price_df.iloc[:339])['regime']
+
+
+def test_sliding_window_appends(detector, price_df):
+    cache = RegimeColumnCache(detector)
+    first = cache.column(price_df.iloc[0:300])
+    labels = cache.column(price_df.iloc[5:305])
+    assert cache.full_recomputes == 1 and cache.appended == 5
+    assert pd.Series(labels[:295]).equals(pd.Series(first[5:]))
+
+
+def test_rewritten_or_disjoint_history_recomputes(detector, price_df):
+    cache = RegimeColumnCache(detector)
+    cache.column(price_df.iloc[:300])
+    rewritten = price_df.iloc[:301].copy()
+    rewritten.loc[250, 'close'] *= 1.1
+    cache.column(rewritten)
+    assert cache.full_recomputes == 2
+    cache.column(price_df.iloc[310:400])        # gap: nothing overlaps the cache
+    assert cache.full_recomputes == 3
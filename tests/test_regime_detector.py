@@ -6,7 +6,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 import numpy as np
 import pandas as pd
 import pytest
-from utils.regime_detector import CryptoRegimeDetector
+from utils.regime_detector import CryptoRegimeDetector, RegimeModelCache, OnlineRegimeFilter
 
 
 @pytest.fixture
@@ -52,3 +52,101 @@ def test_predict_after_fit(sample_price_df):
     out = det.predict(sample_price_df)
     assert 'regime_label' in out.columns
     assert len(out) > 0
+
+
+def test_save_load_roundtrip(sample_price_df, tmp_path):
+    det = CryptoRegimeDetector()
+    det.fit(sample_price_df)
+    path = det.save(str(tmp_path / 'model.pkl'))
+    loaded = CryptoRegimeDetector.load(path)
+    assert loaded.regime_labels == {int(k): v for k, v in det.regime_labels.items()}
+    pd.testing.assert_series_equal(loaded.predict(sample_price_df)['regime_label'],
+                                   det.predict(sample_price_df)['regime_label'])
+
+
+def test_fit_cached_reuses_model(sample_price_df, tmp_path, monkeypatch):
+    cache = RegimeModelCache(str(tmp_path))
+    first = CryptoRegimeDetector().fit_cached(sample_price_df, symbol='BTC/USDT', timeframe='1d', cache=cache)
+    assert len(os.listdir(tmp_path)) == 1
+
+    def no_fit(self, price_df):
+        raise AssertionError("fit() should not run on a cache hit")
+    monkeypatch.setattr(CryptoRegimeDetector, 'fit', no_fit)
+    second = CryptoRegimeDetector().fit_cached(sample_price_df, symbol='BTC/USDT', timeframe='1d', cache=cache)
+    pd.testing.assert_series_equal(first['regime_label'], second['regime_label'])
+
+
+def test_cache_key_depends_on_data_and_config(sample_price_df):
+    cache = RegimeModelCache('unused')
+    base = cache.key(sample_price_df, 4, 42, 'BTC/USDT', '1d')
+    changed = sample_price_df.copy()
+    changed.loc[changed.index[-1], 'close'] += 1
+    assert cache.key(changed, 4, 42, 'BTC/USDT', '1d') != base
+    assert cache.key(sample_price_df, 3, 42, 'BTC/USDT', '1d') != base
+    assert cache.key(sample_price_df, 4, 42, 'ETH/USDT', '1d') != base
+
+
+def test_online_filter_matches_hmm_posterior(sample_price_df):
+    det = CryptoRegimeDetector()
+    det.fit(sample_price_df)
+    regime_filter = OnlineRegimeFilter(det)
+    state = regime_filter.warm_start(sample_price_df)
+    features, _ = det.prepare_features(sample_price_df)
+    # Filtered posterior at the last bar equals the smoothed posterior at the last bar
+    np.testing.assert_allclose(regime_filter.alpha, det.model.predict_proba(features)[-1], atol=1e-8)
+    assert abs(sum(state['probabilities'].values()) - 1.0) < 1e-9
+    assert state['regime'] in {'BEAR', 'BULL', 'SIDEWAYS', 'TRANSITION'}
+
+
+def test_online_filter_incremental_matches_warm_start(sample_price_df):
+    det = CryptoRegimeDetector()
+    det.fit(sample_price_df.iloc[:280])
+    incremental = OnlineRegimeFilter(det)
+    incremental.warm_start(sample_price_df.iloc[:280])
+    for i in range(280, len(sample_price_df)):
+        incremental.sync(sample_price_df.iloc[:i + 1])
+    full = OnlineRegimeFilter(det)
+    full.warm_start(sample_price_df)
+    np.testing.assert_allclose(incremental.alpha, full.alpha, atol=1e-8)
+    assert incremental.last_ts == sample_price_df.index[-1]
+
+
+def test_restarts_keep_best_likelihood(sample_price_df):
+    single = CryptoRegimeDetector()
+    single.fit(sample_price_df)
+    multi = CryptoRegimeDetector()
+    multi.fit(sample_price_df, n_restarts=3)
+    features, _ = multi.prepare_features(sample_price_df)
+    assert multi.model.score(features) >= single.model.score(features) - 1e-6
+    parallel = CryptoRegimeDetector()
+    parallel.fit(sample_price_df, n_restarts=3, n_jobs=2)
+    np.testing.assert_allclose(parallel.model.means_, multi.model.means_)
+
+
+def test_warm_start_maps_previous_parameters(sample_price_df):
+    prev = CryptoRegimeDetector()
+    prev.fit(sample_price_df)
+    # Same data: mapped parameters are already the EM fixed point
+    det = CryptoRegimeDetector()
+    result = det.fit(sample_price_df, warm_start=prev)
+    assert det.model.monitor_.iter <= 3
+    assert 'regime_label' in result.columns
+    # Shifted window: still fits and labels every regime
+    shifted = CryptoRegimeDetector()
+    shifted.fit(sample_price_df.iloc[10:], warm_start=prev)
+    assert set(shifted.regime_labels.values()) <= {'BEAR', 'BULL', 'SIDEWAYS', 'TRANSITION'}
+
+
+def test_fit_many_builds_panel(sample_price_df):
+    idx = pd.date_range('2024-01-01', periods=len(sample_price_df), freq='h')
+    frames = {
+        'BTC/USDT': sample_price_df.set_index(idx),
+        'ETH/USDT': (sample_price_df * 0.05).set_index(idx + pd.Timedelta(hours=5)),
+        'TINY/USDT': sample_price_df.iloc[:50].set_index(idx[:50]),
+    }
+    detectors, panel = CryptoRegimeDetector.fit_many(frames)
+    assert list(panel.columns) == list(frames)
+    assert detectors['TINY/USDT'] is None and panel['TINY/USDT'].isna().all()
+    assert panel['BTC/USDT'].dropna().isin(['BEAR', 'BULL', 'SIDEWAYS', 'TRANSITION']).all()
+    _, parallel = CryptoRegimeDetector.fit_many(frames, n_jobs=2)
+    pd.testing.assert_frame_equal(panel, parallel)
@@ -0,0 +1,49 @@
+"""Unit tests for utils/regime_features.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.regime_features import compute_regime_features, StreamingRegimeFeatures, FEATURE_COLUMNS
+
+
+@pytest.fixture
+def ohlcv_df():
+    rng = np.random.default_rng(7)
+    n = 600
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({
+        'Open': close,
+        'High': close * (1 + np.abs(rng.normal(0, 0.01, n))),
+        'Low': close * (1 - np.abs(rng.normal(0, 0.01, n))),
+        'Close': close,
+        'Volume': rng.integers(1000, 10000, n).astype(float),
+    })
+
+
+def test_batch_features_columns(ohlcv_df):
+    out = compute_regime_features(ohlcv_df)
+    assert list(ohlcv_df.columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+    assert set(FEATURE_COLUMNS) <= set(out.columns)
+    assert out[FEATURE_COLUMNS].dropna().index[0] == 199  # SMA200 warm-up
+
+
+def test_streaming_matches_batch(ohlcv_df):
+    batch = compute_regime_features(ohlcv_df)[FEATURE_COLUMNS].to_numpy()
+    stream = StreamingRegimeFeatures()
+    rows = []
+    for h, l, c in ohlcv_df[['High', 'Low', 'Close']].itertuples(index=False):
+        row = stream.update(h, l, c)
+        rows.append(row if row is not None else np.full(len(FEATURE_COLUMNS), np.nan))
+    rows = np.array(rows)
+    valid = ~np.isnan(batch).any(axis=1)
+    assert (valid == ~np.isnan(rows).any(axis=1)).all()
+    np.testing.assert_allclose(rows[valid], batch[valid], rtol=1e-10)
+
+
+def test_warm_returns_last_row(ohlcv_df):
+    last = StreamingRegimeFeatures().warm(ohlcv_df)
+    batch = compute_regime_features(ohlcv_df)[FEATURE_COLUMNS].iloc[-1].to_numpy()
+    np.testing.assert_allclose(last, batch, rtol=1e-10)
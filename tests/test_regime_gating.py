@@ -0,0 +1,52 @@
+"""Unit tests for utils/regime_gating.py"""
+import sys
+import os
+import json
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from utils.regime_gating import REGIME_GATING, resolve_strategy_id
+from utils.risk_manager import RiskManager
+
+
+def test_resolve_strategy_id():
+    assert resolve_strategy_id('WeekendMomentum') == 'S1'
+    assert resolve_strategy_id('FundingReversion') == 'S2'
+    assert resolve_strategy_id('RegimeGrid') == 'S5'
+    assert resolve_strategy_id('BasisHarvest') is None
+
+
+def test_allowed_mask_matches_scalar_checks():
+    regimes = pd.Series(['BULL', 'BEAR', 'SIDEWAYS', 'TRANSITION', None, 'unknown', 'bear'])
+    for strategy in ['WeekendMomentum', 'FundingReversion', 'UnlockTrader', 'RegimeGrid', 'BasisHarvest']:
+        for side in ['long', 'short']:
+            mask = REGIME_GATING.allowed_mask(regimes, strategy, side)
+            expected = [REGIME_GATING.is_allowed(strategy, r, side) for r in regimes]
+            assert mask.tolist() == expected
+    assert REGIME_GATING.allowed_mask(regimes, 'FundingReversion', 'long').tolist() == \
+        [True, False, True, True, True, True, False]
+
+
+def test_per_row_sides():
+    mask = REGIME_GATING.allowed_mask(['BEAR', 'BEAR', 'BULL'], 'S2', ['long', 'short', 'short'])
+    assert mask.tolist() == [False, True, False]
+
+
+def test_size_multiplier_series():
+    mult = REGIME_GATING.size_multiplier(['TRANSITION', 'BEAR', 'BULL'], 'RegimeGrid')
+    np.testing.assert_array_equal(mult, [0.5, 0.5, 1.0])
+    np.testing.assert_array_equal(REGIME_GATING.size_multiplier(['BEAR', 'TRANSITION']), [1.0, 0.5])
+
+
+def test_custom_table_from_config(tmp_path):
+    table = {'rules': {'S1': {'SIDEWAYS': 'none'}}, 'size_multipliers': {'S1': {'BULL': 1.5}}}
+    path = tmp_path / 'gating.json'
+    path.write_text(json.dumps(table))
+    rm = RiskManager({'regime_gating': str(path)})
+    rm.set_regime('SIDEWAYS')
+    assert rm.is_strategy_allowed('WeekendMomentum', 'long') is False
+    rm.set_regime('BEAR')
+    assert rm.is_strategy_allowed('WeekendMomentum', 'long') is True   # not in custom table
+    rm.set_regime('BULL')
+    assert rm.get_position_size_multiplier('S1') == 1.5
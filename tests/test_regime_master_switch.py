@@ -59,3 +59,13 @@ def test_position_size_multiplier_bear_s5(risk_manager):
 def test_position_size_multiplier_normal(risk_manager):
     risk_manager.set_regime('BULL')
     assert risk_manager.get_position_size_multiplier() == 1.0
+
+
+def test_explicit_pair_regime_overrides_current(risk_manager):
+    risk_manager.set_regime('BULL')          # another pair's regime
+    assert risk_manager.is_strategy_allowed('FundingReversion', 'short', regime='bear') is True
+    assert risk_manager.get_position_size_multiplier(regime='TRANSITION') == 0.5
+    full = risk_manager.calculate_position_size(100.0, 95.0, strategy_id='FundingReversion')
+    halved = risk_manager.calculate_position_size(100.0, 95.0, strategy_id='FundingReversion', regime='TRANSITION')
+    assert halved == pytest.approx(full * 0.5)
+    assert risk_manager.current_regime == 'BULL'
@@ -0,0 +1,53 @@
+"""Unit tests for utils/regime_refit.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.regime_detector import RegimeModelCache
+from utils.regime_refit import RegimeRefitScheduler
+
+
+@pytest.fixture
+def price_df():
+    rng = np.random.default_rng(3)
+    n = 400
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n, freq='h'),
+        'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+        'volume': rng.integers(1000, 10000, n).astype(float),
+    })
+
+
+def test_blocking_refit_swaps_immediately(price_df, tmp_path):
+    sched = RegimeRefitScheduler(blocking=True, cache=RegimeModelCache(str(tmp_path)))
+    assert sched.maybe_refit(price_df, now=0.0)
+    assert sched.detector is not None and sched.version == 1
+    assert sched.last_fit_duration is not None
+
+
+def test_background_refit_respects_cadence(price_df, tmp_path):
+    sched = RegimeRefitScheduler(refit_interval_sec=100, cache=RegimeModelCache(str(tmp_path)))
+    try:
+        assert sched.maybe_refit(price_df, now=0.0)
+        sched.wait(timeout=30)
+        first = sched.detector
+        assert first is not None and sched.version == 1
+
+        assert not sched.maybe_refit(price_df, now=50.0)    # not due yet
+        assert sched.maybe_refit(price_df.iloc[1:], now=150.0)
+        sched.wait(timeout=30)
+        assert sched.version == 2 and sched.detector is not first
+    finally:
+        sched.shutdown()
+
+
+def test_failed_refit_keeps_current_model(price_df, tmp_path):
+    sched = RegimeRefitScheduler(blocking=True, refit_interval_sec=0, cache=RegimeModelCache(str(tmp_path)))
+    sched.maybe_refit(price_df)
+    current = sched.detector
+    sched.maybe_refit(price_df.iloc[:50])   # too short to fit
+    assert sched.detector is current and sched.version == 1
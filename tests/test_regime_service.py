@@ -0,0 +1,51 @@
+"""Unit tests for utils/regime_service.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.ohlcv_integrity import ohlcv_rows_to_frame
+from utils.regime_detector import RegimeModelCache
+from utils.regime_service import RegimeService, RegimeStore, RegimeClient
+
+HOUR = 3_600_000
+T0 = 1_704_067_200_000
+
+
+@pytest.fixture
+def ohlcv():
+    rng = np.random.default_rng(0)
+    n = 500
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    rows = [[T0 + i * HOUR, close[i], close[i] * 1.01, close[i] * 0.99, close[i], 1000.0] for i in range(n)]
+    return ohlcv_rows_to_frame(rows)
+
+
+def _dates(df):
+    return pd.Series(pd.to_datetime(df['timestamp'], unit='ms', utc=True).to_numpy())
+
+
+def test_publish_and_read_back(ohlcv, tmp_path):
+    db = str(tmp_path / 'regimes.sqlite')
+    service = RegimeService(['BTC/USDT'], '1h', RegimeStore(db), fetch=lambda s, t, b: ohlcv,
+                             cache=RegimeModelCache(str(tmp_path)))
+    assert service.run_once() == {'BTC/USDT': 301}   # rows after SMA200 warm-up
+
+    out = RegimeClient(db).regime_for('BTC/USDT', '1h', _dates(ohlcv))
+    assert len(out) == len(ohlcv)
+    assert (out['regime'].iloc[:199] == 'UNKNOWN').all()
+    assert set(out['regime'].iloc[199:]) <= {'BEAR', 'BULL', 'SIDEWAYS', 'TRANSITION'}
+    assert out['filtered_regime'].iloc[-1] in {'BEAR', 'BULL', 'SIDEWAYS', 'TRANSITION'}
+
+
+def test_client_carries_one_bar_and_rejects_stale(ohlcv, tmp_path):
+    db = str(tmp_path / 'regimes.sqlite')
+    RegimeService(['BTC/USDT'], '1h', RegimeStore(db), fetch=lambda s, t, b: ohlcv.iloc[:-2],
+                   cache=RegimeModelCache(str(tmp_path))).run_once()
+    client = RegimeClient(db, max_lag_bars=1)
+    assert client.regime_for('BTC/USDT', '1h', _dates(ohlcv)) is None          # two bars behind
+    lagged = client.regime_for('BTC/USDT', '1h', _dates(ohlcv.iloc[:-1]))        # one bar behind
+    assert lagged['filtered_regime'].iloc[-1] == lagged['filtered_regime'].iloc[-2]
+    assert client.regime_for('ETH/USDT', '1h', _dates(ohlcv)) is None
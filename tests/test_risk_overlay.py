@@ -0,0 +1,101 @@
+"""Unit tests for utils/risk_overlay.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.risk_overlay import RiskOverlay, FUNDING_REVERSION_THROTTLE, drawdown_throttle
+
+
+def _ledger(entries, exits, pnl):
+    return pd.DataFrame({
+        'entry_time': pd.to_datetime(entries, format='ISO8601'),
+        'exit_time': pd.to_datetime(exits, format='ISO8601'),
+        'pnl': pnl,
+    })
+
+
+def test_position_cap_scales_pnl():
+    trades = _ledger(['2024-01-01 00:00', '2024-01-02 00:00'], ['2024-01-01 05:00', '2024-01-02 05:00'], [0.10, -0.05])
+    out = RiskOverlay({'initial_capital': 1000.0}).apply_trades(trades)
+    assert out['stake_frac'].tolist() == [0.2, 0.2]
+    assert out['pnl'].tolist() == pytest.approx([0.02, -0.01])
+    assert out['equity'].tolist() == pytest.approx([1020.0, 1009.8])
+    assert not out['blocked'].any()
+    assert trades['pnl'].tolist() == [0.10, -0.05]   # input untouched
+
+
+def test_daily_loss_blocks_until_next_day():
+    trades = _ledger(
+        ['2024-01-01 01:00', '2024-01-01 03:00', '2024-01-01 05:00', '2024-01-02 01:00'],
+        ['2024-01-01 02:00', '2024-01-01 04:00', '2024-01-01 06:00', '2024-01-02 02:00'],
+        [-0.02, -0.02, 0.05, 0.01],
+    )
+    out = RiskOverlay({'max_position_frac': None}).apply_trades(trades)
+    assert out['block_reason'].fillna('').tolist() == ['', '', 'daily_loss', '']
+    assert out.loc[2, 'pnl'] == 0.0
+    assert out.loc[3, 'pnl'] == pytest.approx(0.01)
+
+
+def test_kill_switch_blocks_rest_of_ledger():
+    days = pd.date_range('2024-01-01', periods=6, freq='D')
+    trades = _ledger(days, days + pd.Timedelta(hours=1), [-0.06, -0.06, -0.06, 0.10, 0.10, 0.10])
+    out = RiskOverlay({'max_position_frac': None, 'max_daily_loss': 1.0}).apply_trades(trades)
+    assert out['blocked'].tolist() == [False, False, False, True, True, True]
+    assert set(out['block_reason'].dropna()) == {'kill_switch'}
+    dropped = RiskOverlay({'max_position_frac': None, 'max_daily_loss': 1.0})(trades)
+    assert len(dropped) == 3
+
+
+def test_funding_reversion_throttle_halves_then_blocks_until_recovery():
+    overlay = RiskOverlay({'max_position_frac': None, 'max_daily_loss': 1.0,
+                           'max_portfolio_drawdown': 0.5, 'throttle': 'funding_reversion'})
+    trades = _ledger(
+        # A long-running winner stays open while the drawdown builds
+        ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05', '2024-01-07'],
+        ['2024-01-08', '2024-01-02 01:00', '2024-01-03 01:00', '2024-01-04 01:00', '2024-01-05 01:00', '2024-01-07 01:00'],
+        [0.20, -0.11, -0.12, 0.01, 0.01, 0.01],
+    )
+    out = overlay.apply_trades(trades)
+    # 11% drawdown -> half size; 16.3% -> blocked until the winner closes and equity recovers
+    assert out['size_mult'].tolist() == [1.0, 1.0, 0.5, 0.0, 0.0, 0.0]
+    assert out.loc[3, 'block_reason'] == 'drawdown_throttle'
+
+    trades.loc[5, ['entry_time', 'exit_time']] = [pd.Timestamp('2024-01-09'), pd.Timestamp('2024-01-09 01:00')]
+    assert overlay.apply_trades(trades)['size_mult'].iloc[-1] == 1.0
+
+
+def test_equity_overlay_caps_exposure_and_stops_at_kill_switch():
+    idx = pd.date_range('2024-01-01', periods=48, freq='h')
+    rets = np.full(len(idx), -0.01)
+    equity = pd.Series(1000.0 * np.cumprod(1 + rets), index=idx)
+    out = RiskOverlay({'max_position_frac': 0.5, 'max_daily_loss': 1.0}).apply_equity(equity)
+    assert out['returns'].iloc[1] == pytest.approx(-0.005)
+    stopped = out['block_reason'] == 'kill_switch'
+    assert stopped.any()
+    first = stopped.idxmax()
+    assert (out.loc[first:, 'returns'] == 0).all()
+    assert out['equity'].min() == pytest.approx(out.loc[first, 'equity'])
+
+
+def test_overlay_is_fast_enough_for_wfa_windows():
+    import time
+    n = 20000
+    start = pd.Timestamp('2024-01-01') + pd.to_timedelta(np.arange(n) * 3, unit='h')
+    trades = pd.DataFrame({'entry_time': start, 'exit_time': start + pd.Timedelta(hours=2),
+                           'pnl': np.random.default_rng(0).normal(0.001, 0.01, n)})
+    started = time.perf_counter()
+    out = RiskOverlay({'throttle': 'funding_reversion'}).apply_trades(trades)
+    assert len(out) == n
+    assert time.perf_counter() - started < 2.0
+
+
+def test_drawdown_throttle_hysteresis():
+    levels, resume = FUNDING_REVERSION_THROTTLE['levels'], FUNDING_REVERSION_THROTTLE['resume_below']
+    halted, mults = False, []
+    for dd in [0.05, 0.11, 0.16, 0.12, 0.09, 0.07, 0.11]:
+        mult, halted = drawdown_throttle(dd, halted, levels, resume)
+        mults.append(mult)
+    assert mults == [1.0, 0.5, 0.0, 0.0, 0.0, 1.0, 0.5]
@@ -0,0 +1,94 @@
+"""Unit tests for utils/risk_state.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.risk_manager import RiskManager
+from utils.risk_state import SharedRiskState
+
+
+def _config(path):
+    return {
+        'max_risk_per_trade': 0.01,
+        'max_daily_loss': 0.03,
+        'max_portfolio_drawdown': 0.15,
+        'initial_capital': 10000.0,
+        'state_path': path,
+    }
+
+
+def _reserve(path, strategy):
+    state = SharedRiskState(path, initial_capital=10000.0, max_daily_loss=0.03)
+    return state.try_reserve(strategy, 'BTC/USDT', 100.0)
+
+
+def test_limits_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'risk.sqlite')
+    s1 = RiskManager(_config(path))
+    s2 = RiskManager(_config(path))
+    s1.record_trade_result(-200)
+    s2.record_trade_result(-150)   # -3.5% across the account, -2% / -1.5% per strategy
+    assert s1.check_trade_allowed('BTC/USDT', 'S1') is False
+    assert s2.check_trade_allowed('ETH/USDT', 'S2') is False
+
+
+def test_state_survives_restart(tmp_path):
+    path = str(tmp_path / 'risk.sqlite')
+    RiskManager(_config(path)).update_capital(8400)   # 16% drawdown
+    restarted = RiskManager(_config(path))
+    assert restarted.is_kill_switch_active is True
+    assert restarted.check_trade_allowed('BTC/USDT', 'S1') is False
+
+
+def test_reserve_and_release_budget(tmp_path):
+    rm = RiskManager(_config(str(tmp_path / 'risk.sqlite')))   # budget 300
+    assert rm.reserve_risk('BTC/USDT', 'S1', 150)
+    assert rm.reserve_risk('ETH/USDT', 'S2', 150)
+    assert not rm.reserve_risk('SOL/USDT', 'S3', 1)
+    rm.release_risk('BTC/USDT', 'S1', pnl_amount=50)
+    assert rm.daily_pnl == 50
+    assert rm.reserve_risk('SOL/USDT', 'S3', 100)
+
+
+def test_expired_reservation_frees_budget(tmp_path):
+    now = [1_700_000_000.0]
+    state = SharedRiskState(str(tmp_path / 'risk.sqlite'), initial_capital=10000.0,
+                            reservation_ttl_sec=60, clock=lambda: now[0])
+    assert state.try_reserve('S1', 'BTC/USDT', 300)
+    assert not state.try_reserve('S2', 'ETH/USDT', 10)
+    now[0] += 61
+    assert state.try_reserve('S2', 'ETH/USDT', 10)
+
+
+def test_concurrent_reservations_respect_budget(tmp_path):
+    path = str(tmp_path / 'risk.sqlite')
+    SharedRiskState(path, initial_capital=10000.0).close()
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(_reserve, [path] * 8, [f"S{i}" for i in range(8)]))
+    assert sum(results) == 3   # 3 x 100 fits the 300 budget
+
+
+def test_exit_fills_book_pnl_once_per_trade(tmp_path):
+    path = str(tmp_path / 'risk.sqlite')
+    rm = RiskManager(_config(path))
+    assert rm.reserve_risk('BTC/USDT', 'S1', 100)
+    rm.record_exit_fill(7, 'BTC/USDT', 'S1', realized_pnl=-40, is_open=True)    # partial exit
+    rm.record_exit_fill(7, 'BTC/USDT', 'S1', realized_pnl=-40, is_open=True)    # same fill reported again
+    assert rm.daily_pnl == -40
+    restarted = RiskManager(_config(path))
+    restarted.record_exit_fill(7, 'BTC/USDT', 'S1', realized_pnl=-90, is_open=False)
+    assert restarted.daily_pnl == -90
+    assert restarted.state.reserved_pairs('S1') == []
+
+
+def test_stale_reservations_released(tmp_path):
+    rm = RiskManager(_config(str(tmp_path / 'risk.sqlite')))
+    assert rm.reserve_risk('BTC/USDT', 'S1', 150)
+    assert rm.reserve_risk('ETH/USDT', 'S1', 150)
+    assert rm.reserve_risk('SOL/USDT', 'S2', 0)
+    assert rm.release_stale_reservations('S1', {'ETH/USDT'}) == ['BTC/USDT']   # entry never filled
+    assert rm.state.reserved_pairs('S1') == ['ETH/USDT']
+    assert rm.state.reserved_pairs('S2') == ['SOL/USDT']
+    assert rm.daily_pnl == 0
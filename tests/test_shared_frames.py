@@ -0,0 +1,65 @@
+"""Unit tests for utils/shared_frames.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.shared_frames import SharedFrameStore, resolve_frame
+
+
+@pytest.fixture
+def price_df():
+    idx = pd.date_range('2024-01-01', periods=500, freq='1h', name='datetime')
+    close = 100 + np.cumsum(np.random.default_rng(0).standard_normal(500))
+    return pd.DataFrame({
+        'timestamp': idx.as_unit('ms').asi8,
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+        'volume': np.arange(500, dtype=float),
+        'signal': np.arange(500) % 7 == 0,
+    }, index=idx)
+
+
+def _close_sum(handle):
+    return float(handle.attach()['close'].sum())
+
+
+def test_publish_attach_roundtrip(price_df):
+    with SharedFrameStore() as store:
+        handle = store.publish(price_df)
+        out = handle.attach()
+        pd.testing.assert_frame_equal(out, price_df, check_freq=False)
+
+
+def test_attach_is_zero_copy(price_df):
+    with SharedFrameStore() as store:
+        handle = store.publish(price_df, columns=['open', 'close'])
+        a = handle.attach()
+        b = handle.attach()
+        assert np.shares_memory(a['close'].to_numpy(), b['close'].to_numpy())
+        assert np.shares_memory(a.index.asi8, b.index.asi8)
+        del a, b
+
+
+def test_handle_is_small_when_pickled(price_df):
+    import pickle
+    with SharedFrameStore() as store:
+        handle = store.publish(price_df)
+        assert len(pickle.dumps(handle)) < 1000
+        assert handle.nbytes >= price_df[['close']].to_numpy().nbytes
+
+
+def test_attach_from_worker_process(price_df):
+    with SharedFrameStore() as store:
+        handle = store.publish(price_df)
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            sums = list(pool.map(_close_sum, [handle, handle]))
+    assert sums == pytest.approx([price_df['close'].sum()] * 2)
+
+
+def test_resolve_frame_passthrough(price_df):
+    assert resolve_frame(price_df) is price_df
+    assert resolve_frame(None) is None
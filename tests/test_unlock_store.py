@@ -0,0 +1,87 @@
+"""Unit tests for utils/unlock_store.py and the Strategy 3 batch backtest"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.unlock_store import UnlockStore, normalize_unlocks, load_unlocks
+from utils.unlock_data_loader import get_upcoming_unlocks
+from research.backtests.backtest_strategy_3_batch import run_batch, unlock_returns, select_unlocks
+
+
+def test_normalize_aliases_and_derived_columns():
+    dump = pd.DataFrame({'ticker': ['arb', 'OP'], 'date': ['2024-03-16T00:00:00Z', '2024-03-29'],
+                         'category': ['Team', None]})
+    df = normalize_unlocks(dump)
+    assert df['symbol'].tolist() == ['ARB/USDT', 'OP/USDT']
+    assert df['token'].tolist() == ['ARB', 'OP']
+    assert df['recipient_type'].tolist() == ['team', 'unknown']
+    assert df['unlock_date'].tolist() == [pd.Timestamp('2024-03-16'), pd.Timestamp('2024-03-29')]
+    with pytest.raises(ValueError):
+        normalize_unlocks(pd.DataFrame({'date': ['2024-01-01']}))
+
+
+def test_normalize_maps_recipient_labels():
+    labels = ['Investors', 'VC', 'Foundation', 'private_sale', 'Airdrops', 'Core-Contributors', 'marketing']
+    dump = pd.DataFrame({'symbol': ['arb/usdt'] * len(labels), 'date': pd.date_range('2024-01-01', periods=len(labels)),
+                         'recipient': labels})
+    df = normalize_unlocks(dump)
+    assert df['token'].unique().tolist() == ['ARB'] and df['symbol'].unique().tolist() == ['ARB/USDT']
+    assert df['recipient_type'].tolist() == ['investor', 'investor', 'ecosystem', 'investor', 'airdrop',
+                                             'team', 'marketing']
+
+
+def test_store_imports_dumps_and_queries(tmp_path):
+    csv_path = tmp_path / 'a.csv'
+    get_upcoming_unlocks().to_csv(csv_path, index=False)
+    json_path = tmp_path / 'b.json'
+    json_path.write_text(json.dumps({'events': [
+        {'symbol': 'ARB/USDT', 'unlock_date': 1710547200000, 'pct_supply': 87.2, 'recipient_type': 'team'},  # duplicate
+        {'symbol': 'STRK/USDT', 'unlock_date': '2024-04-15', 'pct_supply': 2.5, 'recipient_type': 'investor'},
+    ]}))
+    store = UnlockStore(str(tmp_path / 'unlocks.sqlite'))
+    assert store.import_file(str(csv_path)) == 9
+    assert store.import_file(str(json_path)) == 2
+    assert len(store) == 10
+    assert 'STRK/USDT' in store.symbols()
+
+    arb = store.events(symbols=['ARB/USDT'])
+    assert arb['unlock_date'].tolist() == [pd.Timestamp('2023-03-23'), pd.Timestamp('2024-03-16')]
+    window = store.events(start='2024-03-01', end='2024-04-15')
+    assert set(window['symbol']) == {'ARB/USDT', 'OP/USDT', 'STRK/USDT', 'APT/USDT'}
+    pd.testing.assert_frame_equal(load_unlocks(store.db_path, symbols=['ARB/USDT']), arb)
+
+
+def test_load_unlocks_falls_back_to_builtin_list(tmp_path):
+    events = load_unlocks(str(tmp_path / 'empty.sqlite'))
+    assert len(events) == len(get_upcoming_unlocks())
+
+
+def _write_prices(data_dir, symbol, seed):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range('2022-06-01', periods=900, freq='1D')
+    close = 5 * np.exp(np.cumsum(rng.normal(0, 0.03, len(idx))))
+    pd.DataFrame({'date': idx, 'open': close, 'high': close * 1.02, 'low': close * 0.98,
+                  'close': close, 'volume': 1e6}).to_csv(os.path.join(data_dir, f"{symbol.replace('/', '_')}_1d.csv"),
+                                                         index=False)
+
+
+def test_batch_runner_matches_per_token_and_pools(tmp_path):
+    data_dir = str(tmp_path)
+    for seed, sym in enumerate(['ARB/USDT', 'OP/USDT', 'TIA/USDT']):
+        _write_prices(data_dir, sym, seed)
+    unlocks = get_upcoming_unlocks()
+
+    stats, panel, pooled = run_batch(unlocks, data_dir=data_dir, n_jobs=1)
+    assert set(stats.index) == {'ARB/USDT', 'OP/USDT', 'TIA/USDT'}   # APT/SUI have no data
+    prices = pd.read_csv(os.path.join(data_dir, 'OP_USDT_1d.csv'), parse_dates=['date'], index_col='date')
+    expected = unlock_returns(prices, select_unlocks(unlocks), 'OP/USDT')
+    pd.testing.assert_series_equal(panel['OP/USDT'].dropna(), expected, check_names=False, check_freq=False)
+    assert pooled.iloc[-1] == pytest.approx(panel.iloc[-1].mean())
+
+    _, parallel_panel, parallel_pooled = run_batch(unlocks, data_dir=data_dir, n_jobs=2)
+    pd.testing.assert_frame_equal(parallel_panel, panel)
@@ -0,0 +1,79 @@
+"""Unit tests for strategies/UnlockTrader.py (Strategy 3)"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from strategies.UnlockTrader import UnlockTrader
+
+
+def _reference_signals(trader, price_data, token_symbol, use_trend_filter):
+    """Per-event mask loop generate_signals used to run, for equivalence checks."""
+    base = trader.generate_signals(price_data, token_symbol, use_trend_filter, unlock_dates=[])
+    results = base.copy()
+    if use_trend_filter:
+        import talib
+        close = price_data['close'].values
+        adx = talib.ADX(price_data['high'].values, price_data['low'].values, close, timeperiod=14)
+        sma200 = talib.SMA(close, timeperiod=200)
+        is_bull_trend = pd.Series((adx > 25) & (close > sma200), index=price_data.index).fillna(False)
+        momentum_30d = price_data['close'].pct_change(30).fillna(0)
+        narrative_filter = (momentum_30d > 0.50) | pd.Series(adx > 40, index=price_data.index).fillna(False)
+    for _, row in trader.unlocks[trader.unlocks['symbol'] == token_symbol].iterrows():
+        unlock_date = row['unlock_date']
+        mask = (results.index >= unlock_date - timedelta(days=30)) & (results.index <= unlock_date - timedelta(days=1))
+        if use_trend_filter:
+            mask = mask & ~is_bull_trend & ~narrative_filter
+        results.loc[mask, 'signal'] = -1
+        long_mask = (results.index >= unlock_date + timedelta(days=14)) & (results.index <= unlock_date + timedelta(days=20))
+        results.loc[long_mask, 'signal'] = 1
+        if use_trend_filter:
+            results.loc[long_mask & is_bull_trend, 'size_multiplier'] = 1.5
+    return results
+
+
+def _prices(n=900, seed=0, start='2023-01-01'):
+    rng = np.random.default_rng(seed)
+    close = 10 * np.exp(np.cumsum(rng.normal(0.002, 0.04, n)))
+    idx = pd.date_range(start, periods=n, freq='1D')
+    return pd.DataFrame({'open': close, 'high': close * 1.03, 'low': close * 0.97, 'close': close,
+                         'volume': 1e6}, index=idx)
+
+
+@pytest.fixture
+def unlocks():
+    rng = np.random.default_rng(1)
+    rows = []
+    for sym in ['ARB/USDT', 'OP/USDT', 'SUI/USDT']:
+        # Unsorted and often overlapping (short window of one unlock over the long window of another)
+        for day in rng.integers(-40, 940, 25):
+            rows.append({'symbol': sym, 'unlock_date': pd.Timestamp('2023-01-01') + pd.Timedelta(days=int(day))})
+    rows.append({'symbol': 'ARB/USDT', 'unlock_date': pd.NaT})
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize('use_trend_filter', [False, True])
+def test_signals_match_per_event_loop(unlocks, use_trend_filter):
+    trader = UnlockTrader(unlocks)
+    for seed, sym in enumerate(['ARB/USDT', 'OP/USDT', 'SUI/USDT', 'TIA/USDT']):
+        prices = _prices(seed=seed)
+        got = trader.generate_signals(prices, sym, use_trend_filter=use_trend_filter)
+        expected = _reference_signals(trader, prices, sym, use_trend_filter)
+        pd.testing.assert_frame_equal(got, expected)
+    assert (got['signal'] == 0).all()   # no TIA unlocks
+
+
+def test_irregular_bars_and_panel_mode(unlocks):
+    trader = UnlockTrader(unlocks)
+    full = _prices(n=1000)
+    keep = np.sort(np.random.default_rng(2).choice(len(full), 600, replace=False))
+    prices = full.iloc[keep]   # irregular bars with gaps
+    panel = {'ARB/USDT': prices, 'OP/USDT': _prices(seed=3)}
+    out = trader.generate_signals_panel(panel, use_trend_filter=True)
+    assert set(out) == set(panel)
+    for sym, frame in panel.items():
+        pd.testing.assert_frame_equal(out[sym], _reference_signals(trader, frame, sym, True))
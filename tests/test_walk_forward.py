@@ -96,3 +96,24 @@ def test_walk_forward_sum_scoring():
     # Sum should be much smaller than compound for many small returns
     compound_return = (results["pnl"] + 1).prod() - 1
     assert total_return < compound_return
+
+
+def test_walk_forward_parallel_matches_serial():
+    """n_jobs > 1 evaluates windows over shared-memory price data with identical results."""
+    price_df = _make_price_df(400)
+    kwargs = dict(train_window_days=60, test_window_days=30, score_mode="compound")
+    serial = WalkForwardAnalyzer(_dca_strategy, {"x": [1, 2]}, price_df, **kwargs).run()
+    parallel = WalkForwardAnalyzer(_dca_strategy, {"x": [1, 2]}, price_df, n_jobs=2, **kwargs).run()
+    pd.testing.assert_frame_equal(serial.reset_index(drop=True), parallel.reset_index(drop=True))
+
+
+def test_walk_forward_risk_overlay_applied_to_test_trades():
+    """risk_overlay rewrites each test window's ledger (20% position cap -> pnl scaled by 0.2)."""
+    from utils.risk_overlay import RiskOverlay
+    price_df = _make_price_df(400)
+    kwargs = dict(train_window_days=60, test_window_days=30, score_mode="compound")
+    plain = WalkForwardAnalyzer(_dca_strategy, {"x": [1]}, price_df, **kwargs).run()
+    capped = WalkForwardAnalyzer(_dca_strategy, {"x": [1]}, price_df, risk_overlay=RiskOverlay(), **kwargs).run()
+    assert len(capped) == len(plain)
+    np.testing.assert_allclose(capped["pnl"].to_numpy(), plain["pnl"].to_numpy() * 0.2)
+    assert (capped["pnl_raw"] == plain["pnl"].to_numpy()).all()
@@ -0,0 +1,102 @@
+"""Unit tests for utils/whale_snapshot.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.whale_snapshot import WhaleScoreSnapshotter, HISTORY_FILENAME
+
+
+class FakeTracker:
+    def __init__(self, cache_dir, responses):
+        self.cache_dir = cache_dir
+        self.api_key = 'test'
+        self.responses = list(responses)
+        self.calls = []
+
+    def get_accumulation_scores(self, symbols=None, threshold=0.5):
+        self.calls.append(list(symbols))
+        scores = self.responses.pop(0) if self.responses else {}
+        return {sym: {'score': s, 'net_flow_24h_usd': s * 1e5, 'net_flow_7d_usd': 0.0, 'market_cap_usd': None}
+                for sym, s in scores.items()}
+
+
+class Clock:
+    def __init__(self, t):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+T0 = pd.Timestamp('2024-01-01', tz='UTC').timestamp()
+
+
+def test_one_request_serves_every_pair_until_due(tmp_path):
+    tracker = FakeTracker(str(tmp_path), [{'BTC': 1.0, 'ETH': 0.2}, {'BTC': 0.1}])
+    clock = Clock(T0)
+    snap = WhaleScoreSnapshotter(tracker, interval_sec=3600, symbols=['BTC', 'ETH', 'SOL'], clock=clock)
+    assert snap.score('BTC') == 1.0
+    assert snap.score('ETH') == 0.2
+    assert np.isnan(snap.score('SOL'))          # unscored, not a 0 score
+    assert tracker.calls == [['BTC', 'ETH', 'SOL']]
+
+    clock.t += 3600
+    assert np.isnan(snap.score('ETH'))
+    assert snap.score('BTC') == 0.1
+    assert len(tracker.calls) == 2
+
+
+def test_failed_fetch_keeps_previous_scores(tmp_path):
+    tracker = FakeTracker(str(tmp_path), [{'BTC': 1.0}, {}])
+    clock = Clock(T0)
+    snap = WhaleScoreSnapshotter(tracker, interval_sec=60, symbols=['BTC'], clock=clock)
+    assert snap.score('BTC') == 1.0
+    clock.t += 60
+    assert snap.score('BTC') == 1.0
+    assert len(pd.read_csv(tmp_path / HISTORY_FILENAME)) == 1
+
+
+def test_restart_reuses_fresh_snapshot(tmp_path):
+    clock = Clock(T0)
+    WhaleScoreSnapshotter(FakeTracker(str(tmp_path), [{'BTC': 0.7}]), symbols=['BTC'], clock=clock).refresh()
+    clock.t += 600
+    tracker = FakeTracker(str(tmp_path), [{'BTC': 0.1}])
+    snap = WhaleScoreSnapshotter(tracker, interval_sec=3600, symbols=['BTC'], clock=clock)
+    assert snap.score('BTC') == pytest.approx(0.7)
+    assert tracker.calls == []
+
+
+def test_score_series_is_as_of_history(tmp_path):
+    clock = Clock(T0)
+    tracker = FakeTracker(str(tmp_path), [{'BTC': 1.0}, {'BTC': 0.3}])
+    snap = WhaleScoreSnapshotter(tracker, interval_sec=86400, symbols=['BTC', 'ETH'], clock=clock)
+    snap.refresh()
+    clock.t += 2 * 86400
+    snap.refresh()
+
+    dates = pd.date_range('2023-12-31', periods=5, freq='1D')   # naive -> UTC
+    series = snap.score_series('BTC', dates)
+    assert np.isnan(series.iloc[0])
+    assert series.iloc[1:].tolist() == [1.0, 1.0, 0.3, 0.3]
+    assert snap.score_series('ETH', dates).isna().all()   # never scored
+    assert snap.score_series('DOGE', dates).isna().all()
+
+
+def test_live_candle_score_or_synthetic(tmp_path):
+    clock = Clock(T0)
+    tracker = FakeTracker(str(tmp_path), [{'BTC': 0.8, 'ETH': 0.6}, {'BTC': 0.9}])
+    snap = WhaleScoreSnapshotter(tracker, interval_sec=86400, symbols=['BTC', 'ETH'], clock=clock)
+    snap.refresh()
+    clock.t += 86400
+    snap.refresh()                               # ETH absent from the second snapshot
+
+    dates = pd.date_range('2023-12-31', periods=3, freq='1D', tz='UTC')
+    synthetic = pd.Series([1.0, 0.0, 1.0])
+    scores = snap.accumulation_scores('ETH', dates, synthetic)
+    assert scores.tolist() == [1.0, 0.6, 1.0]    # before history, scored, unscored -> synthetic
+    assert snap.accumulation_scores('BTC', dates, synthetic, live_score=snap.score('BTC')).tolist() == [1.0, 0.8, 0.9]
+    assert snap.accumulation_scores('BTC', dates, synthetic, live_score=0.0).tolist() == [1.0, 0.8, 1.0]
+    assert snap.accumulation_scores('ETH', dates, synthetic, live_score=snap.score('ETH')).tolist() == [1.0, 0.6, 1.0]
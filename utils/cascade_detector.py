@@ -2,17 +2,37 @@
 Cascade detection for S2 Signal Amplifier (Phase 2B.5).
 Detects liquidation cascade conditions: RSI < 30 + volume spike + optional funding flip.
 Used by FundingReversion to double conviction when cascade fires on BTC.
+detect_cascade is the batch path; CascadeDetector updates per candle for live callbacks;
+detect_cascade_panel scans a whole universe (timestamp x symbol matrices) at once.
 """
+import os
+import pickle
+import hashlib
+import logging
+from collections import deque
+from typing import Optional
+
 import pandas as pd
 import numpy as np
+from scipy.signal import lfilter
+
+try:
+    from utils.indicator_engine import timestamps_ns
+except ImportError:
+    from indicator_engine import timestamps_ns
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CASCADE_CACHE_DIR = os.environ.get('CASCADE_CACHE_DIR', 'data/cascades')
 
 
 def detect_cascade(ohlcv_df: pd.DataFrame, funding_df: pd.DataFrame = None,
                    rsi_period: int = 14, vol_sma_period: int = 24,
-                   vol_spike_mult: float = 1.5) -> pd.Series:
+                   vol_spike_mult: float = 1.5, indicators=None) -> pd.Series:
     """
     Detect cascade conditions: RSI < 30 + volume spike + (optional) funding flip.
     Returns boolean Series aligned with ohlcv_df index.
+    indicators: IndicatorFrame over ohlcv_df; RSI and volume SMA then come from the shared cache.
     """
     try:
         import talib
@@ -25,10 +45,16 @@ def detect_cascade(ohlcv_df: pd.DataFrame, funding_df: pd.DataFrame = None,
         rsi = 100 - (100 / (1 + rs))
         rsi = rsi.fillna(50)
     else:
-        rsi = talib.RSI(ohlcv_df['close'], timeperiod=rsi_period)
+        if indicators is not None:
+            rsi = indicators.get('rsi', timeperiod=rsi_period)
+        else:
+            rsi = talib.RSI(ohlcv_df['close'], timeperiod=rsi_period)
         rsi = pd.Series(rsi, index=ohlcv_df.index).fillna(50)
 
-    vol_sma = ohlcv_df['volume'].rolling(vol_sma_period).mean()
+    if indicators is not None:
+        vol_sma = pd.Series(indicators.get('sma', timeperiod=vol_sma_period, column='volume'), index=ohlcv_df.index)
+    else:
+        vol_sma = ohlcv_df['volume'].rolling(vol_sma_period).mean()
     vol_spike = ohlcv_df['volume'] > (vol_spike_mult * vol_sma)
 
     oversold = rsi < 30
@@ -60,3 +86,291 @@ def cascade_fires_now(df: pd.DataFrame, funding_df: pd.DataFrame = None) -> bool
         return False
     series = detect_cascade(df, funding_df)
     return bool(series.iloc[-1]) if len(series) > 0 else False
+
+
+class _PairState:
+    __slots__ = ('n', 'prev_close', 'avg_gain', 'avg_loss', 'rsi', 'volumes', 'prev_funding',
+                 'last_ts', 'fires')
+
+    def __init__(self, vol_sma_period: int):
+        self.n = 0
+        self.prev_close = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.rsi = np.nan
+        self.volumes = deque(maxlen=vol_sma_period)
+        self.prev_funding = np.nan
+        self.last_ts = None
+        self.fires = False
+
+
+class CascadeDetector:
+    """
+    Streaming detect_cascade for many pairs. Per pair it keeps Wilder RSI state (TA-Lib
+    recursion), the last vol_sma_period volumes and the previous funding rate, so each new
+    candle is O(1) and fires_now(pair) is a lookup. Values match detect_cascade on the same
+    history; fires_now stays False until min_bars candles were seen (as cascade_fires_now).
+    """
+
+    def __init__(self, rsi_period: int = 14, vol_sma_period: int = 24, vol_spike_mult: float = 1.5,
+                 min_bars: int = 50):
+        self.rsi_period = rsi_period
+        self.vol_sma_period = vol_sma_period
+        self.vol_spike_mult = vol_spike_mult
+        self.min_bars = min_bars
+        self._pairs = {}
+
+    def _state(self, pair) -> _PairState:
+        state = self._pairs.get(pair)
+        if state is None:
+            state = self._pairs[pair] = _PairState(self.vol_sma_period)
+        return state
+
+    def _update_rsi(self, state: _PairState, close: float) -> float:
+        n, period = state.n, self.rsi_period
+        if n == 0:
+            return np.nan
+        delta = close - state.prev_close
+        gain, loss = (delta, 0.0) if delta > 0 else (0.0, -delta)
+        if n <= period:
+            state.avg_gain += gain
+            state.avg_loss += loss
+            if n < period:
+                return np.nan
+            state.avg_gain /= period
+            state.avg_loss /= period
+        else:
+            state.avg_gain = (state.avg_gain * (period - 1) + gain) / period
+            state.avg_loss = (state.avg_loss * (period - 1) + loss) / period
+        total = state.avg_gain + state.avg_loss
+        return 100.0 * state.avg_gain / total if not -1e-8 < total < 1e-8 else 0.0
+
+    def update(self, pair, close: float, volume: float, funding: Optional[float] = None, ts=None) -> bool:
+        """
+        Consume one closed candle for pair. funding=None skips the funding-flip condition
+        (detect_cascade without funding_df); NaN funding carries the previous rate forward.
+        Returns whether the cascade condition holds on this candle.
+        """
+        state = self._state(pair)
+        close, volume = float(close), float(volume)
+        rsi = self._update_rsi(state, close)
+        state.rsi = rsi
+        state.volumes.append(volume)
+        state.prev_close = close
+        state.n += 1
+        state.last_ts = ts
+
+        fires = (not np.isnan(rsi) and rsi < 30
+                 and len(state.volumes) == self.vol_sma_period
+                 and volume > self.vol_spike_mult * (sum(state.volumes) / self.vol_sma_period))
+        if funding is not None:
+            funding = float(funding)
+            if np.isnan(funding):
+                funding = state.prev_funding
+            fires = fires and state.prev_funding > 0 and funding <= 0
+            state.prev_funding = funding
+        state.fires = bool(fires)
+        return state.fires
+
+    def sync(self, pair, dataframe: pd.DataFrame, funding_col: Optional[str] = None) -> bool:
+        """
+        Feed the candles of dataframe (Freqtrade 'date' column, else the index) newer than the
+        last one seen for pair; a frame that does not continue the stream rebuilds the state.
+        Columns are read in place, no frame copy.
+        """
+        if dataframe is None or len(dataframe) == 0:
+            return False
+        dates = dataframe['date'] if 'date' in dataframe.columns else dataframe.index
+        ts = timestamps_ns(dates)
+        state = self._pairs.get(pair)
+        start = 0
+        if state is not None and state.last_ts is not None:
+            start = int(np.searchsorted(ts, state.last_ts, side='right'))
+            if start == 0 or ts[start - 1] != state.last_ts:
+                self._pairs.pop(pair)
+                start = 0
+        if start >= len(ts):
+            return self.fires_now(pair)
+        closes = dataframe['close'].to_numpy(dtype=np.float64)[start:].tolist()
+        volumes = dataframe['volume'].to_numpy(dtype=np.float64)[start:].tolist()
+        fundings = (dataframe[funding_col].to_numpy(dtype=np.float64)[start:].tolist()
+                    if funding_col else [None] * len(closes))
+        for t, c, v, f in zip(ts[start:].tolist(), closes, volumes, fundings):
+            self.update(pair, c, v, f, ts=t)
+        return self.fires_now(pair)
+
+    def fires_now(self, pair) -> bool:
+        """Cascade condition on the last candle seen for pair."""
+        state = self._pairs.get(pair)
+        return state is not None and state.n >= self.min_bars and state.fires
+
+    def rsi(self, pair) -> float:
+        state = self._pairs.get(pair)
+        return np.nan if state is None else state.rsi
+
+
+def _wilder_rsi_panel(close: np.ndarray, period: int) -> np.ndarray:
+    """
+    TA-Lib RSI for every column of a (T, N) close matrix. Columns may start late (leading
+    NaNs): they are left-aligned so every Wilder recursion runs in one lfilter call.
+    """
+    T, N = close.shape
+    valid = ~np.isnan(close)
+    start = np.where(valid.any(axis=0), valid.argmax(axis=0), T)
+    rows = np.arange(T)[:, None] + start[None, :]
+    inside = rows < T
+    cols = np.broadcast_to(np.arange(N), (T, N))
+    aligned = np.where(inside, close[np.minimum(rows, T - 1), cols], np.nan)
+
+    out = np.full((T, N), np.nan)
+    if T <= period:
+        return out
+    delta = np.diff(aligned, axis=0)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    gain[np.isnan(delta)] = np.nan
+    loss[np.isnan(delta)] = np.nan
+
+    decay = (period - 1) / period
+    avg = []
+    for x in (gain, loss):
+        seed = x[:period].mean(axis=0)
+        tail = lfilter([1.0 / period], [1.0, -decay], x[period:], axis=0, zi=(decay * seed)[None, :])[0]
+        avg.append(np.vstack([seed[None, :], tail]))
+    avg_gain, avg_loss = avg
+    total = avg_gain + avg_loss
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(np.abs(total) < 1e-8, 0.0, 100.0 * avg_gain / total)
+    rsi[np.isnan(total)] = np.nan
+
+    aligned_rsi = np.full((T, N), np.nan)
+    aligned_rsi[period:] = rsi
+    out[rows[inside], cols[inside]] = aligned_rsi[inside]
+    return out
+
+
+def detect_cascade_panel(close: pd.DataFrame, volume: pd.DataFrame, funding: pd.DataFrame = None,
+                         rsi_period: int = 14, vol_sma_period: int = 24,
+                         vol_spike_mult: float = 1.5) -> pd.DataFrame:
+    """
+    detect_cascade for a universe in one pass. close / volume (and optional funding, already
+    aligned to the same index) are timestamp x symbol matrices; symbols may list late.
+    Gaps inside a close column are forward-filled. Returns a boolean matrix of the same shape;
+    each column equals detect_cascade on that symbol's own rows.
+    """
+    volume = volume.reindex(index=close.index, columns=close.columns)
+    close_values = close.ffill().where(close.notna().cummax()).to_numpy(dtype=np.float64)
+    rsi = _wilder_rsi_panel(close_values, rsi_period)
+    oversold = np.nan_to_num(rsi, nan=50.0) < 30
+
+    vol_sma = volume.rolling(vol_sma_period).mean().to_numpy(dtype=np.float64)
+    vol = volume.to_numpy(dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        fires = oversold & (vol > vol_spike_mult * vol_sma)
+
+    if funding is not None:
+        rate = funding.reindex(index=close.index, columns=close.columns).ffill().to_numpy(dtype=np.float64)
+        prev = np.vstack([np.full((1, rate.shape[1]), np.nan), rate[:-1]])
+        with np.errstate(invalid='ignore'):
+            fires &= (prev > 0) & (rate <= 0)
+    return pd.DataFrame(fires, index=close.index, columns=close.columns)
+
+
+class CascadePanelCache:
+    """
+    On-disk cache of cascade matrices keyed by the input data hash and the parameter set.
+    Files are written atomically, so backtests running in parallel can share the directory.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or DEFAULT_CASCADE_CACHE_DIR
+
+    @staticmethod
+    def key(close: pd.DataFrame, volume: pd.DataFrame, funding: pd.DataFrame = None, **params) -> str:
+        h = hashlib.sha1()
+        for frame in (close, volume, funding):
+            if frame is None:
+                h.update(b'none')
+                continue
+            h.update(np.ascontiguousarray(frame.to_numpy(dtype=np.float64)).tobytes())
+            h.update("|".join(map(str, frame.columns)).encode())
+            if len(frame):
+                h.update(f"{frame.index[0]}|{frame.index[-1]}|{len(frame)}".encode())
+        h.update(repr(sorted(params.items())).encode())
+        return h.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"cascade_{key}.pkl")
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cascade cache {path}: {e}")
+            return None
+
+    def put(self, key: str, panel: pd.DataFrame) -> str:
+        path = self.path(key)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(panel, f)
+        os.replace(tmp_path, path)
+        return path
+
+
+def cascade_panel_cached(close: pd.DataFrame, volume: pd.DataFrame, funding: pd.DataFrame = None,
+                         cache: Optional[CascadePanelCache] = None, rsi_period: int = 14,
+                         vol_sma_period: int = 24, vol_spike_mult: float = 1.5) -> pd.DataFrame:
+    """detect_cascade_panel through the on-disk cache (computed once per data + parameter set)."""
+    cache = cache or CascadePanelCache()
+    params = dict(rsi_period=rsi_period, vol_sma_period=vol_sma_period, vol_spike_mult=vol_spike_mult)
+    key = cache.key(close, volume, funding, **params)
+    panel = cache.get(key)
+    if panel is None:
+        panel = detect_cascade_panel(close, volume, funding, **params)
+        cache.put(key, panel)
+    return panel
+
+
+def load_cascade_panel(symbols: list, timeframe: str = '1h', data_dir: str = 'data/ohlcv',
+                       cache: Optional[CascadePanelCache] = None, **params) -> pd.DataFrame:
+    """Cascade matrix for symbols from the local OHLCV store ({data_dir}/BASE_QUOTE_{timeframe}.csv)."""
+    try:
+        from utils.data_loader import load_ohlcv
+    except ImportError:
+        from data_loader import load_ohlcv
+    frames = {s: load_ohlcv(os.path.join(data_dir, f"{s.replace('/', '_')}_{timeframe}.csv")) for s in symbols}
+    close = pd.DataFrame({s: f['close'] for s, f in frames.items()}).sort_index()
+    volume = pd.DataFrame({s: f['volume'] for s, f in frames.items()}).reindex(close.index)
+    return cascade_panel_cached(close, volume, cache=cache, **params)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Scan the local OHLCV store for liquidation cascades")
+    parser.add_argument("--symbols", default="BTC/USDT,ETH/USDT,SOL/USDT")
+    parser.add_argument("--timeframe", default="1h")
+    parser.add_argument("--data-dir", default="data/ohlcv")
+    parser.add_argument("--cache-dir", default=DEFAULT_CASCADE_CACHE_DIR)
+    parser.add_argument("--last", type=int, default=10, help="Print the N most recent cascade candles")
+    args = parser.parse_args()
+
+    symbols = [s.strip() for s in args.symbols.split(',') if s.strip()]
+    panel = load_cascade_panel(symbols, args.timeframe, args.data_dir, cache=CascadePanelCache(args.cache_dir))
+    print(f"Cascades per symbol ({panel.index[0]} -> {panel.index[-1]}):")
+    print(panel.sum().to_string())
+    hits = panel.stack()
+    hits = hits[hits]
+    if len(hits):
+        print(f"\nLast {args.last} cascade candles:")
+        for ts, symbol in hits.index[-args.last:]:
+            print(f"  {ts}  {symbol}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,14 +19,45 @@ except ImportError:
     except ImportError:
         print("Warning: dns_patch not found. Connection might fail if DNS issues persist.")
 
+try:
+    from utils.ohlcv_integrity import (build_integrity_index, dedupe_ohlcv, repair_ohlcv,
+                                       update_catalog, is_clean, ohlcv_rows_to_frame)
+except ImportError:
+    from ohlcv_integrity import (build_integrity_index, dedupe_ohlcv, repair_ohlcv,
+                                 update_catalog, is_clean, ohlcv_rows_to_frame)
+
+
+def _binance_futures():
+    return ccxt.binance({
+        'enableRateLimit': True,
+        'options': {'defaultType': 'future'} # Use futures data
+    })
+
+
+def fetch_ohlcv_range(exchange, symbol, timeframe, start_ms, end_ms, limit=1000):
+    """Fetch candles with open time in [start_ms, end_ms] only (used to fill gaps)."""
+    rows = []
+    since_ts = start_ms
+    while since_ts <= end_ms:
+        try:
+            ohlcv = exchange.fetch_ohlcv(symbol, timeframe, since=since_ts, limit=limit)
+        except Exception as e:
+            print(f"Error fetching range {start_ms}..{end_ms}: {e}")
+            break
+        if not ohlcv:
+            break
+        rows.extend(r for r in ohlcv if r[0] <= end_ms)
+        if ohlcv[-1][0] >= end_ms:
+            break
+        since_ts = ohlcv[-1][0] + 1
+        time.sleep(exchange.rateLimit / 1000)
+    return rows
+
 def fetch_ohlcv(symbol, timeframe='1d', since='2020-01-01', limit=1000):
     """
     Fetch OHLCV data from Binance and save to CSV.
     """
-    exchange = ccxt.binance({
-        'enableRateLimit': True,
-        'options': {'defaultType': 'future'} # Use futures data
-    })
+    exchange = _binance_futures()
 
     # Convert since to timestamp
     since_ts = exchange.parse8601(f"{since}T00:00:00Z")
@@ -58,19 +89,54 @@ def fetch_ohlcv(symbol, timeframe='1d', since='2020-01-01', limit=1000):
         print("No data fetched.")
         return None
 
-    # Convert to DataFrame
-    df = pd.DataFrame(all_ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-    df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
-    df.set_index('datetime', inplace=True)
+    # Convert to DataFrame (overlapping pages can repeat candles)
+    df = dedupe_ohlcv(ohlcv_rows_to_frame(all_ohlcv))
+
+    # Integrity pass: refill holes left by failed pages, record index in catalog
+    df, index = repair_ohlcv(
+        df, timeframe,
+        fetch_range=lambda start, end: fetch_ohlcv_range(exchange, symbol, timeframe, start, end, limit),
+    )
     
     # Save to CSV
     safe_symbol = symbol.replace('/', '_').replace(':', '_')
     filename = f"data/ohlcv/{safe_symbol}_{timeframe}.csv"
     os.makedirs(os.path.dirname(filename), exist_ok=True)
     df.to_csv(filename)
+    update_catalog(filename, index)
     print(f"✅ Saved {len(df)} rows to {filename}")
+    if not is_clean(index):
+        print(f"⚠️ {filename}: {len(index['gaps'])} gaps ({index['missing_bars']} bars) remain after repair")
     return df
 
+
+def repair_ohlcv_file(symbol, timeframe='1d', path=None, limit=1000):
+    """
+    Check a saved OHLCV CSV and fix it in place: dedupe, then re-fetch only the missing
+    ranges (never the whole history). Updates the catalog entry. Returns the integrity index.
+    """
+    safe_symbol = symbol.replace('/', '_').replace(':', '_')
+    path = path or f"data/ohlcv/{safe_symbol}_{timeframe}.csv"
+    df = pd.read_csv(path, parse_dates=['datetime'], index_col='datetime')
+    index = build_integrity_index(df, timeframe)
+    if is_clean(index):
+        update_catalog(path, index)
+        print(f"✅ {path}: clean ({index['rows']} rows)")
+        return index
+
+    print(f"Repairing {path}: {index['duplicates']} duplicates, {len(index['gaps'])} gaps "
+          f"({index['missing_bars']} bars)")
+    exchange = _binance_futures()
+    df, index = repair_ohlcv(
+        df, timeframe,
+        fetch_range=lambda start, end: fetch_ohlcv_range(exchange, symbol, timeframe, start, end, limit),
+        index=index,
+    )
+    df.to_csv(path)
+    update_catalog(path, index)
+    print(f"✅ Saved {len(df)} rows to {path} ({index['missing_bars']} bars still missing)")
+    return index
+
 def fetch_funding_history(symbol, days=730):
     """
     Fetch historical funding rates from Binance Futures.
@@ -1,64 +1,259 @@
-import dns.resolver
+try:
+    import dns.resolver
+except ImportError:  # dnspython; apply_patch() raises so callers keep system DNS
+    dns = None
 import socket
+import time
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
-# Cache for DNS lookups to avoid spamming the resolver
-_dns_cache = {}
+# Domains resolved through Cloudflare DNS; everything else uses system DNS
+TARGET_DOMAINS = {
+    'api.binance.com',
+    'fapi.binance.com',
+    'dapi.binance.com',
+    'api1.binance.com',
+    'api2.binance.com',
+    'api3.binance.com',
+    'fstream.binance.com',
+    'data-api.binance.vision',
+}
+NAMESERVERS = ['1.1.1.1', '1.0.0.1']
 
-# Store original getaddrinfo before patching
+# Store originals before patching
 _original_getaddrinfo = socket.getaddrinfo
+_original_create_connection = socket.create_connection
+
+
+def resolve_cloudflare(host):
+    """All A records for host from 1.1.1.1 -> (ips, ttl seconds)."""
+    resolver = dns.resolver.Resolver()
+    resolver.nameservers = NAMESERVERS
+    answers = resolver.resolve(host, 'A')
+    return [rdata.address for rdata in answers], answers.rrset.ttl
+
+
+class _Entry:
+    __slots__ = ('ips', 'ttl', 'fetched_at', 'expires_at', 'cursor', 'failures')
+
+    def __init__(self, ips, ttl, now):
+        self.ips = list(ips)
+        self.ttl = ttl
+        self.fetched_at = now
+        self.expires_at = now + ttl
+        self.cursor = 0
+        self.failures = {}
+
+
+class DNSCache:
+    """
+    Resolver cache that keeps every returned IP for the record's TTL (clamped to
+    [min_ttl, max_ttl]). Lookups rotate the IP order (round-robin) and put IPs reported as
+    failing (report_failure, fed by secure_create_connection) last until they connect again,
+    so connection code that walks the getaddrinfo list fails over to the next address.
+    Past refresh_ahead x TTL an entry is re-resolved in a background thread while the cached
+    IPs keep being served. One thread per host resolves at a time: once an entry expires the
+    others serve the expired IPs (or, with none cached, wait up to lookup_wait seconds for
+    that lookup). If re-resolving fails, expired IPs are served for up to stale_ttl seconds
+    before falling back to system DNS.
+    """
+
+    def __init__(self, resolve=None, min_ttl=30, max_ttl=3600, refresh_ahead=0.8, stale_ttl=600,
+                 lookup_wait=10.0, clock=time.monotonic):
+        self.resolve = resolve or resolve_cloudflare
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.refresh_ahead = refresh_ahead
+        self.stale_ttl = stale_ttl
+        self.lookup_wait = lookup_wait
+        self.clock = clock
+        self._entries = {}
+        self._inflight = {}   # host -> Event set when its running lookup finishes
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stale': 0, 'refreshes': 0, 'errors': 0,
+                       'fallbacks': 0, 'lookups_ms': 0.0, 'lookup_count': 0, 'max_lookup_ms': 0.0}
+
+    def _lookup(self, host):
+        """Resolve host now; returns the new entry or None (stats updated either way)."""
+        started = time.perf_counter()
+        try:
+            ips, ttl = self.resolve(host)
+            if not ips:
+                raise ValueError("no A records")
+        except Exception as e:
+            with self._lock:
+                self._stats['errors'] += 1
+            logger.warning(f"Secure DNS failed for {host}: {e}")
+            return None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        entry = _Entry(ips, min(max(float(ttl), self.min_ttl), self.max_ttl), self.clock())
+        with self._lock:
+            previous = self._entries.get(host)
+            if previous is not None:
+                # Keep failure marks for IPs that are still published
+                entry.failures = {ip: n for ip, n in previous.failures.items() if ip in entry.ips}
+            self._entries[host] = entry
+            self._stats['lookups_ms'] += elapsed_ms
+            self._stats['lookup_count'] += 1
+            self._stats['max_lookup_ms'] = max(self._stats['max_lookup_ms'], elapsed_ms)
+        logger.debug(f"Secure DNS: {host} -> {entry.ips} (ttl {entry.ttl:.0f}s, {elapsed_ms:.1f}ms)")
+        return entry
+
+    def _resolve_once(self, host, done):
+        """Run the lookup this thread owns for host, then let waiting threads through."""
+        try:
+            return self._lookup(host)
+        finally:
+            with self._lock:
+                self._inflight.pop(host, None)
+            done.set()
+
+    def _ordered(self, entry):
+        """Rotate the IP list one step per lookup; IPs with reported failures go last."""
+        n = len(entry.ips)
+        start = entry.cursor % n
+        entry.cursor += 1
+        rotated = entry.ips[start:] + entry.ips[:start]
+        return sorted(rotated, key=lambda ip: entry.failures.get(ip, 0))
+
+    def addresses(self, host):
+        """IPs for host in connection order, or None to use system DNS."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(host)
+            pending = self._inflight.get(host)
+            if entry is not None and now < entry.expires_at:
+                self._stats['hits'] += 1
+                if pending is None and now >= entry.fetched_at + self.refresh_ahead * entry.ttl:
+                    self._inflight[host] = done = threading.Event()
+                    self._stats['refreshes'] += 1
+                    threading.Thread(target=self._resolve_once, args=(host, done), daemon=True).start()
+                return self._ordered(entry)
+            self._stats['misses'] += 1
+            usable = entry is not None and now < entry.expires_at + self.stale_ttl
+            if pending is not None and usable:
+                # Another thread is re-resolving: serve the expired IPs meanwhile
+                self._stats['stale'] += 1
+                return self._ordered(entry)
+            if pending is None:
+                self._inflight[host] = done = threading.Event()
+
+        if pending is None:
+            fresh = self._resolve_once(host, done)
+        else:
+            pending.wait(self.lookup_wait)
+            fresh = None
+        with self._lock:
+            if fresh is None and pending is not None:
+                current = self._entries.get(host)
+                if current is not None and self.clock() < current.expires_at:
+                    fresh = current
+            if fresh is not None:
+                return self._ordered(fresh)
+            if usable:
+                self._stats['stale'] += 1
+                return self._ordered(entry)
+            self._stats['fallbacks'] += 1
+        return None
+
+    def report_failure(self, host, ip):
+        """Mark ip as failing for host; it is tried last until it connects again or is no longer published."""
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is not None and ip in entry.ips:
+                entry.failures[ip] = entry.failures.get(ip, 0) + 1
+
+    def report_success(self, host, ip):
+        """Clear ip's failure mark after a successful connect."""
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is not None:
+                entry.failures.pop(ip, None)
+
+    def invalidate(self, host=None):
+        with self._lock:
+            if host is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(host, None)
+
+    def stats(self):
+        """Counters plus average/max resolver latency in ms."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = {host: {'ips': list(e.ips), 'ttl': e.ttl, 'failures': dict(e.failures)}
+                                for host, e in self._entries.items()}
+        count = stats.pop('lookup_count')
+        total = stats.pop('lookups_ms')
+        stats['lookups'] = count
+        stats['avg_lookup_ms'] = total / count if count else 0.0
+        return stats
+
+
+_dns_cache = DNSCache()
+
 
 def secure_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
     """
     Custom getaddrinfo that resolves specific domains using Cloudflare 1.1.1.1 DNS.
+    Returns one address per cached IP (round-robin order) so callers can fail over.
     Everything else falls back to system DNS.
     """
-    
-    # List of domains to force DNS resolution for
-    TARGET_DOMAINS = [
-        'api.binance.com',
-        'fapi.binance.com',
-        'dapi.binance.com',
-        'api1.binance.com',
-        'api2.binance.com',
-        'api3.binance.com',
-        'data-api.binance.vision'
-    ]
-
-    # Check if host matches any target domain
     if host in TARGET_DOMAINS:
-        if host in _dns_cache:
-            ip = _dns_cache[host]
-            # logger.info(f"Using cached IP {ip} for {host}")
-        else:
-            try:
-                # Create a resolver that uses Cloudflare
-                resolver = dns.resolver.Resolver()
-                resolver.nameservers = ['1.1.1.1', '1.0.0.1']
-                
-                # Resolve A record (IPv4)
-                answers = resolver.resolve(host, 'A')
-                
-                # Pick the first IP
-                ip = answers[0].address
-                _dns_cache[host] = ip
-                print(f"🔒 Secure DNS (1.1.1.1): Resolved {host} -> {ip}")
-            except Exception as e:
-                print(f"⚠️ Secure DNS failed for {host}: {e}. Falling back to system DNS.")
-                return _original_getaddrinfo(host, port, family, type, proto, flags)
-        
-        # Call original getaddrinfo with the IP address instead of hostname
-        # This bypasses system DNS
-        return _original_getaddrinfo(ip, port, family, type, proto, flags)
+        ips = _dns_cache.addresses(host)
+        if ips:
+            results = []
+            for ip in ips:
+                try:
+                    # Call original getaddrinfo with the IP address instead of hostname
+                    results.extend(_original_getaddrinfo(ip, port, family, type, proto, flags))
+                except socket.gaierror:
+                    continue  # e.g. IPv4 address with family=AF_INET6
+            if results:
+                return results
+        return _original_getaddrinfo(host, port, family, type, proto, flags)
 
     # For all other hosts, use default system behavior
     return _original_getaddrinfo(host, port, family, type, proto, flags)
 
+
+def secure_create_connection(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None, **kwargs):
+    """
+    socket.create_connection for TARGET_DOMAINS: connects to the cached IPs in order and
+    reports each one that fails (and each success) to the cache, so later lookups try a dead
+    IP last instead of timing out on it first. Other hosts are untouched. Clients that open
+    sockets themselves (urllib3, asyncio) still walk the getaddrinfo order but do not report.
+    """
+    host, port = address[0], address[1]
+    ips = _dns_cache.addresses(host) if host in TARGET_DOMAINS else None
+    if not ips:
+        return _original_create_connection(address, timeout, source_address, **kwargs)
+    error = None
+    for ip in ips:
+        try:
+            sock = _original_create_connection((ip, port), timeout, source_address, **kwargs)
+        except OSError as e:
+            _dns_cache.report_failure(host, ip)
+            logger.warning(f"Connect to {host} via {ip} failed: {e}")
+            error = e
+            continue
+        _dns_cache.report_success(host, ip)
+        return sock
+    raise error
+
+
+def get_stats():
+    return _dns_cache.stats()
+
+
 def apply_patch():
     """Apply the socket monkey patch"""
+    if dns is None:
+        raise ImportError("dnspython is required for the secure DNS patch")
     socket.getaddrinfo = secure_getaddrinfo
+    socket.create_connection = secure_create_connection
     print("✅ DNS Patch applied: Binance API calls will use 1.1.1.1")
 
 if __name__ == "__main__":
@@ -67,6 +262,7 @@ if __name__ == "__main__":
     try:
         # Simulate a request
         addr = socket.getaddrinfo("api.binance.com", 443)
-        print(f"Result: {addr[0][4]}")
+        print(f"Result: {[a[4][0] for a in addr]}")
+        print(f"Stats: {get_stats()}")
     except Exception as e:
         print(f"Test failed: {e}")
@@ -0,0 +1,194 @@
+"""
+Exponentially weighted covariance of asset / strategy returns.
+EWMCovariance is the online tracker (O(k^2) per bar, assets can join at any time);
+ewm_covariance() is the batch equivalent for backtests (one linear filter over all bars);
+ReturnReplay feeds a tracker from precomputed return series as a backtest clock advances.
+Both follow pandas ewm(adjust=False) with bias=True; missing returns count as 0.
+"""
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+DEFAULT_HALFLIFE = 168   # bars (one week of 1h candles)
+
+
+def _alpha(halflife: Optional[float], alpha: Optional[float]) -> float:
+    if alpha is not None:
+        return float(alpha)
+    return 1.0 - np.exp(-np.log(2.0) / (halflife or DEFAULT_HALFLIFE))
+
+
+def _to_correlation(cov: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Correlation from covariance; pairs involving an asset that is not `valid` get 1.0."""
+    std = np.sqrt(np.clip(np.diagonal(cov), 0.0, None))
+    ok = valid & (std > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.outer(std, std)
+    corr = np.where(np.outer(ok, ok), corr, 1.0)
+    np.fill_diagonal(corr, 1.0)
+    return np.clip(corr, -1.0, 1.0)
+
+
+class EWMCovariance:
+    """
+    Online EWM mean/covariance. update() takes one cross-section of returns (dict, Series or
+    array in `assets` order); observe() buffers per-asset returns by candle time and commits
+    the cross-section once a newer candle arrives. Correlations of assets with fewer than
+    min_periods observations are treated as 1 (fully correlated) by the exposure helpers.
+    """
+
+    def __init__(self, assets=None, halflife: Optional[float] = None, alpha: Optional[float] = None,
+                 min_periods: int = 20):
+        self.alpha = _alpha(halflife, alpha)
+        self.min_periods = min_periods
+        self.assets = []
+        self._index = {}
+        self.mean = np.zeros(0)
+        self.cov = np.zeros((0, 0))
+        self.count = np.zeros(0, dtype=np.int64)
+        self._pending_ts = None
+        self._pending = {}
+        for asset in assets or []:
+            self._ensure(asset)
+
+    def _ensure(self, asset) -> int:
+        idx = self._index.get(asset)
+        if idx is None:
+            idx = len(self.assets)
+            self.assets.append(asset)
+            self._index[asset] = idx
+            self.mean = np.append(self.mean, 0.0)
+            self.count = np.append(self.count, 0)
+            cov = np.zeros((idx + 1, idx + 1))
+            cov[:idx, :idx] = self.cov
+            self.cov = cov
+        return idx
+
+    def update(self, returns: Union[dict, pd.Series, np.ndarray]) -> None:
+        """Fold one bar of returns into the estimate."""
+        if isinstance(returns, np.ndarray):
+            x = np.nan_to_num(np.asarray(returns, dtype=np.float64))
+        else:
+            for asset in returns.keys():
+                self._ensure(asset)
+            x = np.zeros(len(self.assets))
+            for asset, value in returns.items():
+                if value is not None and np.isfinite(value):
+                    x[self._index[asset]] = value
+        first = self.count == 0
+        self.mean[first] = x[first]
+        a = self.alpha
+        diff = x - self.mean
+        self.mean += a * diff
+        self.cov = (1.0 - a) * (self.cov + a * np.outer(diff, diff))
+        self.count += 1
+
+    def observe(self, asset, ts, ret: float) -> None:
+        """Buffer asset's return for candle ts; a newer ts commits the buffered cross-section."""
+        if self._pending_ts is not None and ts > self._pending_ts:
+            self.update(self._pending)
+            self._pending = {}
+        if self._pending_ts is None or ts >= self._pending_ts:
+            self._pending_ts = ts
+            self._pending[asset] = ret
+        self._ensure(asset)
+
+    def covariance(self) -> pd.DataFrame:
+        return pd.DataFrame(self.cov, index=self.assets, columns=self.assets)
+
+    def correlation(self) -> pd.DataFrame:
+        corr = _to_correlation(self.cov, self.count >= self.min_periods)
+        return pd.DataFrame(corr, index=self.assets, columns=self.assets)
+
+    def _exposure_vector(self, exposures: dict) -> np.ndarray:
+        e = np.zeros(len(self.assets))
+        for asset, notional in exposures.items():
+            if notional:
+                e[self._ensure(asset)] = notional
+        return e
+
+    def correlated_exposure(self, exposures: dict) -> float:
+        """sqrt(e' C e) for signed notionals e: 2 x 20% is 40% if fully correlated, ~28% if not."""
+        e = self._exposure_vector(exposures)
+        corr = _to_correlation(self.cov, self.count >= self.min_periods)
+        return float(np.sqrt(max(e @ corr @ e, 0.0)))
+
+    def headroom(self, exposures: dict, asset, side: int, budget: float) -> float:
+        """
+        Largest notional q >= 0 that can be added to `asset` (side +1 long, -1 short) while
+        correlated_exposure(exposures + side * q) stays within budget.
+        """
+        j = self._ensure(asset)
+        e = self._exposure_vector(exposures)
+        corr = _to_correlation(self.cov, self.count >= self.min_periods)
+        b = side * float(corr[j] @ e)
+        c = float(e @ corr @ e)
+        disc = b * b - c + budget * budget
+        if disc < 0:
+            return 0.0
+        return max(-b + np.sqrt(disc), 0.0)
+
+
+class ReturnReplay:
+    """
+    Per-asset return series (DatetimeIndex) replayed into an EWMCovariance in time order up to
+    a moving cutoff. Backtests compute indicators over the whole history at once; feeding the
+    tracker from here as the clock advances keeps the correlation estimate causal.
+    """
+
+    def __init__(self):
+        self._series = {}   # asset -> [ts (int64 ns), returns, next position]
+
+    def add(self, asset, returns: pd.Series) -> None:
+        ts = pd.DatetimeIndex(returns.index).as_unit('ns').asi8
+        self._series[asset] = [ts, returns.to_numpy(dtype=np.float64), 0]
+
+    def feed(self, tracker: EWMCovariance, cutoff) -> int:
+        """Observe every return stamped <= cutoff not fed yet; returns the number observed."""
+        cutoff = pd.Timestamp(cutoff).as_unit('ns').value
+        events = []
+        for asset, entry in self._series.items():
+            ts, rets, pos = entry
+            end = int(np.searchsorted(ts, cutoff, side='right'))
+            events.extend((int(ts[i]), asset, float(rets[i])) for i in range(pos, end) if np.isfinite(rets[i]))
+            entry[2] = max(pos, end)
+        events.sort(key=lambda event: event[0])
+        for t, asset, ret in events:
+            tracker.observe(asset, t, ret)
+        return len(events)
+
+
+def ewm_covariance(returns: pd.DataFrame, halflife: Optional[float] = None,
+                   alpha: Optional[float] = None) -> np.ndarray:
+    """
+    Covariance after every bar, shape (T, k, k), identical to feeding the rows of `returns`
+    through EWMCovariance.update(). cov_t = (1-a) cov_{t-1} + a (1-a) d_t d_t' with
+    d_t = x_t - mean_{t-1}, evaluated for all k^2 entries in one lfilter pass.
+    """
+    a = _alpha(halflife, alpha)
+    x = np.nan_to_num(returns.to_numpy(dtype=np.float64))
+    if len(x) == 0:
+        return np.zeros((0, x.shape[1], x.shape[1]))
+    mean = lfilter([a], [1.0, a - 1.0], x, axis=0, zi=np.full((1, x.shape[1]), (1.0 - a) * x[0]))[0]
+    diff = np.empty_like(x)
+    diff[0] = 0.0
+    diff[1:] = x[1:] - mean[:-1]
+    outer = np.einsum('ti,tj->tij', diff, diff).reshape(len(x), -1)
+    cov = lfilter([a * (1.0 - a)], [1.0, a - 1.0], outer, axis=0)
+    return cov.reshape(len(x), x.shape[1], x.shape[1])
+
+
+def ewm_correlation(returns: pd.DataFrame, halflife: Optional[float] = None, alpha: Optional[float] = None,
+                    min_periods: int = 20) -> np.ndarray:
+    """Correlation after every bar, shape (T, k, k); 1.0 before min_periods bars (as the tracker)."""
+    cov = ewm_covariance(returns, halflife=halflife, alpha=alpha)
+    std = np.sqrt(np.clip(np.diagonal(cov, axis1=1, axis2=2), 0.0, None))
+    denom = std[:, :, None] * std[:, None, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = np.where(denom > 0, cov / denom, 1.0)
+    corr[:max(min_periods - 1, 0)] = 1.0
+    idx = np.arange(cov.shape[1])
+    corr[:, idx, idx] = 1.0
+    return np.clip(corr, -1.0, 1.0)
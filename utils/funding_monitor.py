@@ -0,0 +1,242 @@
+"""
+Funding rate monitor for the whole perp universe (S2 alerts).
+FundingMonitor evaluates every symbol's predicted funding rate on each tick against its fixed
+threshold and its Z-score versus recent settled rates, with per-symbol debounce: one alert when
+a signal fires, another only if it flips side, and re-arming once the rate falls back inside
+rearm_ratio x the trigger (and the cooldown has passed).
+
+run_monitor() feeds it from Binance's all-market mark price stream (one websocket, ~1s updates
+carrying the predicted funding rate) and falls back to bulk fetch_funding_rates polling while
+the stream is down. Alerts are batched into one Telegram message per batch window.
+"""
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_Z_THRESHOLD = 2.0
+DEFAULT_Z_WINDOW = 90          # settled rates (30 days of 8h funding)
+DEFAULT_MIN_HISTORY = 21       # one week
+DEFAULT_COOLDOWN_SEC = 3600
+DEFAULT_BATCH_WINDOW_SEC = 5.0
+DEFAULT_POLL_INTERVAL_SEC = 60.0
+
+
+class _SymbolState:
+    __slots__ = ('history', 'rate', 'next_funding_time', 'mark_price', 'updated_at',
+                 'active_side', 'last_alert_at')
+
+    def __init__(self, window: int):
+        self.history = deque(maxlen=window)
+        self.rate = None
+        self.next_funding_time = None
+        self.mark_price = None
+        self.updated_at = None
+        self.active_side = 0        # +1 short signal (longs paying), -1 long signal, 0 armed
+        self.last_alert_at = None
+
+
+def parse_funding_update(entry: dict) -> Optional[dict]:
+    """
+    {rate, next_funding_time (ms), mark_price} from a ccxt funding rate structure
+    (fetch_funding_rates) or a mark price ticker (watch_mark_prices, raw fields in info).
+    """
+    info = entry.get('info') or {}
+    rate = entry.get('fundingRate')
+    if rate is None:
+        rate = info.get('r', info.get('lastFundingRate'))
+    if rate in (None, ''):
+        return None
+    next_time = entry.get('nextFundingTimestamp') or entry.get('fundingTimestamp') or info.get('T') \
+        or info.get('nextFundingTime')
+    mark = entry.get('markPrice') or info.get('p')
+    return {
+        'rate': float(rate),
+        'next_funding_time': int(next_time) if next_time not in (None, '') else None,
+        'mark_price': float(mark) if mark not in (None, '') else None,
+    }
+
+
+class FundingMonitor:
+    """
+    thresholds: symbol -> |rate| trigger (symbols without one are watched on Z-score only).
+    on_tick() takes {symbol: update} for any subset of the universe and returns new alerts.
+    A settled rate enters the Z-score history when a symbol's next funding time moves on.
+    """
+
+    def __init__(self, thresholds: dict, universe: Optional[Iterable[str]] = None,
+                 z_threshold: float = DEFAULT_Z_THRESHOLD, z_window: int = DEFAULT_Z_WINDOW,
+                 min_history: int = DEFAULT_MIN_HISTORY, cooldown_sec: float = DEFAULT_COOLDOWN_SEC,
+                 rearm_ratio: float = 0.8, clock: Callable[[], float] = time.time):
+        self.thresholds = dict(thresholds)
+        self.universe = list(dict.fromkeys(list(universe or []) + list(self.thresholds)))
+        self.z_threshold = z_threshold
+        self.min_history = min_history
+        self.cooldown_sec = cooldown_sec
+        self.rearm_ratio = rearm_ratio
+        self.clock = clock
+        self.states = {sym: _SymbolState(z_window) for sym in self.universe}
+
+    def seed_history(self, symbol: str, rates: Iterable[float]) -> None:
+        """Prime the Z-score window with settled rates (oldest first)."""
+        state = self.states.get(symbol)
+        if state is not None:
+            state.history.extend(float(r) for r in rates if r is not None)
+
+    def zscore(self, symbol: str, rate: Optional[float] = None) -> Optional[float]:
+        state = self.states[symbol]
+        rate = state.rate if rate is None else rate
+        if rate is None or len(state.history) < self.min_history:
+            return None
+        hist = np.fromiter(state.history, dtype=np.float64)
+        std = hist.std(ddof=1)
+        return float((rate - hist.mean()) / std) if std > 0 else None
+
+    def _side(self, symbol: str, rate: float, z: Optional[float], scale: float = 1.0) -> int:
+        threshold = self.thresholds.get(symbol)
+        if threshold is not None and abs(rate) > threshold * scale:
+            return 1 if rate > 0 else -1
+        if z is not None and abs(z) >= self.z_threshold * scale:
+            return 1 if z > 0 else -1
+        return 0
+
+    def on_tick(self, updates: dict, now: Optional[float] = None) -> list:
+        """Fold in the latest funding per symbol; returns alert dicts for signals that need sending."""
+        now = self.clock() if now is None else now
+        alerts = []
+        for symbol, update in updates.items():
+            state = self.states.get(symbol)
+            if state is None or update is None:
+                continue
+            next_time = update.get('next_funding_time')
+            if (next_time is not None and state.next_funding_time is not None
+                    and next_time > state.next_funding_time and state.rate is not None):
+                state.history.append(state.rate)   # the previous period settled at its last rate
+            if next_time is not None:
+                state.next_funding_time = next_time
+            state.rate = rate = update['rate']
+            state.mark_price = update.get('mark_price')
+            state.updated_at = now
+
+            z = self.zscore(symbol, rate)
+            side = self._side(symbol, rate, z)
+            if state.active_side:
+                if side and side != state.active_side:
+                    alerts.append(self._fire(symbol, state, side, z, now, flipped=True))
+                elif not self._side(symbol, rate, z, scale=self.rearm_ratio):
+                    state.active_side = 0
+                continue
+            if side and (state.last_alert_at is None or now - state.last_alert_at >= self.cooldown_sec):
+                alerts.append(self._fire(symbol, state, side, z, now))
+        return alerts
+
+    def _fire(self, symbol, state, side, z, now, flipped=False) -> dict:
+        state.active_side = side
+        state.last_alert_at = now
+        return {'symbol': symbol, 'rate': state.rate, 'zscore': z, 'side': side,
+                'threshold': self.thresholds.get(symbol), 'mark_price': state.mark_price,
+                'flipped': flipped, 'time': now}
+
+
+def format_alert(alert: dict) -> str:
+    direction = "SHORT (Longs paying)" if alert['side'] > 0 else "LONG (Shorts paying)"
+    lines = [f"🚨 FUNDING SIGNAL{' FLIP' if alert.get('flipped') else ''}: {alert['symbol']}",
+             f"Rate: {alert['rate']:.4%} per 8hr", f"Signal: {direction}"]
+    if alert.get('zscore') is not None:
+        lines.append(f"Z-score: {alert['zscore']:+.2f}")
+    if alert.get('threshold') is not None:
+        lines.append(f"Threshold: ±{alert['threshold']:.4%}")
+    return "\n".join(lines)
+
+
+def format_batch(alerts: list) -> str:
+    return "\n\n".join(format_alert(a) for a in alerts)
+
+
+class AlertBatcher:
+    """Collects alerts and sends them as one message once batch_window has passed since the first."""
+
+    def __init__(self, send: Callable[[str], Awaitable], batch_window: float = DEFAULT_BATCH_WINDOW_SEC):
+        self.send = send
+        self.batch_window = batch_window
+        self.queue = asyncio.Queue()
+
+    def put(self, alerts: list) -> None:
+        for alert in alerts:
+            self.queue.put_nowait(alert)
+
+    async def run(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            await asyncio.sleep(self.batch_window)
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                await self.send(format_batch(batch))
+            except Exception as e:
+                logger.error(f"Funding alert send failed ({len(batch)} alerts): {e}")
+
+
+async def poll_funding(exchange, monitor: FundingMonitor, batcher: AlertBatcher) -> None:
+    """One bulk fetch_funding_rates call for the whole universe."""
+    rates = await asyncio.to_thread(exchange.fetch_funding_rates, monitor.universe)
+    batcher.put(monitor.on_tick({sym: parse_funding_update(r) for sym, r in rates.items()}))
+
+
+async def seed_histories(exchange, monitor: FundingMonitor, limit: int = DEFAULT_Z_WINDOW) -> None:
+    """Prime Z-score windows from settled funding history (one REST call per symbol, at start only)."""
+    async def seed(symbol):
+        try:
+            rows = await asyncio.to_thread(exchange.fetch_funding_rate_history, symbol, None, limit)
+            monitor.seed_history(symbol, [r.get('fundingRate') for r in rows])
+        except Exception as e:
+            logger.warning(f"Funding history for {symbol} unavailable: {e}")
+    await asyncio.gather(*(seed(s) for s in monitor.universe))
+
+
+async def run_monitor(monitor: FundingMonitor, send: Callable[[str], Awaitable], use_websocket: bool = True,
+                      poll_interval: float = DEFAULT_POLL_INTERVAL_SEC,
+                      batch_window: float = DEFAULT_BATCH_WINDOW_SEC, reconnect_delay: float = 30.0) -> None:
+    """
+    Stream mark prices for the universe over one websocket and evaluate every update; while
+    the stream is unavailable, poll fetch_funding_rates every poll_interval and retry the
+    stream after reconnect_delay.
+    """
+    import ccxt
+    rest = ccxt.binanceusdm({'enableRateLimit': True})
+    batcher = AlertBatcher(send, batch_window)
+    sender = asyncio.create_task(batcher.run())
+    await seed_histories(rest, monitor)
+
+    stream = None
+    if use_websocket:
+        try:
+            import ccxt.pro as ccxtpro
+            stream = ccxtpro.binanceusdm({'enableRateLimit': True})
+        except ImportError:
+            logger.warning("ccxt.pro unavailable; polling funding rates instead")
+    try:
+        while True:
+            if stream is not None:
+                try:
+                    while True:
+                        tickers = await stream.watch_mark_prices(monitor.universe)
+                        batcher.put(monitor.on_tick({sym: parse_funding_update(t) for sym, t in tickers.items()}))
+                except Exception as e:
+                    logger.warning(f"Mark price stream failed ({e}); polling for {reconnect_delay:.0f}s")
+            deadline = time.monotonic() + (reconnect_delay if stream is not None else float('inf'))
+            while time.monotonic() < deadline:
+                try:
+                    await poll_funding(rest, monitor, batcher)
+                except Exception as e:
+                    logger.error(f"Funding poll failed: {e}")
+                await asyncio.sleep(poll_interval)
+    finally:
+        sender.cancel()
+        if stream is not None:
+            await stream.close()
@@ -0,0 +1,443 @@
+"""
+Compute-once indicator cache shared by strategies and research code.
+Indicators are requested by (pair, timeframe, name, params) for a frame of candles. The first
+request runs TA-Lib over the frame and keeps, with the values, the indicator's recursion state
+after the last candle: asking again for the same candles is a lookup, and a frame with new
+candles at the end only steps the recursion over those candles (O(1) each). Candles that
+changed under the cache (rewritten history) or a frame that does not overlap it trigger a full
+recompute.
+
+rolling=True (strategies): one entry per key follows Freqtrade's sliding window. Values continue
+the stream from the first candle the entry saw, so once the window slides they are the
+longer-history values rather than a fresh TA-Lib warm-up on the window.
+rolling=False (research): the frame's first candle is part of the key, so every value equals
+TA-Lib on exactly the requested frame, whatever order windows are requested in.
+"""
+import logging
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+import talib
+from scipy.signal import lfilter
+
+try:
+    from utils.regime_features import StreamingADX
+except ImportError:
+    from regime_features import StreamingADX
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1024
+
+# Nanoseconds per datetime64 unit (timestamps are cached in the frame's own unit)
+NS_PER_UNIT = {'s': 10**9, 'ms': 10**6, 'us': 10**3, 'ns': 1}
+
+
+def same_values(a: np.ndarray, b: np.ndarray) -> bool:
+    """Element-wise equal, NaN matching NaN (the NaN-aware compare only runs when needed: it copies)."""
+    return np.array_equal(a, b) or np.array_equal(a, b, equal_nan=True)
+
+
+def _datetimes(dates):
+    """Datetime array or index of a Series/index/array-like, converted only when it is not one already."""
+    values = dates.array if isinstance(dates, pd.Series) else dates
+    return values if hasattr(values, 'asi8') else pd.DatetimeIndex(values)
+
+
+def _timestamps(dataframe: pd.DataFrame):
+    """(int64 timestamps in the column's own unit, unit) from the Freqtrade 'date' column, else the index."""
+    dates = _datetimes(dataframe['date'] if 'date' in dataframe.columns else dataframe.index)
+    return dates.asi8, dates.unit   # asi8 is a view of the dates, no copy
+
+
+def timestamps_ns(dates) -> np.ndarray:
+    """int64 nanosecond timestamps of a datetime Series, index or array-like (a view when already ns)."""
+    dates = _datetimes(dates)
+    if dates.unit == 'ns':
+        return dates.asi8
+    return dates.asi8 * NS_PER_UNIT[dates.unit]
+
+
+def _wilder_last(x: np.ndarray, period: int) -> float:
+    """Last value of Wilder's average of x (seeded with the mean of the first `period` values)."""
+    decay = (period - 1) / period
+    seed = x[:period].mean()
+    if len(x) == period:
+        return float(seed)
+    tail = lfilter([1.0 / period], [1.0, -decay], x[period:], zi=[decay * seed])[0]
+    return float(tail[-1])
+
+
+def _wilder_sum_last(x: np.ndarray, period: int) -> float:
+    """Last value of TA-Lib's smoothed sum: plain sum of the first period-1 values, then s - s/period + x."""
+    decay = (period - 1) / period
+    seed = x[:period - 1].sum()
+    if len(x) == period - 1:
+        return float(seed)
+    tail = lfilter([1.0], [1.0, -decay], x[period - 1:], zi=[decay * seed])[0]
+    return float(tail[-1])
+
+
+class StreamingIndicator:
+    """
+    One indicator stream. compute(x) returns TA-Lib's values for the input matrix x (one
+    column per name in `inputs`) and leaves the stream after its last row; update(*row)
+    adds one candle. `lookback` rows are needed before the state can be read off the batch
+    output; shorter frames replay update() instead.
+    """
+    inputs = ('close',)
+
+    def __init__(self, timeperiod: int):
+        self.period = int(timeperiod)
+
+    @property
+    def lookback(self) -> int:
+        return self.period + 1
+
+    def compute(self, x: np.ndarray) -> np.ndarray:
+        values = self._batch(x)
+        if len(x) <= self.lookback:
+            self._reset()
+            for row in x.tolist():
+                self.update(*row)
+        else:
+            self._resume(x, values)
+        return values
+
+    def _batch(self, x: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def _reset(self):
+        raise NotImplementedError
+
+    def _resume(self, x: np.ndarray, values: np.ndarray):
+        raise NotImplementedError
+
+    def update(self, *row) -> float:
+        raise NotImplementedError
+
+
+class SMA(StreamingIndicator):
+    def __init__(self, timeperiod: int = 30, column: str = 'close'):
+        super().__init__(timeperiod)
+        self.inputs = (column,)
+        self._reset()
+
+    def _batch(self, x):
+        return talib.SMA(x[:, 0], timeperiod=self.period)
+
+    def _reset(self):
+        self.window = deque(maxlen=self.period)
+        self.total = 0.0
+
+    def _resume(self, x, values):
+        self.window = deque(x[-self.period:, 0].tolist(), maxlen=self.period)
+        self.total = float(sum(self.window))
+
+    def update(self, value):
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(value)
+        self.total += value
+        return self.total / self.period if len(self.window) == self.period else np.nan
+
+
+class EMA(StreamingIndicator):
+    """TA-Lib EMA: seeded with the SMA of the first `timeperiod` values, k = 2 / (timeperiod + 1)."""
+
+    def __init__(self, timeperiod: int = 30, column: str = 'close'):
+        super().__init__(timeperiod)
+        self.inputs = (column,)
+        self.k = 2.0 / (self.period + 1)
+        self._reset()
+
+    def _batch(self, x):
+        return talib.EMA(x[:, 0], timeperiod=self.period)
+
+    def _reset(self):
+        self.n = 0
+        self.total = 0.0
+        self.ema = np.nan
+
+    def _resume(self, x, values):
+        self.n = len(x)
+        self.ema = float(values[-1])
+
+    def update(self, value):
+        self.n += 1
+        if self.n < self.period:
+            self.total += value
+            return np.nan
+        if self.n == self.period:
+            self.ema = (self.total + value) / self.period
+        else:
+            self.ema = (value - self.ema) * self.k + self.ema
+        return self.ema
+
+
+class RSI(StreamingIndicator):
+    """TA-Lib RSI (Wilder averages of gains and losses), as CascadeDetector's per-pair RSI."""
+
+    def __init__(self, timeperiod: int = 14, column: str = 'close'):
+        super().__init__(timeperiod)
+        self.inputs = (column,)
+        self._reset()
+
+    def _batch(self, x):
+        return talib.RSI(x[:, 0], timeperiod=self.period)
+
+    def _reset(self):
+        self.n = 0
+        self.prev = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def _resume(self, x, values):
+        delta = np.diff(x[:, 0])
+        self.avg_gain = _wilder_last(np.where(delta > 0, delta, 0.0), self.period)
+        self.avg_loss = _wilder_last(np.where(delta < 0, -delta, 0.0), self.period)
+        self.n = len(x)
+        self.prev = float(x[-1, 0])
+
+    def update(self, value):
+        n, period = self.n, self.period
+        self.n += 1
+        prev, self.prev = self.prev, value
+        if n == 0:
+            return np.nan
+        delta = value - prev
+        gain, loss = (delta, 0.0) if delta > 0 else (0.0, -delta)
+        if n <= period:
+            self.avg_gain += gain
+            self.avg_loss += loss
+            if n < period:
+                return np.nan
+            self.avg_gain /= period
+            self.avg_loss /= period
+        else:
+            self.avg_gain = (self.avg_gain * (period - 1) + gain) / period
+            self.avg_loss = (self.avg_loss * (period - 1) + loss) / period
+        total = self.avg_gain + self.avg_loss
+        return 100.0 * self.avg_gain / total if not -1e-8 < total < 1e-8 else 0.0
+
+
+class ATR(StreamingIndicator):
+    """TA-Lib ATR: mean of the first `timeperiod` true ranges, then Wilder smoothing."""
+    inputs = ('high', 'low', 'close')
+
+    def __init__(self, timeperiod: int = 14):
+        super().__init__(timeperiod)
+        self._reset()
+
+    def _batch(self, x):
+        return talib.ATR(x[:, 0], x[:, 1], x[:, 2], timeperiod=self.period)
+
+    def _reset(self):
+        self.n = 0
+        self.prev_close = None
+        self.total = 0.0
+        self.atr = np.nan
+
+    def _resume(self, x, values):
+        self.n = len(x)
+        self.prev_close = float(x[-1, 2])
+        self.atr = float(values[-1])
+
+    def update(self, high, low, close):
+        n, period = self.n, self.period
+        self.n += 1
+        prev, self.prev_close = self.prev_close, close
+        if n == 0:
+            return np.nan
+        true_range = max(high, prev) - min(low, prev)
+        if n < period:
+            self.total += true_range
+            return np.nan
+        if n == period:
+            self.atr = (self.total + true_range) / period
+        else:
+            self.atr = (self.atr * (period - 1) + true_range) / period
+        return self.atr
+
+
+class ADX(StreamingIndicator):
+    """TA-Lib ADX; steps through StreamingADX (the regime features' ADX)."""
+    inputs = ('high', 'low', 'close')
+
+    def __init__(self, timeperiod: int = 14):
+        super().__init__(timeperiod)
+        self._reset()
+
+    @property
+    def lookback(self) -> int:
+        return 2 * self.period
+
+    def _batch(self, x):
+        return talib.ADX(x[:, 0], x[:, 1], x[:, 2], timeperiod=self.period)
+
+    def _reset(self):
+        self.stream = StreamingADX(self.period)
+
+    def _resume(self, x, values):
+        high, low, close = x[:, 0], x[:, 1], x[:, 2]
+        diff_p = high[1:] - high[:-1]
+        diff_m = low[:-1] - low[1:]
+        minus = (diff_m > 0) & (diff_p < diff_m)
+        plus = ~minus & (diff_p > 0) & (diff_p > diff_m)
+        true_range = np.maximum(high[1:], close[:-1]) - np.minimum(low[1:], close[:-1])
+        stream = StreamingADX(self.period)
+        stream.n = len(x)
+        stream.prev_high, stream.prev_low, stream.prev_close = float(high[-1]), float(low[-1]), float(close[-1])
+        stream.plus_dm = _wilder_sum_last(np.where(plus, diff_p, 0.0), self.period)
+        stream.minus_dm = _wilder_sum_last(np.where(minus, diff_m, 0.0), self.period)
+        stream.tr = _wilder_sum_last(true_range, self.period)
+        stream.adx = float(values[-1])
+        self.stream = stream
+
+    def update(self, high, low, close):
+        return self.stream.update(high, low, close)
+
+
+INDICATORS = {'sma': SMA, 'ema': EMA, 'rsi': RSI, 'atr': ATR, 'adx': ADX}
+
+
+def register_indicator(name: str, factory) -> None:
+    """Make a StreamingIndicator subclass (or factory taking the request params) available by name."""
+    INDICATORS[name] = factory
+
+
+class _Entry:
+    __slots__ = ('ts', 'unit', 'inputs', 'values', 'stream')
+
+    def __init__(self, ts, unit, inputs, values, stream):
+        self.ts = ts
+        self.unit = unit
+        self.inputs = inputs
+        self.values = values
+        self.stream = stream
+
+
+class IndicatorEngine:
+    """
+    LRU cache of indicator columns (at most max_entries keys). get() returns a read-only
+    array aligned with the frame's rows; assigning it to a DataFrame column is safe.
+    """
+
+    def __init__(self, rolling: bool = True, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.rolling = rolling
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._stats = {'hits': 0, 'computed': 0, 'appended': 0}
+
+    @staticmethod
+    def _columns(dataframe: pd.DataFrame, names) -> list:
+        """Input columns as float64 arrays (views of the frame's data for float64 columns)."""
+        cols = {c.lower(): c for c in dataframe.columns}
+        return [dataframe[cols.get(name, name)].to_numpy(dtype=np.float64) for name in names]
+
+    @staticmethod
+    def _match(entry: _Entry, ts: np.ndarray, columns: list):
+        """(first cached row of the frame, frame rows already cached) when the frame continues the entry."""
+        first = int(np.searchsorted(entry.ts, ts[0]))
+        if first >= len(entry.ts) or entry.ts[first] != ts[0]:
+            return None
+        cached = min(len(entry.ts) - first, len(ts))
+        end = first + cached
+        if not np.array_equal(ts[:cached], entry.ts[first:end]):
+            return None
+        for j, column in enumerate(columns):
+            if not same_values(column[:cached], entry.inputs[first:end, j]):
+                return None
+        return first, cached
+
+    def get(self, pair, timeframe, name: str, dataframe: pd.DataFrame, **params) -> np.ndarray:
+        """Indicator `name` (TA-Lib parameter names, e.g. timeperiod) for every row of dataframe."""
+        factory = INDICATORS.get(name)
+        if factory is None:
+            raise KeyError(f"Unknown indicator: {name}")
+        ts, unit = _timestamps(dataframe)
+        if len(ts) == 0:
+            return np.empty(0)
+        key = (pair, timeframe, name, tuple(sorted(params.items())))
+        if not self.rolling:
+            key += (int(ts[0]) * NS_PER_UNIT[unit],)
+
+        entry = self._entries.get(key)
+        stream = entry.stream if entry is not None else factory(**params)
+        columns = self._columns(dataframe, stream.inputs)
+        match = self._match(entry, ts, columns) if entry is not None and entry.unit == unit else None
+
+        if match is None:
+            stream = factory(**params) if entry is not None else stream
+            x = np.column_stack(columns)
+            values = stream.compute(x)
+            self._stats['computed'] += 1
+        else:
+            first, cached = match
+            if cached == len(ts):
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry.values[first:first + cached]
+            new_rows = np.column_stack([column[cached:] for column in columns])
+            new = [stream.update(*row) for row in new_rows.tolist()]
+            x = np.concatenate([entry.inputs[first:], new_rows])
+            values = np.concatenate([entry.values[first:], new])
+            self._stats['appended'] += len(new)
+        values.flags.writeable = False
+
+        # The frame covers the cached candles from `first` on, so it becomes the entry
+        self._entries[key] = _Entry(ts, unit, x, values, stream)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return values
+
+    def frame(self, pair, timeframe, dataframe: pd.DataFrame) -> 'IndicatorFrame':
+        return IndicatorFrame(self, pair, timeframe, dataframe)
+
+    def invalidate(self, pair=None) -> None:
+        if pair is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == pair]:
+            del self._entries[key]
+
+    def stats(self) -> dict:
+        return dict(self._stats, entries=len(self._entries))
+
+
+class IndicatorFrame:
+    """An engine bound to one pair's frame: frame.get('adx', timeperiod=14)."""
+
+    def __init__(self, engine: IndicatorEngine, pair, timeframe, dataframe: pd.DataFrame):
+        self.engine = engine
+        self.pair = pair
+        self.timeframe = timeframe
+        self.dataframe = dataframe
+
+    def get(self, name: str, **params) -> np.ndarray:
+        return self.engine.get(self.pair, self.timeframe, name, self.dataframe, **params)
+
+    def series(self, name: str, **params) -> pd.Series:
+        return pd.Series(self.get(name, **params), index=self.dataframe.index)
+
+
+_shared = {}
+
+
+def shared_engine(rolling: bool = True) -> IndicatorEngine:
+    """Process-wide engine (one per mode) so every strategy and script reuses the same columns."""
+    engine = _shared.get(rolling)
+    if engine is None:
+        engine = _shared[rolling] = IndicatorEngine(rolling=rolling)
+    return engine
+
+
+def cached_indicator(name: str, data, pair=None, timeframe=None, **params) -> pd.Series:
+    """
+    Research helper: indicator over a frame (or a single Series as its `column` input) from the
+    shared anchored engine, as a Series on data's index. Equal to calling TA-Lib directly.
+    """
+    frame = data.to_frame(params.get('column', 'close')) if isinstance(data, pd.Series) else data
+    return shared_engine(rolling=False).frame(pair, timeframe, frame).series(name, **params)
@@ -0,0 +1,304 @@
+"""
+Local stand-in for the Nansen API (Strategy 8), for offline tests and benchmarks.
+Serves POST /api/v1/smart-money/netflow and /api/v1/tgm/flows from fixtures with the real
+pagination envelope, optional per-request latency and injected error statuses (403 no credits,
+422 validation, or any retryable 429/5xx). Fixtures come from a JSON file, from responses the
+tracker recorded in its response cache, or are generated synthetically.
+
+    python -m utils.nansen_stub_server --fixtures data/whale_signals/responses --port 8765 --latency-ms 50
+    python research/backtests/backtest_strategy_8.py --nansen-url http://127.0.0.1:8765
+
+    python -m utils.nansen_stub_server --synthetic --bench      # tracker throughput, cold vs cached
+"""
+import os
+import sys
+import json
+import glob
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    from utils.nansen_whale_tracker import NansenWhaleTracker, TOKEN_MAP
+except ImportError:
+    from nansen_whale_tracker import NansenWhaleTracker, TOKEN_MAP
+
+logger = logging.getLogger(__name__)
+
+NETFLOW_ENDPOINT = '/api/v1/smart-money/netflow'
+TGM_FLOWS_ENDPOINT = '/api/v1/tgm/flows'
+
+# Native tokens the real TGM flows endpoint rejects with 422
+_NATIVE_TOKENS = {
+    'So11111111111111111111111111111111111111112',
+    '0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee',
+}
+_TOKEN_SYMBOLS = {'BTC': 'WBTC', 'ETH': 'WETH', 'AVAX': 'WAVAX'}
+
+
+def _flow_key(chain: str, token_address: str) -> str:
+    token_address = str(token_address)
+    return f"{chain}:{token_address.lower() if token_address.startswith('0x') else token_address}"
+
+
+def synthetic_fixtures(symbols: Optional[list] = None, date_from: str = '2023-01-01', days: int = 730,
+                       seed: int = 0) -> dict:
+    """Random but deterministic netflow rows and daily TGM flows for TOKEN_MAP symbols."""
+    rng = np.random.default_rng(seed)
+    symbols = symbols or list(TOKEN_MAP.keys())
+    dates = pd.date_range(date_from, periods=days, freq='1D').strftime('%Y-%m-%d').tolist()
+    netflow, flows = [], {}
+    for sym in symbols:
+        chain, addr = TOKEN_MAP[sym]
+        nf = rng.normal(0, 1e6, 4)
+        netflow.append({
+            'token_address': addr, 'token_symbol': _TOKEN_SYMBOLS.get(sym, sym), 'chain': chain,
+            'net_flow_1h_usd': nf[0] / 24, 'net_flow_24h_usd': nf[1], 'net_flow_7d_usd': nf[2] * 3,
+            'net_flow_30d_usd': nf[3] * 8, 'market_cap_usd': float(rng.uniform(1e9, 1e12)),
+        })
+        inflows = rng.poisson(50, days)
+        outflows = rng.poisson(50, days)
+        flows[_flow_key(chain, addr)] = [
+            {'date': d, 'total_inflows_count': int(i), 'total_outflows_count': int(o),
+             'holders': int(1000 + k)}
+            for k, (d, i, o) in enumerate(zip(dates, inflows, outflows))
+        ]
+    return {'netflow': netflow, 'tgm_flows': flows}
+
+
+def load_fixtures(path: str) -> dict:
+    """
+    Fixtures from a JSON file ({'netflow': [rows], 'tgm_flows': {'chain:address': [rows]}}) or
+    from a directory of responses recorded by NansenWhaleTracker's response cache.
+    """
+    if os.path.isfile(path):
+        with open(path) as f:
+            fixtures = json.load(f)
+        return {'netflow': fixtures.get('netflow', []), 'tgm_flows': fixtures.get('tgm_flows', {})}
+
+    netflow, flows = {}, {}
+    for file in sorted(glob.glob(os.path.join(path, '*.json'))):
+        try:
+            with open(file) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            continue
+        payload = entry.get('payload')
+        rows = (entry.get('response') or {}).get('data') or []
+        if entry.get('endpoint') == NETFLOW_ENDPOINT:
+            for row in rows:
+                netflow[_flow_key(row.get('chain', ''), row.get('token_address', ''))] = row
+        elif entry.get('endpoint') == TGM_FLOWS_ENDPOINT and payload:
+            by_date = flows.setdefault(_flow_key(payload['chain'], payload['token_address']), {})
+            for row in rows:
+                by_date[row.get('date')] = row
+    return {
+        'netflow': list(netflow.values()),
+        'tgm_flows': {key: [by_date[d] for d in sorted(by_date)] for key, by_date in flows.items()},
+    }
+
+
+class NansenStubServer:
+    """
+    Threaded HTTP server answering like the Nansen API. latency (seconds) is added to every
+    request; errors maps a status code to the probability of returning it (seeded, so runs are
+    repeatable). Requests without an apikey header get 401. stats counts requests and statuses.
+    """
+
+    def __init__(self, fixtures: Union[dict, str, None] = None, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, errors: Optional[dict] = None, seed: int = 0):
+        if fixtures is None:
+            fixtures = synthetic_fixtures()
+        elif isinstance(fixtures, str):
+            fixtures = load_fixtures(fixtures)
+        self.netflow = list(fixtures.get('netflow', []))
+        self.tgm_flows = {key: sorted(rows, key=lambda r: r.get('date', ''))
+                          for key, rows in fixtures.get('tgm_flows', {}).items()}
+        self.latency = latency
+        self.errors = {int(k): float(v) for k, v in (errors or {}).items()}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'NansenStubServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _injected_status(self) -> Optional[int]:
+        with self._lock:
+            for status, prob in self.errors.items():
+                if self._rng.random() < prob:
+                    return status
+        return None
+
+    @staticmethod
+    def _page(rows: list, payload: dict) -> dict:
+        pagination = payload.get('pagination') or {}
+        page = max(int(pagination.get('page', 1)), 1)
+        per_page = max(int(pagination.get('per_page', 25)), 1)
+        start = (page - 1) * per_page
+        return {
+            'data': rows[start:start + per_page],
+            'pagination': {'page': page, 'per_page': per_page, 'is_last_page': start + per_page >= len(rows)},
+        }
+
+    def _netflow(self, payload: dict):
+        chains = set(payload.get('chains') or [])
+        filters = payload.get('filters') or {}
+        addresses = filters.get('token_address')
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        wanted = {_flow_key('', a) for a in addresses} if addresses else None
+        rows = [r for r in self.netflow
+                if (not chains or r.get('chain') in chains)
+                and (wanted is None or _flow_key('', r.get('token_address', '')) in wanted)]
+        for order in reversed(payload.get('order_by') or []):
+            field = order.get('field')
+            rows.sort(key=lambda r: r.get(field) or 0, reverse=str(order.get('direction', 'DESC')).upper() == 'DESC')
+        return 200, self._page(rows, payload)
+
+    def _flows(self, payload: dict):
+        chain, addr = payload.get('chain'), payload.get('token_address')
+        if not chain or not addr:
+            return 422, {'detail': 'chain and token_address are required'}
+        if addr in _NATIVE_TOKENS:
+            return 422, {'detail': f'Token {addr} is not supported on {chain}'}
+        date = payload.get('date') or {}
+        lo, hi = str(date.get('from', '')), str(date.get('to', '9999'))
+        rows = [r for r in self.tgm_flows.get(_flow_key(chain, addr), [])
+                if lo <= str(r.get('date', ''))[:10] <= hi]
+        return 200, self._page(rows, payload)
+
+    def handle(self, path: str, headers, body: bytes):
+        """(status, json body) for one request."""
+        if not headers.get('apikey'):
+            return 401, {'detail': 'Missing apikey header'}
+        if self.latency:
+            time.sleep(self.latency)
+        injected = self._injected_status()
+        if injected == 403:
+            return 403, {'detail': 'Insufficient credits'}
+        if injected is not None:
+            return injected, {'detail': 'Injected error'}
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            return 422, {'detail': 'Invalid JSON body'}
+        if path == NETFLOW_ENDPOINT:
+            return self._netflow(payload)
+        if path == TGM_FLOWS_ENDPOINT:
+            return self._flows(payload)
+        return 404, {'detail': 'Not found'}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        stub = self.server.stub
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        status, response = stub.handle(self.path.split('?')[0], self.headers, body)
+        with stub._lock:
+            stub.stats[self.path] += 1
+            stub.stats[status] += 1
+        raw = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, format, *args):
+        logger.debug("nansen stub: " + format, *args)
+
+
+def benchmark(url: str, symbols: Optional[list] = None, date_from: str = '2023-01-01',
+              date_to: str = '2024-12-31', per_page: int = 100, max_workers: int = 4) -> dict:
+    """Time get_token_flows for each symbol against url: cold, then from the response cache."""
+    symbols = symbols or [s for s, (_, addr) in TOKEN_MAP.items() if addr not in _NATIVE_TOKENS]
+    result = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        tracker = NansenWhaleTracker(api_key=os.environ.get('NANSEN_API_KEY') or 'local', cache_dir=cache_dir,
+                                     response_cache_ttl=3600, max_workers=max_workers, base_url=url)
+        for label in ('cold', 'cached'):
+            started = time.perf_counter()
+            rows = 0
+            for sym in symbols:
+                chain, addr = TOKEN_MAP[sym]
+                flows = tracker.get_token_flows(chain, addr, date_from, date_to, per_page=per_page)
+                rows += 0 if flows is None else len(flows)
+            elapsed = time.perf_counter() - started
+            result[label] = {'seconds': elapsed, 'rows': rows, 'rows_per_sec': rows / elapsed if elapsed else float('inf')}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Nansen API stand-in")
+    parser.add_argument("--fixtures", help="Fixture JSON file or recorded response-cache directory")
+    parser.add_argument("--synthetic", action="store_true", help="Serve generated fixtures")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate-403", type=float, default=0.0)
+    parser.add_argument("--error-rate-422", type=float, default=0.0)
+    parser.add_argument("--error-rate-503", type=float, default=0.0, help="Retryable; exercises the tracker's backoff")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bench", action="store_true", help="Benchmark the tracker against the stub and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if not args.fixtures and not args.synthetic:
+        parser.error("pass --fixtures PATH or --synthetic")
+    errors = {403: args.error_rate_403, 422: args.error_rate_422, 503: args.error_rate_503}
+    server = NansenStubServer(args.fixtures or None, host=args.host, port=0 if args.bench else args.port,
+                              latency=args.latency_ms / 1000.0, errors={k: v for k, v in errors.items() if v},
+                              seed=args.seed)
+    if args.bench:
+        with server:
+            for label, r in benchmark(server.url).items():
+                print(f"{label:>6}: {r['rows']} rows in {r['seconds']:.3f}s ({r['rows_per_sec']:.0f} rows/s)")
+            print(f"requests served: {server.stats[TGM_FLOWS_ENDPOINT]}")
+        return
+    print(f"Nansen stub listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
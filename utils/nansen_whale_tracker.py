@@ -5,12 +5,17 @@ Uses liquid assets (BTC/WBTC, ETH/WETH, SOL) initially; expandable to mid-caps.
 """
 import os
 import json
+import time
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from datetime import datetime
 
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
@@ -48,32 +53,92 @@ S8_MIDCAP_UNIVERSE = ['AVAX', 'LINK', 'ARB', 'OP']
 NANSEN_BASE_URL = "https://api.nansen.ai"
 DEFAULT_CACHE_DIR = "data/whale_signals"
 
+# Transient statuses retried with exponential backoff (Retry-After honoured on 429/503)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_PAGES = 200
+
+# Response cache lifetime for backtests (historical flows do not change)
+BACKTEST_RESPONSE_CACHE_TTL = 7 * 24 * 3600
+
 
 class NansenWhaleTracker:
     """
     Fetches Smart Money netflow data from Nansen API and computes accumulation scores.
+    Requests share one pooled requests.Session with retry/backoff on 429/5xx. Paginated
+    endpoints are read to the last page (pages after the first fetched concurrently).
+    response_cache_ttl (seconds) enables the on-disk response cache keyed by endpoint +
+    payload, so backtests pull the same history once. base_url (or NANSEN_BASE_URL env)
+    points the tracker at another host, e.g. utils/nansen_stub_server.py for offline runs.
     """
 
-    def __init__(self, api_key: Optional[str] = None, cache_dir: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache_dir: Optional[str] = None,
+                 response_cache_ttl: Optional[float] = None, max_workers: int = 4,
+                 max_retries: int = 4, backoff_factor: float = 0.5, base_url: Optional[str] = None):
         self.api_key = api_key or os.environ.get('NANSEN_API_KEY', '')
+        self.base_url = (base_url or os.environ.get('NANSEN_BASE_URL') or NANSEN_BASE_URL).rstrip('/')
         self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
         os.makedirs(self.cache_dir, exist_ok=True)
+        self.response_cache_ttl = response_cache_ttl
+        self.max_workers = max(1, max_workers)
+
+        retry = Retry(
+            total=max_retries, backoff_factor=backoff_factor, status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({'POST'}), respect_retry_after_header=True, raise_on_status=False,
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=1, pool_maxsize=self.max_workers)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _response_cache_path(self, endpoint: str, payload: dict) -> str:
+        raw = endpoint + json.dumps(payload, sort_keys=True)
+        if self.base_url != NANSEN_BASE_URL:
+            raw = self.base_url + raw   # keep stand-in responses apart from real ones
+        return os.path.join(self.cache_dir, 'responses', f"{hashlib.sha1(raw.encode()).hexdigest()}.json")
+
+    def _cached_response(self, endpoint: str, payload: dict) -> Optional[dict]:
+        if not self.response_cache_ttl:
+            return None
+        path = self._response_cache_path(endpoint, payload)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get('fetched_at', 0) > self.response_cache_ttl:
+            return None
+        return entry.get('response')
+
+    def _store_response(self, endpoint: str, payload: dict, response: dict) -> None:
+        if not self.response_cache_ttl:
+            return
+        path = self._response_cache_path(endpoint, payload)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump({'endpoint': endpoint, 'payload': payload, 'fetched_at': time.time(), 'response': response}, f)
+        os.replace(tmp_path, path)
 
     def _request(self, endpoint: str, payload: dict) -> Optional[dict]:
-        """Make POST request to Nansen API."""
+        """Make POST request to Nansen API (response cache first, when enabled)."""
+        cached = self._cached_response(endpoint, payload)
+        if cached is not None:
+            return cached
         if not self.api_key:
             logger.warning("Nansen API key not set. Set NANSEN_API_KEY env var.")
             return None
 
-        url = f"{NANSEN_BASE_URL}{endpoint}"
+        url = f"{self.base_url}{endpoint}"
         headers = {
             'Content-Type': 'application/json',
             'apikey': self.api_key,  # lowercase per Nansen docs
         }
         try:
-            resp = requests.post(url, json=payload, headers=headers, timeout=30)
+            resp = self.session.post(url, json=payload, headers=headers, timeout=30)
             resp.raise_for_status()
-            return resp.json()
+            data = resp.json()
+            self._store_response(endpoint, payload, data)
+            return data
         except requests.RequestException as e:
             status = getattr(e.response, 'status_code', None) if hasattr(e, 'response') and e.response else None
             body = ''
@@ -96,6 +161,44 @@ class NansenWhaleTracker:
                 logger.error(f"Nansen API request failed: {e} {body}")
             return None
 
+    @staticmethod
+    def _is_last_page(data: dict, per_page: int) -> bool:
+        pagination = data.get('pagination') or {}
+        if 'is_last_page' in pagination:
+            return bool(pagination['is_last_page'])
+        return len(data.get('data') or []) < per_page
+
+    def _request_all_pages(self, endpoint: str, payload: dict, per_page: int) -> Optional[list]:
+        """
+        Rows of every page of a paginated endpoint. Page 1 is read first; later pages are
+        fetched max_workers at a time until a batch reaches the last page. Returns None if
+        any page fails (no silently truncated history).
+        """
+        def fetch(page):
+            return self._request(endpoint, dict(payload, pagination={'page': page, 'per_page': per_page}))
+
+        first = fetch(1)
+        if not first or 'data' not in first:
+            return None
+        rows = list(first['data'])
+        if self._is_last_page(first, per_page):
+            return rows
+
+        next_page = 2
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while next_page <= MAX_PAGES:
+                pages = range(next_page, min(next_page + self.max_workers, MAX_PAGES + 1))
+                for page, data in zip(pages, pool.map(fetch, pages)):
+                    if not data or 'data' not in data:
+                        logger.error(f"Nansen {endpoint}: page {page} failed; discarding partial result")
+                        return None
+                    rows.extend(data['data'])
+                    if self._is_last_page(data, per_page):
+                        return rows
+                next_page = pages[-1] + 1
+        logger.warning(f"Nansen {endpoint}: stopped after {MAX_PAGES} pages")
+        return rows
+
     def get_smart_money_netflow(
         self,
         chains: Optional[list] = None,
@@ -264,9 +367,10 @@ class NansenWhaleTracker:
         date_from: str,
         date_to: str,
         label: str = 'smart_money',
+        per_page: int = 1000,
     ) -> Optional[pd.DataFrame]:
         """
-        Fetch historical token flows for backtest.
+        Fetch historical token flows for backtest (all pages).
         date_from, date_to: ISO 8601 format (e.g. '2024-01-01', '2024-12-31').
         Returns None for unsupported native tokens (avoids 422).
         """
@@ -277,12 +381,11 @@ class NansenWhaleTracker:
             'token_address': token_address,
             'date': {'from': date_from, 'to': date_to},
             'label': label,
-            'pagination': {'page': 1, 'per_page': 1000},
         }
-        data = self._request('/api/v1/tgm/flows', payload)
-        if not data or 'data' not in data:
+        rows = self._request_all_pages('/api/v1/tgm/flows', payload, per_page)
+        if rows is None:
             return None
-        df = pd.DataFrame(data['data'])
+        df = pd.DataFrame(rows)
         if not df.empty and 'date' in df.columns:
             df['date'] = pd.to_datetime(df['date'])
             df.set_index('date', inplace=True)
@@ -0,0 +1,180 @@
+"""
+OHLCV integrity checks: gap and duplicate-candle index over int64 timestamps.
+Builds a per-dataset index (vectorized over epoch-ms), records it in the data catalog,
+and repairs datasets by deduplicating and re-fetching only the missing ranges.
+"""
+import os
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = "data/catalog.json"
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+_UNIT_MS = {
+    'm': 60_000,
+    'h': 3_600_000,
+    'd': 86_400_000,
+    'w': 604_800_000,
+}
+
+
+def timeframe_to_ms(timeframe: str) -> int:
+    """Convert a CCXT timeframe string ('1m', '1h', '8h', '1d', '1w') to milliseconds."""
+    tf = str(timeframe).strip()
+    unit = tf[-1:]
+    if unit not in _UNIT_MS or not tf[:-1].isdigit():
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    return int(tf[:-1]) * _UNIT_MS[unit]
+
+
+def ohlcv_timestamps_ms(df: pd.DataFrame) -> np.ndarray:
+    """
+    Return candle open times as int64 epoch-ms.
+    Uses the 'timestamp' column (CCXT ms) when present, otherwise the DatetimeIndex.
+    """
+    if 'timestamp' in df.columns:
+        return df['timestamp'].to_numpy(dtype=np.int64)
+    idx = pd.DatetimeIndex(df.index)
+    return idx.as_unit('ms').asi8.astype(np.int64, copy=False)
+
+
+def build_integrity_index(df: pd.DataFrame, timeframe: str) -> dict:
+    """
+    Build the gap/duplicate index for one OHLCV dataset.
+    Returns a JSON-serializable dict:
+        rows, first_ts, last_ts, expected_rows, unsorted, duplicates, duplicate_timestamps,
+        gaps [{start, end, missing_bars}] (inclusive ms of the missing candles),
+        missing_bars, misaligned, checked_at.
+    """
+    step = timeframe_to_ms(timeframe)
+    ts = ohlcv_timestamps_ms(df)
+    index = {
+        'timeframe': timeframe,
+        'rows': int(len(ts)),
+        'first_ts': None,
+        'last_ts': None,
+        'expected_rows': 0,
+        'unsorted': False,
+        'duplicates': 0,
+        'duplicate_timestamps': [],
+        'gaps': [],
+        'missing_bars': 0,
+        'misaligned': 0,
+        'checked_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+    if len(ts) == 0:
+        return index
+
+    diffs = np.diff(ts)
+    index['unsorted'] = bool((diffs < 0).any())
+    if index['unsorted']:
+        ts = np.sort(ts, kind='stable')
+        diffs = np.diff(ts)
+
+    dup_mask = diffs == 0
+    gap_pos = np.flatnonzero(diffs > step)
+    missing = diffs[gap_pos] // step - 1
+
+    index['first_ts'] = int(ts[0])
+    index['last_ts'] = int(ts[-1])
+    index['expected_rows'] = int((ts[-1] - ts[0]) // step + 1)
+    index['duplicates'] = int(dup_mask.sum())
+    index['duplicate_timestamps'] = np.unique(ts[1:][dup_mask]).tolist()
+    index['gaps'] = [
+        {'start': int(s), 'end': int(e), 'missing_bars': int(m)}
+        for s, e, m in zip(ts[gap_pos] + step, ts[gap_pos + 1] - step, missing)
+        if m > 0
+    ]
+    index['missing_bars'] = int(missing[missing > 0].sum())
+    index['misaligned'] = int(((diffs % step) != 0).sum())
+    return index
+
+
+def is_clean(index: dict) -> bool:
+    """True when the dataset has no duplicates, gaps, misaligned or unsorted candles."""
+    return not (index['duplicates'] or index['gaps'] or index['misaligned'] or index['unsorted'])
+
+
+def dedupe_ohlcv(df: pd.DataFrame, keep: str = 'last') -> pd.DataFrame:
+    """
+    Sort candles by open time and drop duplicate timestamps (keep='last' prefers the
+    most recently fetched page). Returns the input unchanged when already clean.
+    """
+    ts = ohlcv_timestamps_ms(df)
+    if len(ts) < 2 or (np.diff(ts) > 0).all():
+        return df
+    order = np.argsort(ts, kind='stable')
+    ts_sorted = ts[order]
+    if keep == 'last':
+        keep_mask = np.append(ts_sorted[1:] != ts_sorted[:-1], True)
+    else:
+        keep_mask = np.insert(ts_sorted[1:] != ts_sorted[:-1], 0, True)
+    return df.iloc[order[keep_mask]]
+
+
+def ohlcv_rows_to_frame(rows) -> pd.DataFrame:
+    """CCXT rows [[ts, o, h, l, c, v], ...] -> DataFrame indexed by 'datetime' (same layout as data_collector)."""
+    df = pd.DataFrame(rows, columns=OHLCV_COLUMNS)
+    df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index('datetime', inplace=True)
+    return df
+
+
+def repair_ohlcv(df: pd.DataFrame, timeframe: str,
+                 fetch_range: Optional[Callable[[int, int], object]] = None,
+                 index: Optional[dict] = None) -> tuple:
+    """
+    Repair a dataset: dedupe, then re-fetch only the missing ranges.
+    fetch_range(start_ms, end_ms) returns CCXT rows or a DataFrame covering the inclusive range.
+    Returns (repaired_df, index_after). Gaps the exchange cannot fill remain in index_after.
+    """
+    index = index or build_integrity_index(df, timeframe)
+    if index['duplicates'] or index['unsorted']:
+        df = dedupe_ohlcv(df)
+
+    if fetch_range is not None and index['gaps']:
+        patches = []
+        for gap in index['gaps']:
+            fetched = fetch_range(gap['start'], gap['end'])
+            if fetched is None or len(fetched) == 0:
+                logger.warning(f"Gap {gap['start']}..{gap['end']} not refillable ({gap['missing_bars']} bars)")
+                continue
+            patch = fetched if isinstance(fetched, pd.DataFrame) else ohlcv_rows_to_frame(fetched)
+            patch_ts = ohlcv_timestamps_ms(patch)
+            patches.append(patch[(patch_ts >= gap['start']) & (patch_ts <= gap['end'])])
+        if patches:
+            if 'timestamp' not in df.columns:
+                patches = [p.drop(columns=['timestamp'], errors='ignore') for p in patches]
+            df = dedupe_ohlcv(pd.concat([df] + patches))
+
+    return df, build_integrity_index(df, timeframe)
+
+
+def load_catalog(catalog_path: str = DEFAULT_CATALOG_PATH) -> dict:
+    """Load the dataset catalog (dataset key -> integrity index). Empty dict if missing."""
+    if not os.path.exists(catalog_path):
+        return {}
+    with open(catalog_path) as f:
+        return json.load(f)
+
+
+def update_catalog(dataset_key: str, index: dict, catalog_path: str = DEFAULT_CATALOG_PATH) -> dict:
+    """Store the integrity index for dataset_key (e.g. the CSV path). Written atomically."""
+    catalog = load_catalog(catalog_path)
+    catalog[dataset_key] = index
+    directory = os.path.dirname(catalog_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{catalog_path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(catalog, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, catalog_path)
+    return catalog
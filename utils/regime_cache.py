@@ -0,0 +1,118 @@
+"""
+Per-pair append-only cache of the regime column.
+BaseStrategy used to run detector.predict() (features + full Viterbi) over the whole dataframe
+on every candle. RegimeColumnCache decodes the full history once, then for each new candle
+advances the streaming features, the forward filter and the Viterbi max-product recursion by
+one step and appends that candle's label. The newest label is the one a full decode of the
+same history ends in; older rows keep the label they had when they were newest.
+History that no longer lines up with the cache (candles rewritten or missing, a new model)
+triggers a full recompute.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+try:
+    from utils.regime_detector import OnlineRegimeFilter
+    from utils.indicator_engine import same_values, timestamps_ns
+except ImportError:
+    from regime_detector import OnlineRegimeFilter
+    from indicator_engine import same_values, timestamps_ns
+
+logger = logging.getLogger(__name__)
+
+
+def _hlc(price_df: pd.DataFrame) -> list:
+    """high, low, close as float64 arrays (views of the frame's data for float64 columns)."""
+    cols = {c.lower(): c for c in price_df.columns}
+    return [price_df[cols[c]].to_numpy(dtype=np.float64) for c in ('high', 'low', 'close')]
+
+
+class RegimeColumnCache:
+    """
+    Regime labels for one pair and one fitted detector. column(dataframe) returns the label
+    per row (NaN during indicator warm-up), computing only rows newer than the cache; the
+    dataframe may be a rolling window (rows dropping off the front are fine).
+    `filter` is the pair's OnlineRegimeFilter, kept at the same candle.
+    """
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.model = detector.model
+        self.filter = OnlineRegimeFilter(detector)
+        with np.errstate(divide='ignore'):
+            self._log_startprob = np.log(self.model.startprob_)
+            self._log_transmat = np.log(self.model.transmat_)
+        self._state_labels = np.array(self.filter.labels, dtype=object)
+        self._delta = None
+        self._ts = None
+        self._hlc = None
+        self._labels = None
+        self.full_recomputes = 0
+        self.appended = 0
+
+    def _viterbi_step(self, log_emission: np.ndarray) -> int:
+        """Advance the max-product recursion one candle; returns the most likely current state."""
+        if self._delta is None:
+            delta = self._log_startprob + log_emission
+        else:
+            delta = (self._delta[:, None] + self._log_transmat).max(axis=0) + log_emission
+        self._delta = delta - delta.max()   # shift keeps the argmax and avoids underflow
+        return int(self._delta.argmax())
+
+    def _overlap(self, ts: np.ndarray, hlc: list):
+        """(first cached row, rows already cached) when price_df continues the cache, else None."""
+        if self._ts is None or len(ts) == 0:
+            return None
+        first = int(np.searchsorted(self._ts, ts[0]))
+        if first >= len(self._ts) or self._ts[first] != ts[0]:
+            return None
+        cached = len(self._ts) - first
+        if cached > len(ts) or not np.array_equal(ts[:cached], self._ts[first:]):
+            return None
+        for j, column in enumerate(hlc):
+            if not same_values(column[:cached], self._hlc[first:, j]):
+                return None
+        return first, cached
+
+    def _recompute(self, price_df: pd.DataFrame, indicators=None) -> np.ndarray:
+        features, df = self.detector.prepare_features(price_df, fit_scaler=False, indicators=indicators)
+        labels = np.full(len(price_df), np.nan, dtype=object)
+        self._delta = None
+        if len(features):
+            states = self.model.predict(features)
+            positions = price_df.index.get_indexer(df.index)
+            labels[positions] = self._state_labels[states]
+            for log_b in self.filter._log_emission(features):
+                self._viterbi_step(log_b)
+        self.filter.warm_start(price_df)
+        self.full_recomputes += 1
+        logger.debug(f"Regime column recomputed over {len(price_df)} rows")
+        return labels
+
+    def column(self, price_df: pd.DataFrame, indicators=None) -> np.ndarray:
+        """Regime label for every row of price_df (indicators: IndicatorFrame used on a full recompute)."""
+        ts = timestamps_ns(price_df['date'] if 'date' in price_df.columns else price_df.index)
+        hlc = _hlc(price_df)
+        overlap = self._overlap(ts, hlc)
+        if overlap is None:
+            labels = self._recompute(price_df, indicators)
+            cached_hlc = np.column_stack(hlc)
+        else:
+            first, cached = overlap
+            new_rows = np.column_stack([column[cached:] for column in hlc])
+            new = np.full(len(new_rows), np.nan, dtype=object)
+            for i, (high, low, close) in enumerate(new_rows.tolist()):
+                self.filter.update({'high': high, 'low': low, 'close': close, 'date': ts[cached + i]})
+                if self.filter.last_log_emission is not None:
+                    new[i] = self._state_labels[self._viterbi_step(self.filter.last_log_emission)]
+            self.appended += len(new)
+            labels = np.concatenate([self._labels[first:], new])
+            cached_hlc = np.concatenate([self._hlc[first:], new_rows])
+        self._ts, self._hlc, self._labels = ts, cached_hlc, labels
+        return labels
+
+    def filtered_regime(self) -> str:
+        """Forward-filtered (causal) label at the last processed candle."""
+        return self.filter.state()['regime']
@@ -2,9 +2,21 @@ import numpy as np
 import pandas as pd
 from hmmlearn.hmm import GaussianHMM
 from sklearn.preprocessing import StandardScaler
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 import logging
+import os
+import pickle
 import warnings
-import talib.abstract as ta
+
+try:
+    from utils.regime_features import compute_regime_features, StreamingRegimeFeatures, FEATURE_COLUMNS
+except ImportError:
+    from regime_features import compute_regime_features, StreamingRegimeFeatures, FEATURE_COLUMNS
+try:
+    from utils.shared_frames import SharedFrameStore, resolve_frame
+except ImportError:
+    from shared_frames import SharedFrameStore, resolve_frame
 
 # Suppress warnings from hmmlearn/sklearn if needed
 warnings.filterwarnings("ignore", category=UserWarning)
@@ -12,6 +24,114 @@ warnings.filterwarnings("ignore", category=UserWarning)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump when prepare_features changes so cached models are not reused across feature sets
+FEATURE_VERSION = 3
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODEL_CACHE_DIR = os.environ.get('REGIME_MODEL_CACHE_DIR',
+                                         os.path.join(PROJECT_ROOT, 'data', 'regime_models'))
+
+
+def data_fingerprint(price_df):
+    """Content hash of the OHLC columns the features are built from (plus length and time range)."""
+    cols = {c.lower(): c for c in price_df.columns}
+    used = [cols[c] for c in ('open', 'high', 'low', 'close') if c in cols]
+    values = np.ascontiguousarray(price_df[used].to_numpy(dtype=np.float64))
+    h = hashlib.sha1(values.tobytes())
+    if len(price_df) > 0:
+        h.update(f"{price_df.index[0]}|{price_df.index[-1]}|{len(price_df)}".encode())
+    return h.hexdigest()
+
+
+def _new_hmm(n_regimes, random_state, init_params='stmc'):
+    return GaussianHMM(
+        n_components=n_regimes,
+        covariance_type="full",
+        n_iter=1000, # More iterations for convergence
+        tol=0.01,
+        random_state=random_state,
+        init_params=init_params,
+    )
+
+
+def _fit_hmm_restart(features, n_regimes, random_state):
+    """Fit one randomly initialised HMM; returns (log-likelihood, model). Process-pool safe."""
+    model = _new_hmm(n_regimes, random_state)
+    model.fit(features)
+    return model.score(features), model
+
+
+def _warm_start_hmm(features, n_regimes, random_state, params):
+    """Fit an HMM initialised from a previous window's parameters (already in this scaler space)."""
+    model = _new_hmm(n_regimes, random_state, init_params='')
+    model.startprob_ = params['startprob']
+    model.transmat_ = params['transmat']
+    model.means_ = params['means']
+    model.covars_ = params['covars']
+    model.fit(features)
+    return model.score(features), model
+
+
+def _model_fingerprint(detector):
+    """Short hash of a fitted detector's parameters (cache-key component for warm starts)."""
+    h = hashlib.sha1()
+    for arr in (detector.model.means_, detector.model.covars_, detector.model.transmat_,
+                detector.scaler.mean_, detector.scaler.scale_):
+        h.update(np.ascontiguousarray(arr, dtype=np.float64).tobytes())
+    return h.hexdigest()[:16]
+
+
+def _fit_many_worker(symbol, frame, n_regimes, random_state, timeframe, use_cache):
+    """Fit one symbol (frame: DataFrame or SharedFrameHandle). Returns (symbol, detector, labels)."""
+    df = resolve_frame(frame)
+    det = CryptoRegimeDetector(n_regimes=n_regimes, random_state=random_state)
+    if use_cache:
+        fitted = det.fit_cached(df, symbol=symbol, timeframe=timeframe)
+    else:
+        fitted = det.fit(df)
+    if fitted is None or det.model is None:
+        return symbol, None, None
+    return symbol, det, fitted['regime_label']
+
+
+class RegimeModelCache:
+    """
+    On-disk cache of fitted detectors keyed by (symbol, timeframe, window range + data hash,
+    n_regimes, random_state, feature version). Files are written atomically so several
+    processes can share one cache directory.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or DEFAULT_MODEL_CACHE_DIR
+
+    def key(self, price_df, n_regimes, random_state, symbol=None, timeframe=None, variant=''):
+        """variant distinguishes non-default fits (restarts, warm start); '' keeps the plain key."""
+        start = price_df.index[0] if len(price_df) else ''
+        end = price_df.index[-1] if len(price_df) else ''
+        parts = [symbol or '', timeframe or '', start, end, n_regimes, random_state,
+                 FEATURE_VERSION, data_fingerprint(price_df)]
+        if variant:
+            parts.append(variant)
+        raw = "|".join(str(p) for p in parts)
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"regime_{key}.pkl")
+
+    def get(self, key):
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            return CryptoRegimeDetector.load(path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable regime model {path}: {e}")
+            return None
+
+    def put(self, key, detector):
+        return detector.save(self.path(key))
+
+
 class CryptoRegimeDetector:
     def __init__(self, n_regimes=4, random_state=42):
         self.n_regimes = n_regimes
@@ -20,46 +140,108 @@ class CryptoRegimeDetector:
         self.scaler = StandardScaler()
         self.regime_labels = {}
 
-    def prepare_features(self, price_df, fit_scaler=False):
+    def save(self, path):
+        """Persist fitted HMM + scaler + regime labels (atomic write)."""
+        if self.model is None:
+            raise ValueError("Model not fitted. Call fit() first.")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            'feature_version': FEATURE_VERSION,
+            'n_regimes': self.n_regimes,
+            'random_state': self.random_state,
+            'model': self.model,
+            'scaler': self.scaler,
+            'regime_labels': {int(k): v for k, v in self.regime_labels.items()},
+        }
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Load a detector saved with save(). Rejects models built with another feature version."""
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        if state.get('feature_version') != FEATURE_VERSION:
+            raise ValueError(f"Regime model {path} has feature version {state.get('feature_version')}, "
+                             f"expected {FEATURE_VERSION}")
+        det = cls(n_regimes=state['n_regimes'], random_state=state['random_state'])
+        det.model = state['model']
+        det.scaler = state['scaler']
+        det.regime_labels = state['regime_labels']
+        return det
+
+    @classmethod
+    def fit_many(cls, frames, n_jobs=1, n_regimes=4, random_state=42, timeframe=None, use_cache=False):
+        """
+        Fit one detector per symbol. frames: {symbol: price DataFrame}.
+        n_jobs > 1 fans out to a process pool; price data is published once to shared memory.
+        Returns (detectors {symbol: detector or None}, panel DataFrame of regime labels
+        indexed by timestamp with one column per symbol).
+        """
+        if n_jobs > 1 and len(frames) > 1:
+            with SharedFrameStore() as store:
+                handles = {sym: store.publish(df) for sym, df in frames.items()}
+                with ProcessPoolExecutor(max_workers=min(n_jobs, len(frames))) as pool:
+                    futures = [pool.submit(_fit_many_worker, sym, handle, n_regimes, random_state,
+                                           timeframe, use_cache) for sym, handle in handles.items()]
+                    results = [f.result() for f in futures]
+        else:
+            results = [_fit_many_worker(sym, df, n_regimes, random_state, timeframe, use_cache)
+                       for sym, df in frames.items()]
+
+        detectors = {sym: det for sym, det, _ in results}
+        labels = {sym: lab for sym, _, lab in results if lab is not None}
+        panel = pd.DataFrame(labels) if labels else pd.DataFrame()
+        for sym in frames:
+            if sym not in panel.columns:
+                panel[sym] = pd.Series(dtype=object)
+        return detectors, panel[list(frames)]
+
+    def fit_cached(self, price_df, symbol=None, timeframe=None, cache=None,
+                   n_restarts=1, n_jobs=1, warm_start=None):
+        """
+        fit() through the model cache: identical (data, config) fits are trained once and reused
+        across processes and runs. Returns the same frame fit() would.
+        """
+        cache = cache or RegimeModelCache()
+        variant = ''
+        if n_restarts > 1:
+            variant += f"restarts={n_restarts}"
+        if warm_start is not None and warm_start.model is not None:
+            variant += f"warm={_model_fingerprint(warm_start)}"
+        key = cache.key(price_df, self.n_regimes, self.random_state, symbol, timeframe, variant)
+        cached = cache.get(key)
+        if cached is not None:
+            self.model = cached.model
+            self.scaler = cached.scaler
+            self.regime_labels = cached.regime_labels
+            return self.predict(price_df)
+
+        result = self.fit(price_df, n_restarts=n_restarts, n_jobs=n_jobs, warm_start=warm_start)
+        if result is not None and self.model is not None:
+            try:
+                cache.put(key, self)
+            except OSError as e:
+                logger.warning(f"Could not cache regime model: {e}")
+        return result
+
+    def prepare_features(self, price_df, fit_scaler=False, indicators=None):
         """
         Features for regime detection (v3 - Standardized & Trend Aware):
         1. Log Returns (Statistical stability)
         2. Rolling Volatility (14d)
         3. ADX (Trend Strength) - Distinguishes Sideways vs Trend
         4. Trend Position (Close / SMA200) - Distinguishes Highs from Lows
+        Batch path; StreamingRegimeFeatures produces the same rows incrementally.
+        indicators: optional IndicatorFrame over price_df (shared ADX/SMA200 columns).
         """
-        df = price_df.copy()
-        
-        # Ensure we have required columns
-        df.columns = [c.lower() for c in df.columns]
-        
-        required_cols = ['open', 'high', 'low', 'close', 'volume']
-        missing = [c for c in required_cols if c not in df.columns]
-        if missing:
-             if 'adx' in str(missing):
-                  logger.warning(f"Missing columns for ADX: {missing}.")
-        
-        # 1. Log Returns
-        df['log_ret'] = np.log(df['close'] / df['close'].shift(1))
-        
-        # 2. Volatility (from log returns)
-        df['volatility'] = df['log_ret'].rolling(window=14).std()
-        
-        # 3. ADX (Trend Strength)
-        try:
-            df['adx'] = ta.ADX(df, timeperiod=14)
-        except Exception as e:
-            logger.warning(f"Could not calculate ADX: {e}. Using proxy.")
-            df['adx'] = 0 
-            
-        # 4. Trend Position (Ratio to SMA200)
-        # Helps distinguish "Volatile Bull (ATH)" from "Volatile Bear (Crash)"
-        try:
-            sma200 = ta.SMA(df, timeperiod=200)
-            df['trend_pos'] = df['close'] / sma200
-        except:
-            df['trend_pos'] = 1.0
-            
+        df = compute_regime_features(price_df, indicators=indicators)
+
         # Drop NaN values created by indicators
         df.dropna(inplace=True)
         
@@ -67,8 +249,7 @@ class CryptoRegimeDetector:
              return np.array([]), df
 
         # Select features
-        feature_cols = ['log_ret', 'volatility', 'adx', 'trend_pos']
-        raw_features = df[feature_cols].values
+        raw_features = df[FEATURE_COLUMNS].values
         
         # Standardize Features (Critical for HMM)
         if fit_scaler:
@@ -78,12 +259,30 @@ class CryptoRegimeDetector:
         
         return scaled_features, df
 
-    def fit(self, price_df):
-        """Train HMM on historical data"""
+    def fit(self, price_df, n_restarts=1, n_jobs=1, warm_start=None):
+        """
+        Train HMM on historical data.
+        n_restarts > 1 fits that many random initialisations (seeds random_state + k, across
+        n_jobs processes) and keeps the best log-likelihood. warm_start=<fitted detector>
+        initialises EM from its parameters mapped into this window's scaler space, so a rolling
+        refit converges in a few iterations; it competes with the random restarts on likelihood.
+        """
         if len(price_df) < 200: # Increased requirement for SMA200
             logger.warning("Insufficient data to train HMM. Need at least 200 data points.")
             return None
 
+        warm_params = None
+        if warm_start is not None and warm_start.model is not None \
+                and warm_start.model.n_components == self.n_regimes:
+            old_mean = np.array(warm_start.scaler.mean_, copy=True)
+            old_scale = np.array(warm_start.scaler.scale_, copy=True)
+            warm_params = {
+                'startprob': np.array(warm_start.model.startprob_, copy=True),
+                'transmat': np.array(warm_start.model.transmat_, copy=True),
+                'means': np.array(warm_start.model.means_, copy=True),
+                'covars': np.array(warm_start.model.covars_, copy=True),
+            }
+
         # Prepare and Fit Scaler
         features, df = self.prepare_features(price_df, fit_scaler=True)
         
@@ -91,14 +290,34 @@ class CryptoRegimeDetector:
              logger.warning("No features could be generated from data.")
              return None
 
-        self.model = GaussianHMM(
-            n_components=self.n_regimes,
-            covariance_type="full",
-            n_iter=1000, # More iterations for convergence
-            tol=0.01,
-            random_state=self.random_state
-        )
-        self.model.fit(features)
+        if n_restarts <= 1 and warm_params is None:
+            self.model = _new_hmm(self.n_regimes, self.random_state)
+            self.model.fit(features)
+        else:
+            candidates = []
+            # warm start alone replaces the single random init; extra restarts compete with it
+            n_random = n_restarts if (warm_params is None or n_restarts > 1) else 0
+            if warm_params is not None:
+                # x_new = (x_old * s_old + mu_old - mu_new) / s_new ; cov_new = D cov_old D, D = s_old / s_new
+                new_mean, new_scale = self.scaler.mean_, self.scaler.scale_
+                ratio = old_scale / new_scale
+                warm_params['means'] = (warm_params['means'] * old_scale + old_mean - new_mean) / new_scale
+                warm_params['covars'] = warm_params['covars'] * np.outer(ratio, ratio)
+                try:
+                    candidates.append(_warm_start_hmm(features, self.n_regimes, self.random_state, warm_params))
+                except Exception as e:
+                    logger.warning(f"Warm-start fit failed ({e}); using random restarts")
+                    n_random = max(n_random, 1)
+            seeds = [self.random_state + k for k in range(n_random)]
+            if n_jobs > 1 and len(seeds) > 1:
+                with ProcessPoolExecutor(max_workers=min(n_jobs, len(seeds))) as pool:
+                    candidates += list(pool.map(_fit_hmm_restart, [features] * len(seeds),
+                                                [self.n_regimes] * len(seeds), seeds))
+            else:
+                candidates += [_fit_hmm_restart(features, self.n_regimes, seed) for seed in seeds]
+            # max() keeps the first candidate on ties -> deterministic choice
+            best_score, self.model = max(candidates, key=lambda c: c[0])
+            logger.debug(f"HMM fit: {len(candidates)} candidates, best log-likelihood {best_score:.2f}")
         
         # Decode states
         states = self.model.predict(features)
@@ -189,3 +408,126 @@ class CryptoRegimeDetector:
         last_feature = features[-1].reshape(1, -1)
         state = self.model.predict(last_feature)
         return self.regime_labels.get(state[0], 'UNKNOWN')
+
+    def predict_filtered(self, price_df):
+        """
+        Causal counterpart of predict(): each bar is labelled from the forward-filtered
+        probabilities P(state_t | obs_1..t), so no label depends on later bars.
+        """
+        if self.model is None:
+            raise ValueError("Model not fitted. Call fit() first.")
+        features, df = self.prepare_features(price_df, fit_scaler=False)
+        if len(features) == 0:
+            return df
+        alphas = OnlineRegimeFilter(self).forward(features)
+        df['regime'] = alphas.argmax(axis=1)
+        df['regime_label'] = df['regime'].map(self.regime_labels)
+        df['regime_prob'] = alphas.max(axis=1)
+        return df
+
+
+class OnlineRegimeFilter:
+    """
+    Live regime state for one pair. Keeps the HMM forward (filtered) distribution and
+    advances it in O(n_regimes^2) per new bar instead of re-decoding the full history.
+    Features come from StreamingRegimeFeatures, so each new candle costs O(1).
+    """
+
+    MAX_CATCHUP = 5     # more new bars than this at once -> warm start again
+
+    def __init__(self, detector):
+        if detector.model is None:
+            raise ValueError("Model not fitted. Call fit() first.")
+        self.detector = detector
+        self.model = detector.model
+        self.labels = [detector.regime_labels.get(i, 'UNKNOWN') for i in range(self.model.n_components)]
+
+        self._startprob = self.model.startprob_
+        self._transmat = self.model.transmat_
+        self._means = self.model.means_
+        covars = self.model.covars_
+        self._inv_covars = np.linalg.inv(covars)
+        _, logdet = np.linalg.slogdet(covars)
+        n_features = self._means.shape[1]
+        self._log_norm = -0.5 * (n_features * np.log(2 * np.pi) + logdet)
+        self._scale_mean = detector.scaler.mean_
+        self._scale = detector.scaler.scale_
+
+        self.alpha = None
+        self.last_ts = None
+        self.features = None
+        self.last_log_emission = None   # per-state log-density of the last updated candle
+
+    def _log_emission(self, features):
+        """Gaussian log-density of each row under each state, shape (T, n_regimes)."""
+        diff = features[:, None, :] - self._means[None, :, :]
+        maha = np.einsum('tnd,nde,tne->tn', diff, self._inv_covars, diff)
+        return self._log_norm - 0.5 * maha
+
+    def _step(self, alpha_prev, log_b):
+        b = np.exp(log_b - log_b.max())
+        pred = self._startprob if alpha_prev is None else alpha_prev @ self._transmat
+        alpha = pred * b
+        total = alpha.sum()
+        if not np.isfinite(total) or total <= 0:
+            return b / b.sum()
+        return alpha / total
+
+    def forward(self, features):
+        """Filtered state probabilities for every row of scaled features, shape (T, n_regimes)."""
+        log_b = self._log_emission(np.atleast_2d(features))
+        alphas = np.empty_like(log_b)
+        alpha = None
+        for t in range(len(log_b)):
+            alpha = self._step(alpha, log_b[t])
+            alphas[t] = alpha
+        return alphas
+
+    @staticmethod
+    def _timestamps(price_df):
+        return pd.Index(price_df['date']) if 'date' in price_df.columns else price_df.index
+
+    def warm_start(self, price_df):
+        """Run the forward pass over price_df and replay it into the streaming feature state."""
+        features, _ = self.detector.prepare_features(price_df, fit_scaler=False)
+        self.alpha = self.forward(features)[-1] if len(features) else None
+        self.last_ts = self._timestamps(price_df)[-1] if len(price_df) else None
+        self.features = StreamingRegimeFeatures()
+        self.features.warm(price_df)
+        return self.state()
+
+    def update(self, candle):
+        """Advance the filter by one closed candle (Series or dict with OHLCV and optional 'date')."""
+        if self.features is None:
+            raise ValueError("Call warm_start() before update().")
+        get = candle.get
+        row = self.features.update(get('high', get('High')), get('low', get('Low')), get('close', get('Close')))
+        self.last_ts = get('date', getattr(candle, 'name', None))
+        self.last_log_emission = None
+        if row is not None and np.isfinite(row).all():
+            scaled = (row - self._scale_mean) / self._scale
+            self.last_log_emission = self._log_emission(scaled[None, :])[0]
+            self.alpha = self._step(self.alpha, self.last_log_emission)
+        return self.state()
+
+    def sync(self, price_df):
+        """Bring the filter up to the last row of price_df (update for a few new bars, else warm start)."""
+        if self.alpha is None or self.last_ts is None or len(price_df) == 0:
+            return self.warm_start(price_df)
+        start = self._timestamps(price_df).searchsorted(self.last_ts, side='right')
+        new_rows = len(price_df) - start
+        if new_rows > self.MAX_CATCHUP:
+            return self.warm_start(price_df)
+        for i in range(start, len(price_df)):
+            self.update(price_df.iloc[i])
+        return self.state()
+
+    def state(self):
+        """Current label, state index and posterior probabilities aggregated by label."""
+        if self.alpha is None:
+            return {'regime': 'UNKNOWN', 'state': None, 'probabilities': {}}
+        probabilities = {}
+        for label, p in zip(self.labels, self.alpha):
+            probabilities[label] = probabilities.get(label, 0.0) + float(p)
+        state = int(self.alpha.argmax())
+        return {'regime': self.labels[state], 'state': state, 'probabilities': probabilities}
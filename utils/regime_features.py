@@ -0,0 +1,187 @@
+"""
+Regime detection features (v3): log return, 14-bar volatility, ADX(14), close / SMA200.
+compute_regime_features is the batch path used for fitting and backtests;
+StreamingRegimeFeatures keeps rolling state and emits one feature row per new candle
+in O(1), matching the batch values (TA-Lib ADX/SMA) to floating-point precision.
+"""
+import logging
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import talib.abstract as ta
+
+logger = logging.getLogger(__name__)
+
+FEATURE_COLUMNS = ['log_ret', 'volatility', 'adx', 'trend_pos']
+
+VOLATILITY_WINDOW = 14
+ADX_PERIOD = 14
+SMA_PERIOD = 200
+
+
+def compute_regime_features(price_df: pd.DataFrame, copy: bool = True, indicators=None) -> pd.DataFrame:
+    """
+    Add the feature columns to a lowercase-column copy of price_df (NaN warm-up rows kept).
+    Callers drop the warm-up rows themselves. indicators (an IndicatorFrame over price_df)
+    supplies ADX and SMA200 from the shared indicator cache instead of computing them here.
+    The copy is shallow: only new columns and the renamed index are added, the price
+    columns are shared with price_df.
+    """
+    df = price_df.copy(deep=False) if copy else price_df
+    df.columns = [c.lower() for c in df.columns]
+
+    required_cols = ['open', 'high', 'low', 'close', 'volume']
+    missing = [c for c in required_cols if c not in df.columns]
+    if missing:
+        logger.warning(f"Missing columns for regime features: {missing}.")
+
+    # 1. Log Returns
+    df['log_ret'] = np.log(df['close'] / df['close'].shift(1))
+
+    # 2. Volatility (from log returns)
+    df['volatility'] = df['log_ret'].rolling(window=VOLATILITY_WINDOW).std()
+
+    # 3. ADX (Trend Strength)
+    try:
+        if indicators is not None:
+            df['adx'] = indicators.get('adx', timeperiod=ADX_PERIOD)
+        else:
+            df['adx'] = ta.ADX(df, timeperiod=ADX_PERIOD)
+    except Exception as e:
+        logger.warning(f"Could not calculate ADX: {e}. Using proxy.")
+        df['adx'] = 0
+
+    # 4. Trend Position (Ratio to SMA200)
+    try:
+        if indicators is not None:
+            sma200 = indicators.get('sma', timeperiod=SMA_PERIOD)
+        else:
+            sma200 = ta.SMA(df, timeperiod=SMA_PERIOD)
+        df['trend_pos'] = df['close'] / sma200
+    except Exception:
+        df['trend_pos'] = 1.0
+
+    return df
+
+
+def _is_zero(value: float) -> bool:
+    # TA-Lib's TA_IS_ZERO
+    return -1e-8 < value < 1e-8
+
+
+class StreamingADX:
+    """
+    TA-Lib ADX (TA_ADX) one candle at a time: Wilder-smoothed +DM/-DM/TR sums, DX
+    averaged over the first `period` values, then Wilder-smoothed. Reproduces ta.ADX
+    from the same starting candle.
+    """
+
+    def __init__(self, period: int = ADX_PERIOD):
+        self.period = period
+        self.n = 0
+        self.prev_high = None
+        self.prev_low = None
+        self.prev_close = None
+        self.plus_dm = 0.0
+        self.minus_dm = 0.0
+        self.tr = 0.0
+        self.sum_dx = 0.0
+        self.adx = np.nan
+
+    def update(self, high: float, low: float, close: float) -> float:
+        n, period = self.n, self.period
+        self.n += 1
+        if n == 0:
+            self.prev_high, self.prev_low, self.prev_close = high, low, close
+            return np.nan
+
+        diff_p = high - self.prev_high
+        diff_m = self.prev_low - low
+        true_range = max(high, self.prev_close) - min(low, self.prev_close)
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+
+        if n >= period:
+            self.minus_dm -= self.minus_dm / period
+            self.plus_dm -= self.plus_dm / period
+        if diff_m > 0 and diff_p < diff_m:
+            self.minus_dm += diff_m
+        elif diff_p > 0 and diff_p > diff_m:
+            self.plus_dm += diff_p
+        if n >= period:
+            self.tr = self.tr - self.tr / period + true_range
+        else:
+            self.tr += true_range
+            return np.nan
+
+        dx = None
+        if not _is_zero(self.tr):
+            minus_di = 100.0 * (self.minus_dm / self.tr)
+            plus_di = 100.0 * (self.plus_dm / self.tr)
+            di_sum = minus_di + plus_di
+            if not _is_zero(di_sum):
+                dx = 100.0 * (abs(minus_di - plus_di) / di_sum)
+
+        last_seed = 2 * period - 1
+        if n < last_seed:
+            self.sum_dx += dx or 0.0
+            return np.nan
+        if n == last_seed:
+            self.sum_dx += dx or 0.0
+            self.adx = self.sum_dx / period
+        elif dx is not None:
+            self.adx = (self.adx * (period - 1) + dx) / period
+        return self.adx
+
+
+class StreamingRegimeFeatures:
+    """
+    Incremental feature builder for one pair.
+    Ring buffers hold the volatility window and SMA200 window (running sum for the SMA);
+    ADX runs through StreamingADX, so the stream reproduces ta.ADX from the same
+    starting candle.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self._prev_close = None
+        self._returns = deque(maxlen=VOLATILITY_WINDOW)
+        self._closes = deque(maxlen=SMA_PERIOD)
+        self._close_sum = 0.0
+        self._adx = StreamingADX(ADX_PERIOD)
+
+    def update(self, high: float, low: float, close: float):
+        """
+        Consume one closed candle. Returns the feature row [log_ret, volatility, adx, trend_pos]
+        as a float array, or None while indicators are still warming up.
+        """
+        high, low, close = float(high), float(low), float(close)
+        log_ret = np.nan if self._prev_close is None else np.log(close / self._prev_close)
+        if self._prev_close is not None:
+            self._returns.append(log_ret)
+        adx = self._adx.update(high, low, close)
+
+        if len(self._closes) == SMA_PERIOD:
+            self._close_sum -= self._closes[0]
+        self._closes.append(close)
+        self._close_sum += close
+
+        self._prev_close = close
+        self.n += 1
+
+        if len(self._closes) < SMA_PERIOD or len(self._returns) < VOLATILITY_WINDOW or np.isnan(adx):
+            return None
+        volatility = float(np.std(self._returns, ddof=1))
+        trend_pos = close / (self._close_sum / SMA_PERIOD)
+        return np.array([log_ret, volatility, adx, trend_pos])
+
+    def warm(self, price_df: pd.DataFrame):
+        """Replay history; returns the last feature row (or None)."""
+        cols = {c.lower(): c for c in price_df.columns}
+        highs = price_df[cols['high']].to_numpy(dtype=np.float64)
+        lows = price_df[cols['low']].to_numpy(dtype=np.float64)
+        closes = price_df[cols['close']].to_numpy(dtype=np.float64)
+        row = None
+        for h, l, c in zip(highs, lows, closes):
+            row = self.update(h, l, c)
+        return row
@@ -0,0 +1,139 @@
+"""
+Regime Master Switch rules as data.
+The gating table (strategy x regime -> allowed sides, plus size multipliers) is declarative and
+can be overridden from config; RegimeGatingMatrix compiles it into integer lookup arrays so a
+single check is an array index and whole regime series are gated in one NumPy operation.
+"""
+import json
+import logging
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+REGIMES = ['BULL', 'SIDEWAYS', 'BEAR', 'TRANSITION']
+
+# Allowed sides per strategy and regime: 'both' | 'long' | 'short' | 'none'.
+# Regimes not listed (TRANSITION, UNKNOWN) allow both sides; unknown strategies are never gated.
+DEFAULT_GATING_TABLE = {
+    'rules': {
+        'S1': {'BULL': 'both', 'SIDEWAYS': 'both', 'BEAR': 'none'},    # Weekend momentum: off in bear
+        'S2': {'BULL': 'long', 'SIDEWAYS': 'both', 'BEAR': 'short'},   # Funding reversion: with the trend
+        'S3': {'BULL': 'long', 'SIDEWAYS': 'both', 'BEAR': 'short'},   # Unlocks: longs in bull, shorts in bear
+        'S4': {'BULL': 'both', 'SIDEWAYS': 'both', 'BEAR': 'both'},    # Cascade: used as a filter
+        'S5': {'BULL': 'none', 'SIDEWAYS': 'both', 'BEAR': 'both'},    # Grid: inactive in bull trends
+    },
+    # Position size multipliers; '*' applies to every strategy, specific entries override it
+    'size_multipliers': {
+        '*': {'TRANSITION': 0.5},
+        'S5': {'BEAR': 0.5},   # cash-preservation
+    },
+}
+
+_SIDES = {'both': (1, 1), 'long': (1, 0), 'short': (0, 1), 'none': (0, 0)}
+_STRATEGIES = ['S1', 'S2', 'S3', 'S4', 'S5']
+
+
+def resolve_strategy_id(strategy_id) -> Optional[str]:
+    """Map a class name (WeekendMomentum, FundingReversion, ...) or S1-S5 to its S-id; None if ungated."""
+    sid = str(strategy_id).upper()
+    if 'WEEKEND' in sid or sid == 'S1':
+        return 'S1'
+    if 'FUNDING' in sid or sid == 'S2':
+        return 'S2'
+    if 'UNLOCK' in sid or sid == 'S3':
+        return 'S3'
+    if 'CASCADE' in sid or sid == 'S4':
+        return 'S4'
+    if 'REGIME' in sid and 'GRID' in sid or sid == 'S5':
+        return 'S5'
+    return None
+
+
+class RegimeGatingMatrix:
+    """
+    Compiled gating table.
+    allowed: int8 [strategy, regime, side] (side 0 = long, 1 = short);
+    multipliers: float64 [strategy, regime]. The last strategy row is the ungated default and
+    the last regime column catches UNKNOWN / unlisted regimes.
+    """
+
+    def __init__(self, table: Optional[dict] = None):
+        table = table or DEFAULT_GATING_TABLE
+        self.table = table
+        self.strategies = list(_STRATEGIES)
+        self.regimes = list(REGIMES)
+        n_s, n_r = len(self.strategies) + 1, len(self.regimes) + 1
+
+        self.allowed = np.ones((n_s, n_r, 2), dtype=np.int8)
+        for sid, rules in table.get('rules', {}).items():
+            row = self.strategies.index(sid)
+            for regime, sides in rules.items():
+                self.allowed[row, self.regimes.index(regime.upper())] = _SIDES[sides]
+
+        self.multipliers = np.ones((n_s, n_r), dtype=np.float64)
+        multipliers = table.get('size_multipliers', {})
+        for regime, mult in multipliers.get('*', {}).items():
+            self.multipliers[:, self.regimes.index(regime.upper())] = mult
+        for sid, overrides in multipliers.items():
+            if sid == '*':
+                continue
+            row = self.strategies.index(sid)
+            for regime, mult in overrides.items():
+                self.multipliers[row, self.regimes.index(regime.upper())] = mult
+
+        self._regime_index = {r: i for i, r in enumerate(self.regimes)}
+        self._regime_lookup = pd.Index(self.regimes)
+        self._strategy_rows = {}
+
+    @classmethod
+    def from_config(cls, spec: Union[None, str, dict]) -> 'RegimeGatingMatrix':
+        """spec: None (defaults), a table dict, or a path to a JSON file holding the table."""
+        if isinstance(spec, str):
+            with open(spec) as f:
+                spec = json.load(f)
+        return cls(spec)
+
+    def strategy_row(self, strategy_id) -> int:
+        row = self._strategy_rows.get(strategy_id)
+        if row is None:
+            sid = resolve_strategy_id(strategy_id) if strategy_id is not None else None
+            row = self.strategies.index(sid) if sid is not None else len(self.strategies)
+            self._strategy_rows[strategy_id] = row
+        return row
+
+    def regime_col(self, regime) -> int:
+        return self._regime_index.get(str(regime).upper(), len(self.regimes))
+
+    def regime_codes(self, regimes) -> np.ndarray:
+        """Column index for every label in a regime series/array (unknown and NaN -> last column)."""
+        labels = pd.Series(np.asarray(regimes, dtype=object)).str.upper()
+        codes = self._regime_lookup.get_indexer(labels)
+        codes[codes < 0] = len(self.regimes)
+        return codes
+
+    @staticmethod
+    def _side_index(side):
+        if np.ndim(side) == 0:
+            return 0 if str(side).lower() == 'long' else 1
+        return np.where(pd.Series(np.asarray(side, dtype=object)).str.lower().to_numpy() == 'long', 0, 1)
+
+    def is_allowed(self, strategy_id, regime, side) -> bool:
+        return bool(self.allowed[self.strategy_row(strategy_id), self.regime_col(regime), self._side_index(side)])
+
+    def multiplier(self, strategy_id, regime) -> float:
+        return float(self.multipliers[self.strategy_row(strategy_id), self.regime_col(regime)])
+
+    def allowed_mask(self, regime_series, strategy_id, side) -> np.ndarray:
+        """Boolean array: entry on `side` (scalar or per-row) allowed for each regime label."""
+        return self.allowed[self.strategy_row(strategy_id), self.regime_codes(regime_series),
+                            self._side_index(side)].astype(bool)
+
+    def size_multiplier(self, regime_series, strategy_id=None) -> np.ndarray:
+        """Position size multiplier for each regime label."""
+        return self.multipliers[self.strategy_row(strategy_id), self.regime_codes(regime_series)]
+
+
+REGIME_GATING = RegimeGatingMatrix()
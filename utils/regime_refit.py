@@ -0,0 +1,127 @@
+"""
+Background regime model refits.
+RegimeRefitScheduler retrains a CryptoRegimeDetector on the latest candles at a fixed cadence
+in a worker thread and swaps the fitted model in atomically, so the candle loop never waits
+on an HMM fit. Blocking mode (backtest/hyperopt) fits inline for reproducible results.
+"""
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import pandas as pd
+
+try:
+    from utils.regime_detector import CryptoRegimeDetector
+except ImportError:
+    from regime_detector import CryptoRegimeDetector
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFIT_INTERVAL_SEC = 7 * 24 * 3600
+
+_OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+
+class RegimeRefitScheduler:
+    """
+    Owns the current fitted detector. maybe_refit() submits a fit on a snapshot of the
+    candles when the cadence has elapsed and none is running; the new detector replaces
+    `detector` only once fitted. Until the first fit completes `detector` is None.
+    """
+
+    def __init__(self, n_regimes: int = 4, random_state: int = 42,
+                 refit_interval_sec: float = DEFAULT_REFIT_INTERVAL_SEC,
+                 blocking: bool = False, cache=None):
+        self.n_regimes = n_regimes
+        self.random_state = random_state
+        self.refit_interval_sec = refit_interval_sec
+        self.blocking = blocking
+        self.cache = cache
+
+        self.detector: Optional[CryptoRegimeDetector] = None
+        self.version = 0
+        self.last_fit_started = None
+        self.last_fit_duration = None
+
+        self._lock = threading.RLock()
+        self._pending = None
+        self._executor = None if blocking else ThreadPoolExecutor(max_workers=1, thread_name_prefix="regime-refit")
+
+    def is_due(self, now: Optional[float] = None) -> bool:
+        if self.last_fit_started is None:
+            return True
+        now = time.monotonic() if now is None else now
+        return now - self.last_fit_started >= self.refit_interval_sec
+
+    def maybe_refit(self, price_df: pd.DataFrame, symbol: Optional[str] = None,
+                    timeframe: Optional[str] = None, now: Optional[float] = None) -> bool:
+        """Start a refit if due and none is running. Returns True when a fit was started."""
+        with self._lock:
+            if self._pending is not None or not self.is_due(now):
+                return False
+            self.last_fit_started = time.monotonic() if now is None else now
+            cols = [c for c in price_df.columns if str(c).lower() in _OHLCV]
+            snapshot = price_df[cols].copy()
+            if self.blocking:
+                self._pending = True
+            else:
+                self._pending = self._executor.submit(self._fit, snapshot, symbol, timeframe)
+                self._pending.add_done_callback(self._on_done)
+                return True
+        try:
+            self._swap(*self._fit(snapshot, symbol, timeframe))
+        finally:
+            self._pending = None
+        return True
+
+    def _fit(self, snapshot: pd.DataFrame, symbol, timeframe):
+        detector = CryptoRegimeDetector(n_regimes=self.n_regimes, random_state=self.random_state)
+        started = time.perf_counter()
+        fitted = detector.fit_cached(snapshot, symbol=symbol, timeframe=timeframe, cache=self.cache)
+        duration = time.perf_counter() - started
+        if fitted is None or detector.model is None:
+            return None, duration, None
+        return detector, duration, (snapshot, fitted)
+
+    def _on_done(self, future):
+        try:
+            self._swap(*future.result())
+        except Exception as e:
+            logger.error(f"Regime refit failed: {e}")
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def _swap(self, detector, duration, fit_data):
+        self.last_fit_duration = duration
+        if detector is None:
+            logger.warning(f"Regime refit produced no model ({duration:.2f}s); keeping current model")
+            return
+        previous = self.detector
+        changed = None
+        if previous is not None and fit_data is not None:
+            snapshot, fitted = fit_data
+            old_labels = previous.predict(snapshot)['regime_label']
+            changed = float((old_labels != fitted['regime_label'].reindex(old_labels.index)).mean())
+        self.detector = detector
+        self.version += 1
+        if changed is None:
+            logger.info(f"Regime model v{self.version} ready (fit {duration:.2f}s)")
+        else:
+            logger.info(f"Regime model swapped to v{self.version} (fit {duration:.2f}s, "
+                        f"{changed:.1%} of bars relabelled)")
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Block until the running refit (if any) has been swapped in."""
+        pending = self._pending
+        if pending is not None and pending is not True:
+            pending.result(timeout=timeout)
+            deadline = time.monotonic() + (timeout or 5.0)
+            while self._pending is not None and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,239 @@
+"""
+Regime service: fits the HMM once per symbol/timeframe and publishes the regime series to a
+shared sqlite database, so every strategy container gates on the same label instead of fitting
+its own detector. RegimeClient is the read side used by BaseStrategy (REGIME_DB_PATH).
+
+    python -m utils.regime_service --symbols BTC/USDT,ETH/USDT:USDT --timeframe 1h \
+        --db /freqtrade/user_data/regimes.sqlite --interval 300
+"""
+import os
+import sys
+import time
+import sqlite3
+import logging
+import argparse
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from utils.ohlcv_integrity import timeframe_to_ms, ohlcv_rows_to_frame, dedupe_ohlcv, ohlcv_timestamps_ms
+    from utils.regime_refit import RegimeRefitScheduler, DEFAULT_REFIT_INTERVAL_SEC
+except ImportError:
+    from ohlcv_integrity import timeframe_to_ms, ohlcv_rows_to_frame, dedupe_ohlcv, ohlcv_timestamps_ms
+    from regime_refit import RegimeRefitScheduler, DEFAULT_REFIT_INTERVAL_SEC
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "data/regimes.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS regimes (
+    symbol TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    regime TEXT,
+    filtered_regime TEXT,
+    filtered_prob REAL,
+    PRIMARY KEY (symbol, timeframe, ts)
+);
+CREATE TABLE IF NOT EXISTS regime_meta (
+    symbol TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    model_version INTEGER,
+    last_ts INTEGER,
+    updated_at REAL,
+    PRIMARY KEY (symbol, timeframe)
+);
+"""
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+class RegimeStore:
+    """sqlite table of per-candle regime labels keyed by (symbol, timeframe, candle open ms)."""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        _connect(db_path).close()
+
+    def publish(self, symbol: str, timeframe: str, labels: pd.DataFrame, model_version: int) -> int:
+        """Upsert labels (columns: ts, regime, filtered_regime, filtered_prob). Returns rows written."""
+        if labels.empty:
+            return 0
+        rows = list(zip(
+            [symbol] * len(labels), [timeframe] * len(labels),
+            labels['ts'].astype(np.int64).tolist(), labels['regime'].tolist(),
+            labels['filtered_regime'].tolist(), labels['filtered_prob'].astype(float).tolist(),
+        ))
+        conn = _connect(self.db_path)
+        try:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO regimes VALUES (?, ?, ?, ?, ?, ?)", rows)
+                conn.execute("INSERT OR REPLACE INTO regime_meta VALUES (?, ?, ?, ?, ?)",
+                             (symbol, timeframe, model_version, rows[-1][2], time.time()))
+        finally:
+            conn.close()
+        return len(rows)
+
+    def meta(self, symbol: str, timeframe: str) -> Optional[dict]:
+        conn = _connect(self.db_path)
+        try:
+            row = conn.execute("SELECT model_version, last_ts, updated_at FROM regime_meta "
+                               "WHERE symbol = ? AND timeframe = ?", (symbol, timeframe)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return {'model_version': row[0], 'last_ts': row[1], 'updated_at': row[2]}
+
+    def series(self, symbol: str, timeframe: str, since_ms: Optional[int] = None) -> pd.DataFrame:
+        """Published labels for symbol/timeframe ordered by candle time (optionally ts >= since_ms)."""
+        conn = _connect(self.db_path)
+        try:
+            return pd.read_sql_query(
+                "SELECT ts, regime, filtered_regime, filtered_prob FROM regimes "
+                "WHERE symbol = ? AND timeframe = ? AND ts >= ? ORDER BY ts",
+                conn, params=(symbol, timeframe, int(since_ms or 0)),
+            )
+        finally:
+            conn.close()
+
+
+def label_frame(detector, price_df: pd.DataFrame) -> pd.DataFrame:
+    """Per-candle labels to publish: Viterbi regime plus the forward-filtered label/probability."""
+    decoded = detector.predict(price_df)
+    filtered = detector.predict_filtered(price_df)
+    return pd.DataFrame({
+        'ts': ohlcv_timestamps_ms(decoded),
+        'regime': decoded['regime_label'].to_numpy(),
+        'filtered_regime': filtered['regime_label'].to_numpy(),
+        'filtered_prob': filtered['regime_prob'].to_numpy(),
+    })
+
+
+def fetch_recent_ohlcv(symbol: str, timeframe: str = '1h', bars: int = 1000) -> pd.DataFrame:
+    """Last `bars` closed candles from Binance (futures when the pair is 'BASE/QUOTE:SETTLE')."""
+    import ccxt
+    try:
+        from utils.data_collector import fetch_ohlcv_range
+    except ImportError:
+        from data_collector import fetch_ohlcv_range
+
+    options = {'enableRateLimit': True}
+    if ':' in symbol:
+        options['options'] = {'defaultType': 'future'}
+    exchange = ccxt.binance(options)
+    step = timeframe_to_ms(timeframe)
+    now = exchange.milliseconds()
+    rows = fetch_ohlcv_range(exchange, symbol, timeframe, now - (bars + 1) * step, now)
+    df = dedupe_ohlcv(ohlcv_rows_to_frame(rows))
+    return df[df['timestamp'] + step <= now]  # drop the candle still forming
+
+
+class RegimeService:
+    """Refits per symbol on a cadence and publishes the labelled series after every run."""
+
+    def __init__(self, symbols: list, timeframe: str = '1h', store: Optional[RegimeStore] = None,
+                 refit_interval_sec: float = DEFAULT_REFIT_INTERVAL_SEC, history_bars: int = 1000,
+                 fetch: Optional[Callable[[str, str, int], pd.DataFrame]] = None, cache=None):
+        self.symbols = symbols
+        self.timeframe = timeframe
+        self.store = store or RegimeStore()
+        self.history_bars = history_bars
+        self.fetch = fetch or fetch_recent_ohlcv
+        self.schedulers = {s: RegimeRefitScheduler(refit_interval_sec=refit_interval_sec, blocking=True, cache=cache)
+                           for s in symbols}
+
+    def run_once(self) -> dict:
+        """Fetch, refit if due, label and publish every symbol. Returns symbol -> rows published."""
+        published = {}
+        for symbol in self.symbols:
+            try:
+                price_df = self.fetch(symbol, self.timeframe, self.history_bars)
+                if price_df is None or len(price_df) <= 200:
+                    logger.warning(f"Regime service: insufficient data for {symbol}")
+                    continue
+                scheduler = self.schedulers[symbol]
+                scheduler.maybe_refit(price_df, symbol=symbol, timeframe=self.timeframe)
+                if scheduler.detector is None:
+                    continue
+                labels = label_frame(scheduler.detector, price_df)
+                published[symbol] = self.store.publish(symbol, self.timeframe, labels, scheduler.version)
+                logger.info(f"Regime service: {symbol} {self.timeframe} -> {labels['filtered_regime'].iloc[-1]}")
+            except Exception as e:
+                logger.error(f"Regime service failed for {symbol}: {e}")
+        return published
+
+    def loop(self, interval_sec: float = 300) -> None:
+        while True:
+            started = time.monotonic()
+            self.run_once()
+            time.sleep(max(0.0, interval_sec - (time.monotonic() - started)))
+
+
+class RegimeClient:
+    """
+    Read side for strategies. regime_for() aligns the published series to a dataframe's candles
+    and returns None (caller falls back to local fitting) when the series is missing or stale.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, max_lag_bars: int = 1):
+        self.store = RegimeStore(db_path)
+        self.max_lag_bars = max_lag_bars
+
+    def regime_for(self, symbol: str, timeframe: str, dates) -> Optional[pd.DataFrame]:
+        """DataFrame(regime, filtered_regime, filtered_prob) with one row per entry of dates."""
+        ts = pd.DatetimeIndex(dates).as_unit('ms').asi8
+        if len(ts) == 0:
+            return None
+        step = timeframe_to_ms(timeframe)
+        meta = self.store.meta(symbol, timeframe)
+        if meta is None or meta['last_ts'] < ts[-1] - self.max_lag_bars * step:
+            return None
+        series = self.store.series(symbol, timeframe, since_ms=ts[0] - self.max_lag_bars * step)
+        if series.empty:
+            return None
+        aligned = series.set_index('ts').reindex(ts)
+        # Carry the latest published label onto candles the service has not labelled yet
+        tail = ts > series['ts'].iloc[-1]
+        if tail.any():
+            aligned.loc[tail] = series.iloc[-1][['regime', 'filtered_regime', 'filtered_prob']].to_numpy()
+        aligned[['regime', 'filtered_regime']] = aligned[['regime', 'filtered_regime']].fillna('UNKNOWN')
+        return aligned.reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish shared regime series for strategy containers")
+    parser.add_argument("--symbols", default=os.environ.get("REGIME_SYMBOLS", "BTC/USDT"),
+                        help="Comma-separated Freqtrade pair names (e.g. BTC/USDT,ETH/USDT:USDT)")
+    parser.add_argument("--timeframe", default=os.environ.get("REGIME_TIMEFRAME", "1h"))
+    parser.add_argument("--db", default=os.environ.get("REGIME_DB_PATH", DEFAULT_DB_PATH))
+    parser.add_argument("--interval", type=float, default=300, help="Seconds between publish runs")
+    parser.add_argument("--refit-hours", type=float, default=DEFAULT_REFIT_INTERVAL_SEC / 3600)
+    parser.add_argument("--history", type=int, default=1000, help="Candles fetched per symbol")
+    parser.add_argument("--once", action="store_true", help="Publish once and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    service = RegimeService(
+        [s.strip() for s in args.symbols.split(',') if s.strip()], args.timeframe,
+        RegimeStore(args.db), refit_interval_sec=args.refit_hours * 3600, history_bars=args.history,
+    )
+    if args.once:
+        print(service.run_once())
+        return
+    service.loop(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
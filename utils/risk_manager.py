@@ -1,6 +1,15 @@
 import logging
 from datetime import datetime, timedelta
 
+try:
+    from utils.risk_state import SharedRiskState, DEFAULT_RESERVATION_TTL_SEC
+    from utils.regime_gating import RegimeGatingMatrix, REGIME_GATING
+    from utils.ewm_covariance import EWMCovariance
+except ImportError:
+    from risk_state import SharedRiskState, DEFAULT_RESERVATION_TTL_SEC
+    from regime_gating import RegimeGatingMatrix, REGIME_GATING
+    from ewm_covariance import EWMCovariance
+
 # Basic logging setup
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,6 +23,15 @@ class RiskManager:
             - max_daily_loss: float (e.g., 0.03 for 3%)
             - max_portfolio_drawdown: float (e.g., 0.15 for 15%)
             - initial_capital: float
+            - state_path: optional sqlite path; capital, daily PnL, kill switch and open-trade
+              risk reservations are then shared by every process using the same file
+            - reservation_ttl_hours: optional, lifetime of a reservation not released on exit
+            - regime_gating: optional gating table (dict or JSON path), see utils/regime_gating.py
+            - max_correlated_exposure: optional cap on correlation-weighted open notional as a
+              fraction of capital (e.g. 0.40); correlations come from an EWM tracker fed by
+              observe_return() (live) or a ReturnReplay (backtests), see utils/ewm_covariance.py.
+              Open notional comes from filled orders (set_open_exposure)
+            - correlation_halflife: optional EWM half-life in bars for that tracker (default 168)
         """
         self.config = config
         self.max_risk_per_trade = config.get('max_risk_per_trade', 0.01)
@@ -30,67 +48,57 @@ class RiskManager:
         
         # Regime Master Switch (Phase 2B.1)
         self.current_regime = 'UNKNOWN'
+        gating = config.get('regime_gating')
+        self.gating = RegimeGatingMatrix.from_config(gating) if gating else REGIME_GATING
+
+        # Correlation-aware exposure cap (open notional per symbol, signed: short < 0)
+        self.max_correlated_exposure = config.get('max_correlated_exposure')
+        self.covariance = None
+        if self.max_correlated_exposure:
+            self.covariance = EWMCovariance(halflife=config.get('correlation_halflife'))
+        self.open_exposure = {}
+
+        # Shared portfolio state (one limit across all strategy processes)
+        self.state = None
+        if config.get('state_path'):
+            ttl_hours = config.get('reservation_ttl_hours')
+            self.state = SharedRiskState(
+                config['state_path'], initial_capital=self.initial_capital,
+                max_daily_loss=self.max_daily_loss, max_drawdown=self.max_drawdown,
+                reservation_ttl_sec=ttl_hours * 3600 if ttl_hours else DEFAULT_RESERVATION_TTL_SEC,
+            )
+            self._sync_state(self.state.snapshot())
+
+    def _sync_state(self, state: dict):
+        """Mirror the shared portfolio state into this instance's attributes."""
+        self.initial_capital = state['initial_capital']
+        self.current_capital = state['current_capital']
+        self.peak_capital = state['peak_capital']
+        self.daily_pnl = state['daily_pnl']
+        self.last_reset_date = datetime.fromisoformat(state['day']).date()
+        self.is_kill_switch_active = state['kill_switch']
         
     def set_regime(self, regime: str):
-        """Update current market regime for strategy gating. Called by BaseStrategy after populate_indicators."""
-        self.current_regime = str(regime).upper() if regime else 'UNKNOWN'
-        
-    def is_strategy_allowed(self, strategy_id: str, side: str) -> bool:
+        """Set the default regime used when gating/sizing calls pass no regime of their own."""
+        self.current_regime = self._regime(regime)
+
+    def _regime(self, regime) -> str:
+        return str(regime).upper() if regime else 'UNKNOWN'
+
+    def is_strategy_allowed(self, strategy_id: str, side: str, regime: str = None) -> bool:
         """
-        Regime-based strategy gating. Returns True if the strategy/side is allowed in current regime.
+        Regime-based strategy gating. Returns True if the strategy/side is allowed in the regime.
         strategy_id: Class name (e.g. WeekendMomentum) or S1, S2, S3, S4, S5
         side: 'long' or 'short'
+        regime: label to gate on (e.g. the pair's own regime); None uses current_regime.
+        Rules live in utils/regime_gating.py (override with config key 'regime_gating').
+        Unknown strategies are allowed (e.g. BasisHarvest has own regime logic).
         """
-        sid = strategy_id.upper()
-        # Map class names to S1-S5
-        if 'WEEKEND' in sid or sid == 'S1':
-            sid = 'S1'
-        elif 'FUNDING' in sid or sid == 'S2':
-            sid = 'S2'
-        elif 'UNLOCK' in sid or sid == 'S3':
-            sid = 'S3'
-        elif 'CASCADE' in sid or sid == 'S4':
-            sid = 'S4'
-        elif 'REGIME' in sid and 'GRID' in sid or sid == 'S5':
-            sid = 'S5'
-        else:
-            return True  # Unknown strategy: allow (e.g. BasisHarvest has own regime logic)
-            
-        regime = self.current_regime
-        is_long = str(side).lower() == 'long'
-        
-        if regime == 'BULL':
-            if sid == 'S1': return True
-            if sid == 'S2': return is_long  # long-only
-            if sid == 'S3': return is_long  # shorts disabled
-            if sid == 'S4': return True  # cascade as filter
-            if sid == 'S5': return False  # grid inactive
-        elif regime == 'SIDEWAYS':
-            if sid == 'S1': return True  # waits for Friday (entry logic)
-            if sid == 'S2': return True  # both sides
-            if sid == 'S3': return True
-            if sid == 'S4': return True
-            if sid == 'S5': return True  # grid active
-        elif regime == 'BEAR':
-            if sid == 'S1': return False  # disabled
-            if sid == 'S2': return not is_long  # short-only
-            if sid == 'S3': return not is_long  # short-only
-            if sid == 'S4': return True  # cascade as filter
-            if sid == 'S5': return True  # cash-preservation (reduced size via multiplier)
-        elif regime == 'TRANSITION':
-            return True  # All allowed but position_size_multiplier halves size
-        # UNKNOWN or other: allow
-        return True
+        return self.gating.is_allowed(strategy_id, self.current_regime if regime is None else self._regime(regime), side)
         
-    def get_position_size_multiplier(self, strategy_id: str = None) -> float:
+    def get_position_size_multiplier(self, strategy_id: str = None, regime: str = None) -> float:
         """Return multiplier for position sizing. TRANSITION = 0.5. S5 in BEAR = 0.5 (cash-preservation)."""
-        mult = 1.0
-        if self.current_regime == 'TRANSITION':
-            mult = 0.5
-        elif strategy_id and ('REGIME' in str(strategy_id).upper() and 'GRID' in str(strategy_id).upper() or str(strategy_id).upper() == 'S5'):
-            if self.current_regime == 'BEAR':
-                mult = 0.5  # S5 cash-preservation in BEAR
-        return mult
+        return self.gating.multiplier(strategy_id, self.current_regime if regime is None else self._regime(regime))
         
     def _reset_daily_metrics(self):
         """Reset daily PnL if a new day has started."""
@@ -102,6 +110,9 @@ class RiskManager:
 
     def update_capital(self, new_capital: float):
         """Update current capital and check for drawdown."""
+        if self.state is not None:
+            self._sync_state(self.state.update_capital(new_capital))
+            return
         self.current_capital = new_capital
         self._reset_daily_metrics()
         
@@ -121,6 +132,9 @@ class RiskManager:
 
     def record_trade_result(self, pnl_amount: float):
         """Update daily PnL stats after a closed trade."""
+        if self.state is not None:
+            self._sync_state(self.state.record_trade_result(pnl_amount))
+            return
         self._reset_daily_metrics()
         self.daily_pnl += pnl_amount
         
@@ -132,6 +146,8 @@ class RiskManager:
         """
         Check if a new trade is allowed based on risk rules.
         """
+        if self.state is not None:
+            self._sync_state(self.state.snapshot())
         self._reset_daily_metrics()
         
         # 1. Kill Switch
@@ -148,11 +164,69 @@ class RiskManager:
             
         return True
 
+    def reserve_risk(self, symbol: str, strategy_name: str, risk_amount: float) -> bool:
+        """
+        Atomically check portfolio limits and reserve risk_amount for an entry (shared state only).
+        Realized daily loss + open reservations + risk_amount must stay within the daily loss budget.
+        Without state_path this is check_trade_allowed.
+        """
+        if self.state is None:
+            return self.check_trade_allowed(symbol, strategy_name)
+        return self.state.try_reserve(strategy_name, symbol, risk_amount)
+
+    def release_risk(self, symbol: str, strategy_name: str, pnl_amount: float = None):
+        """Release the reservation on exit and record realized PnL (if given)."""
+        if self.state is None:
+            if pnl_amount is not None:
+                self.record_trade_result(pnl_amount)
+            return
+        self._sync_state(self.state.release(strategy_name, symbol, pnl_amount))
+
+    def record_exit_fill(self, trade_id, symbol: str, strategy_name: str, realized_pnl: float = None,
+                         is_open: bool = True):
+        """
+        Account a filled exit-side order of trade_id (exit, stoploss on exchange, partial exit).
+        realized_pnl is the trade's cumulative realized PnL; the shared state books only the part
+        not yet recorded for trade_id. The fill that closes the trade releases its reservation.
+        Shared state only (no-op without state_path).
+        """
+        if self.state is None:
+            return
+        self._sync_state(self.state.record_fill(strategy_name, symbol, trade_id, realized_pnl, closed=not is_open))
+
+    def release_stale_reservations(self, strategy_name: str, open_symbols) -> list:
+        """
+        Release strategy_name's reservations on symbols without an open trade (entry cancelled or
+        timed out before filling, trade closed while the bot was down). Returns those symbols.
+        """
+        if self.state is None:
+            return []
+        stale = [s for s in self.state.reserved_pairs(strategy_name) if s not in open_symbols]
+        for symbol in stale:
+            self.release_risk(symbol, strategy_name)
+        return stale
+
+    def observe_return(self, symbol: str, ts, ret: float):
+        """Feed one candle return of symbol to the correlation tracker (no-op when the cap is off)."""
+        if self.covariance is not None:
+            self.covariance.observe(symbol, ts, ret)
+
+    def set_open_exposure(self, symbol: str, notional: float):
+        """Record the open notional of symbol (signed; 0 removes it) for the correlated cap."""
+        if notional:
+            self.open_exposure[symbol] = notional
+        else:
+            self.open_exposure.pop(symbol, None)
+
     def calculate_position_size(self, entry_price: float, stop_loss_price: float, risk_per_trade: float = None,
-                                 strategy_id: str = None) -> float:
+                                 strategy_id: str = None, symbol: str = None, side: str = 'long',
+                                 regime: str = None) -> float:
         """
         Calculate safe position size based on risk per trade.
         Position Size = (Account Value * Risk %) / (Entry - Stop Loss)
+        With max_correlated_exposure and a symbol, the size is also capped so that the
+        correlation-weighted open notional stays within that fraction of capital.
+        regime: the symbol's regime for the size multiplier (None uses current_regime).
         """
         if entry_price <= 0 or stop_loss_price <= 0:
             return 0.0
@@ -172,9 +246,15 @@ class RiskManager:
         max_position_value = self.current_capital * 0.20
         if quantity * entry_price > max_position_value:
             quantity = max_position_value / entry_price
+
+        # Correlated exposure cap (concurrent BTC/ETH/SOL positions count as one bigger bet)
+        if self.covariance is not None and symbol is not None:
+            budget = self.max_correlated_exposure * self.current_capital
+            headroom = self.covariance.headroom(self.open_exposure, symbol, 1 if side == 'long' else -1, budget)
+            quantity = min(quantity, headroom / entry_price)
         
         # Regime multiplier (TRANSITION = 50% size, S5 in BEAR = cash-preservation)
-        quantity *= self.get_position_size_multiplier(strategy_id)
+        quantity *= self.get_position_size_multiplier(strategy_id, regime)
             
         return quantity
 
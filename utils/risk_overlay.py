@@ -0,0 +1,204 @@
+"""
+Backtest-time risk overlay.
+Replays the RiskManager rules (daily loss limit, max drawdown kill switch, 20% position cap)
+and optionally FundingReversion's drawdown throttle over a trade ledger or an equity series,
+using the ledger's own timestamps as the clock. The rules are path dependent (every decision
+depends on equity after the previous ones), so inputs are prepared with NumPy and replayed in
+a single O(n) pass over plain arrays.
+"""
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# FundingReversion drawdown throttle: >=10% drawdown halves size, >=15% blocks entries
+# until drawdown recovers below 8%. This table is authoritative: the live strategy
+# (FundingReversion.custom_stake_amount) applies it through drawdown_throttle().
+FUNDING_REVERSION_THROTTLE = {'levels': ((0.10, 0.5), (0.15, 0.0)), 'resume_below': 0.08}
+
+
+def drawdown_throttle(drawdown: float, halted: bool, levels, resume_below: Optional[float] = None):
+    """
+    (size multiplier, halted) for the current drawdown. levels are ascending (drawdown, multiplier)
+    pairs; a 0.0 multiplier halts entries until drawdown falls below resume_below.
+    """
+    if halted:
+        if resume_below is None or drawdown >= resume_below:
+            return 0.0, True
+    mult = 1.0
+    for level, level_mult in levels:
+        if drawdown >= level:
+            mult = level_mult
+    return mult, mult == 0.0
+
+
+def _ns(times) -> np.ndarray:
+    return pd.DatetimeIndex(times).as_unit('ns').asi8
+
+
+def _days(times) -> np.ndarray:
+    return pd.DatetimeIndex(times).floor('D').as_unit('ns').asi8
+
+
+class RiskOverlay:
+    """
+    Same config keys as RiskManager (max_daily_loss, max_portfolio_drawdown, initial_capital),
+    plus max_position_frac (None disables the cap) and throttle (None, 'funding_reversion' or
+    a dict like FUNDING_REVERSION_THROTTLE). State starts fresh on every call, so one instance
+    can be applied to each walk-forward window independently. As live, a block with no open
+    positions left lasts for the rest of the input.
+    """
+
+    def __init__(self, config: Optional[dict] = None):
+        config = config or {}
+        self.max_daily_loss = config.get('max_daily_loss', 0.03)
+        self.max_drawdown = config.get('max_portfolio_drawdown', 0.15)
+        self.initial_capital = config.get('initial_capital', 1000.0)
+        self.max_position_frac = config.get('max_position_frac', 0.20)
+        throttle = config.get('throttle')
+        if throttle == 'funding_reversion':
+            throttle = FUNDING_REVERSION_THROTTLE
+        self.throttle = throttle
+        if throttle:
+            levels = sorted(throttle['levels'])
+            self._levels = [(float(dd), float(mult)) for dd, mult in levels]
+            self._resume_below = throttle.get('resume_below')
+        else:
+            self._levels = []
+            self._resume_below = None
+
+    def _throttle(self, drawdown: float, halted: bool):
+        """(size multiplier, halted) for the current drawdown; halted persists until resume_below."""
+        return drawdown_throttle(drawdown, halted, self._levels, self._resume_below)
+
+    def _entry_check(self, equity, peak, day_pnl, killed, halted):
+        """(size multiplier, halted, block reason or None) for an entry under the current state."""
+        if killed:
+            return 0.0, halted, 'kill_switch'
+        if day_pnl < 0 and -day_pnl / self.initial_capital >= self.max_daily_loss:
+            return 0.0, halted, 'daily_loss'
+        mult, halted = self._throttle((peak - equity) / peak, halted)
+        if mult == 0.0:
+            return 0.0, halted, 'drawdown_throttle'
+        return mult, halted, None
+
+    def apply_trades(self, trades: pd.DataFrame, pnl_col: str = 'pnl', stake_col: Optional[str] = None,
+                     drop_blocked: bool = False) -> pd.DataFrame:
+        """
+        Throttled copy of a ledger with entry_time, exit_time and pnl (return on the stake);
+        without entry_time each trade is decided at its exit time.
+        stake_col holds the requested stake as a fraction of equity (default 1.0, i.e. the
+        ledger compounds on full equity). Entries are decided on realized equity at entry time;
+        exits at the same timestamp are booked first.
+
+        Added columns: pnl_raw (input pnl), stake_frac, size_mult, blocked, block_reason,
+        pnl_amount and equity (after the exit). pnl becomes the return on equity at entry.
+        """
+        if trades is None or trades.empty:
+            return trades
+        n = len(trades)
+        entry_times = trades['entry_time'] if 'entry_time' in trades else trades['exit_time']
+        entry_ns, exit_ns = _ns(entry_times), _ns(trades['exit_time'])
+        entry_day, exit_day = _days(entry_times), _days(trades['exit_time'])
+        raw = trades[pnl_col].to_numpy(dtype=np.float64)
+        stake = (trades[stake_col].to_numpy(dtype=np.float64) if stake_col else np.ones(n))
+        if self.max_position_frac is not None:
+            stake = np.minimum(stake, self.max_position_frac)
+
+        # Event order: time, then exits (0) before entries (1); a zero-length trade's exit (2)
+        # must still follow its own entry.
+        kinds = np.concatenate([np.where(exit_ns == entry_ns, 2, 0), np.ones(n, dtype=np.int64)])
+        times = np.concatenate([exit_ns, entry_ns])
+        order = np.lexsort((kinds, times))
+
+        size_mult = [0.0] * n
+        reasons = [None] * n
+        amounts = [0.0] * n
+        equity_after = [np.nan] * n
+        entry_equity = [0.0] * n
+        entry_day, exit_day = entry_day.tolist(), exit_day.tolist()
+        raw_l, stake_l = raw.tolist(), stake.tolist()
+
+        equity = peak = float(self.initial_capital)
+        day, day_pnl = None, 0.0
+        killed = halted = False
+        for k in order.tolist():
+            i = k - n if k >= n else k
+            d = entry_day[i] if k >= n else exit_day[i]
+            if day is None or d > day:
+                day, day_pnl = d, 0.0
+            if k >= n:
+                mult, halted, reasons[i] = self._entry_check(equity, peak, day_pnl, killed, halted)
+                size_mult[i] = mult
+                entry_equity[i] = equity
+                continue
+            if size_mult[i] == 0.0:
+                continue
+            amount = entry_equity[i] * stake_l[i] * size_mult[i] * raw_l[i]
+            amounts[i] = amount
+            day_pnl += amount
+            equity += amount
+            peak = max(peak, equity)
+            equity_after[i] = equity
+            if not killed and (peak - equity) / peak >= self.max_drawdown:
+                killed = True
+                logger.info(f"Risk overlay: kill switch at {pd.Timestamp(int(times[k]))} "
+                            f"(drawdown {(peak - equity) / peak:.2%})")
+
+        out = trades.copy()
+        mult = np.asarray(size_mult)
+        out['pnl_raw'] = raw
+        out['stake_frac'] = stake
+        out['size_mult'] = mult
+        out['blocked'] = mult == 0.0
+        out['block_reason'] = reasons
+        out[pnl_col] = raw * stake * mult
+        out['pnl_amount'] = amounts
+        out['equity'] = equity_after
+        if drop_blocked:
+            out = out[~out['blocked']]
+        return out
+
+    def apply_equity(self, equity: pd.Series, exposure: float = 1.0) -> pd.DataFrame:
+        """
+        Overlay an equity curve (DatetimeIndex) produced at `exposure` x equity. Each bar's
+        return is scaled by the exposure allowed by the state at the end of the previous bar.
+        Returns DataFrame(equity, returns, exposure, block_reason) on the same index.
+        """
+        if equity is None or len(equity) == 0:
+            return pd.DataFrame(columns=['equity', 'returns', 'exposure', 'block_reason'])
+        rets = equity.pct_change().fillna(0.0).to_numpy(dtype=np.float64) / exposure
+        frac = exposure if self.max_position_frac is None else min(exposure, self.max_position_frac)
+        days = _days(equity.index).tolist()
+
+        n = len(rets)
+        out_equity = [0.0] * n
+        out_rets = [0.0] * n
+        out_exposure = [0.0] * n
+        reasons = [None] * n
+
+        value = peak = float(self.initial_capital)
+        day, day_pnl = None, 0.0
+        killed = halted = False
+        for t, r in enumerate(rets.tolist()):
+            if day is None or days[t] > day:
+                day, day_pnl = days[t], 0.0
+            mult, halted, reasons[t] = self._entry_check(value, peak, day_pnl, killed, halted)
+            step = r * frac * mult
+            amount = value * step
+            value += amount
+            day_pnl += amount
+            peak = max(peak, value)
+            if not killed and (peak - value) / peak >= self.max_drawdown:
+                killed = True
+            out_equity[t], out_rets[t], out_exposure[t] = value, step, frac * mult
+
+        return pd.DataFrame({'equity': out_equity, 'returns': out_rets, 'exposure': out_exposure,
+                             'block_reason': reasons}, index=equity.index)
+
+    def __call__(self, trades: pd.DataFrame) -> pd.DataFrame:
+        """WalkForwardAnalyzer hook: the throttled ledger without blocked trades."""
+        return self.apply_trades(trades, drop_blocked=True)
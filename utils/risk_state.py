@@ -0,0 +1,234 @@
+"""
+Shared portfolio risk state for all strategy processes.
+One sqlite database (WAL) holds account capital, peak, daily PnL, kill switch and the risk
+reserved by open trades. Every check-and-reserve runs in a single BEGIN IMMEDIATE transaction,
+so concurrent strategies enforce one portfolio limit and the state survives restarts.
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESERVATION_TTL_SEC = 3 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS portfolio (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    initial_capital REAL NOT NULL,
+    current_capital REAL NOT NULL,
+    peak_capital REAL NOT NULL,
+    daily_pnl REAL NOT NULL,
+    day TEXT NOT NULL,
+    kill_switch INTEGER NOT NULL,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS reservations (
+    strategy TEXT NOT NULL,
+    pair TEXT NOT NULL,
+    risk_amount REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (strategy, pair)
+);
+CREATE TABLE IF NOT EXISTS booked_pnl (
+    strategy TEXT NOT NULL,
+    trade_id TEXT NOT NULL,
+    realized_pnl REAL NOT NULL,
+    PRIMARY KEY (strategy, trade_id)
+);
+"""
+
+
+class SharedRiskState:
+    """
+    Portfolio limits shared through one sqlite file. Reservations hold the risk of open trades
+    (per strategy/pair) until released on exit or until their TTL lapses (crashed process).
+    """
+
+    def __init__(self, path: str, initial_capital: float = 1000.0, max_daily_loss: float = 0.03,
+                 max_drawdown: float = 0.15, reservation_ttl_sec: float = DEFAULT_RESERVATION_TTL_SEC,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.max_daily_loss = max_daily_loss
+        self.max_drawdown = max_drawdown
+        self.reservation_ttl_sec = reservation_ttl_sec
+        self.clock = clock
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # First process to open the file sets the starting capital
+        self._conn.execute(
+            "INSERT OR IGNORE INTO portfolio VALUES (1, ?, ?, ?, 0.0, ?, 0, ?)",
+            (initial_capital, initial_capital, initial_capital, self._today(), self.clock()),
+        )
+
+    def _today(self) -> str:
+        return datetime.fromtimestamp(self.clock()).date().isoformat()
+
+    def _transaction(self, fn):
+        """Run fn(conn, row) inside BEGIN IMMEDIATE (one writer at a time across processes)."""
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._load(conn)
+                result = fn(conn, row)
+                conn.execute("COMMIT")
+                return result
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _load(self, conn) -> dict:
+        cur = conn.execute("SELECT initial_capital, current_capital, peak_capital, daily_pnl, day, kill_switch "
+                           "FROM portfolio WHERE id = 1")
+        initial, current, peak, daily_pnl, day, kill = cur.fetchone()
+        state = {'initial_capital': initial, 'current_capital': current, 'peak_capital': peak,
+                 'daily_pnl': daily_pnl, 'day': day, 'kill_switch': bool(kill)}
+        today = self._today()
+        if today > day:
+            logger.info(f"New day detected. Resetting shared daily PnL. Previous Daily PnL: {daily_pnl:.2f}")
+            state['daily_pnl'] = 0.0
+            state['day'] = today
+            self._save(conn, state)
+        conn.execute("DELETE FROM reservations WHERE expires_at <= ?", (self.clock(),))
+        state['reserved_risk'] = conn.execute(
+            "SELECT COALESCE(SUM(risk_amount), 0) FROM reservations").fetchone()[0]
+        return state
+
+    def _save(self, conn, state: dict):
+        conn.execute("UPDATE portfolio SET current_capital = ?, peak_capital = ?, daily_pnl = ?, day = ?, "
+                     "kill_switch = ?, updated_at = ? WHERE id = 1",
+                     (state['current_capital'], state['peak_capital'], state['daily_pnl'], state['day'],
+                      int(state['kill_switch']), self.clock()))
+
+    def _apply_capital(self, state: dict, new_capital: float):
+        state['current_capital'] = new_capital
+        state['peak_capital'] = max(state['peak_capital'], new_capital)
+        drawdown = (state['peak_capital'] - new_capital) / state['peak_capital']
+        if drawdown >= self.max_drawdown and not state['kill_switch']:
+            logger.critical(f"KILL SWITCH ACTIVATED: Max Portfolio Drawdown {drawdown:.2%} "
+                            f"exceeds limit {self.max_drawdown:.2%}")
+            state['kill_switch'] = True
+
+    def snapshot(self) -> dict:
+        """Current shared state (daily reset and expired reservations applied)."""
+        return self._transaction(lambda conn, state: state)
+
+    def update_capital(self, new_capital: float) -> dict:
+        def apply(conn, state):
+            self._apply_capital(state, new_capital)
+            self._save(conn, state)
+            return state
+        return self._transaction(apply)
+
+    def record_trade_result(self, pnl_amount: float) -> dict:
+        def apply(conn, state):
+            state['daily_pnl'] += pnl_amount
+            self._apply_capital(state, state['current_capital'] + pnl_amount)
+            self._save(conn, state)
+            return state
+        return self._transaction(apply)
+
+    def blocked_reason(self, state: dict, extra_risk: float = 0.0) -> Optional[str]:
+        """Why a new trade (with extra_risk reserved on top of open risk) is blocked, else None."""
+        if state['kill_switch']:
+            return f"Kill Switch Active (Drawdown > {self.max_drawdown:.1%})"
+        daily_loss_pct = -state['daily_pnl'] / state['initial_capital']
+        if state['daily_pnl'] < 0 and daily_loss_pct >= self.max_daily_loss:
+            return f"Daily Loss limit reached ({daily_loss_pct:.2%} >= {self.max_daily_loss:.2%})"
+        if extra_risk > 0:
+            at_risk = max(-state['daily_pnl'], 0.0) + state['reserved_risk'] + extra_risk
+            budget = self.max_daily_loss * state['initial_capital']
+            if at_risk > budget:
+                return f"Risk budget exhausted (realized loss + open risk {at_risk:.2f} > {budget:.2f})"
+        return None
+
+    def try_reserve(self, strategy: str, pair: str, risk_amount: float) -> bool:
+        """Atomically check portfolio limits and reserve risk_amount for (strategy, pair)."""
+        def apply(conn, state):
+            # Re-reserving the same key replaces its previous amount
+            existing = conn.execute("SELECT risk_amount FROM reservations WHERE strategy = ? AND pair = ?",
+                                    (strategy, pair)).fetchone()
+            if existing:
+                state['reserved_risk'] -= existing[0]
+            reason = self.blocked_reason(state, risk_amount)
+            if reason:
+                logger.warning(f"Trade Blocked ({strategy} {pair}): {reason}")
+                return False
+            conn.execute("INSERT OR REPLACE INTO reservations VALUES (?, ?, ?, ?)",
+                         (strategy, pair, float(risk_amount), self.clock() + self.reservation_ttl_sec))
+            return True
+        return self._transaction(apply)
+
+    def release(self, strategy: str, pair: str, pnl_amount: Optional[float] = None) -> dict:
+        """Drop the reservation for (strategy, pair); record the realized PnL in the same transaction."""
+        def apply(conn, state):
+            row = conn.execute("SELECT risk_amount FROM reservations WHERE strategy = ? AND pair = ?",
+                               (strategy, pair)).fetchone()
+            if row:
+                conn.execute("DELETE FROM reservations WHERE strategy = ? AND pair = ?", (strategy, pair))
+                state['reserved_risk'] -= row[0]
+            if pnl_amount is not None:
+                state['daily_pnl'] += pnl_amount
+                self._apply_capital(state, state['current_capital'] + pnl_amount)
+                self._save(conn, state)
+            return state
+        return self._transaction(apply)
+
+    def record_fill(self, strategy: str, pair: str, trade_id, realized_pnl: Optional[float],
+                    closed: bool) -> dict:
+        """
+        Book an exit-side fill of trade_id: realized_pnl is the trade's cumulative realized PnL and
+        only the part not booked yet is recorded (a fill reported twice, or again after a restart,
+        is booked once). closed also drops the (strategy, pair) reservation. One transaction.
+        """
+        def apply(conn, state):
+            pnl = 0.0
+            if realized_pnl is not None:
+                row = conn.execute("SELECT realized_pnl FROM booked_pnl WHERE strategy = ? AND trade_id = ?",
+                                   (strategy, str(trade_id))).fetchone()
+                pnl = realized_pnl - (row[0] if row else 0.0)
+                conn.execute("INSERT OR REPLACE INTO booked_pnl VALUES (?, ?, ?)",
+                             (strategy, str(trade_id), float(realized_pnl)))
+            if closed:
+                row = conn.execute("SELECT risk_amount FROM reservations WHERE strategy = ? AND pair = ?",
+                                   (strategy, pair)).fetchone()
+                if row:
+                    conn.execute("DELETE FROM reservations WHERE strategy = ? AND pair = ?", (strategy, pair))
+                    state['reserved_risk'] -= row[0]
+            if pnl:
+                state['daily_pnl'] += pnl
+                self._apply_capital(state, state['current_capital'] + pnl)
+                self._save(conn, state)
+            return state
+        return self._transaction(apply)
+
+    def reserved_pairs(self, strategy: str) -> list:
+        """Pairs holding an unexpired reservation for strategy."""
+        def apply(conn, state):
+            cur = conn.execute("SELECT pair FROM reservations WHERE strategy = ?", (strategy,))
+            return [row[0] for row in cur.fetchall()]
+        return self._transaction(apply)
+
+    def reset_kill_switch(self) -> dict:
+        """Manual intervention: clear the kill switch and restart the peak from current capital."""
+        def apply(conn, state):
+            state['kill_switch'] = False
+            state['peak_capital'] = state['current_capital']
+            self._save(conn, state)
+            return state
+        return self._transaction(apply)
+
+    def close(self):
+        self._conn.close()
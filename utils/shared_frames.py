@@ -0,0 +1,145 @@
+"""
+Shared-memory price frames for process-pool research workers.
+The parent publishes OHLCV/funding columns into multiprocessing.shared_memory once; workers
+receive a small picklable handle and rebuild a DataFrame over zero-copy NumPy views instead of
+re-reading the CSV or unpickling a full DataFrame per task.
+"""
+import os
+import sys
+import uuid
+import logging
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Segments attached in this process; kept referenced so the views stay valid.
+_ATTACHED = {}
+
+
+class SharedFrameHandle:
+    """
+    Picklable description of a published frame. Layout of the segment:
+    [n int64 index values][n x k float64 values, column-major].
+    Non-float columns are stored as float64 and cast back on attach (small copy).
+    """
+
+    def __init__(self, shm_name: str, n_rows: int, columns: list, dtypes: dict,
+                 index_dtype: str, index_tz: Optional[str] = None, index_name: Optional[str] = None):
+        self.shm_name = shm_name
+        self.n_rows = n_rows
+        self.columns = columns
+        self.dtypes = dtypes
+        self.index_dtype = index_dtype
+        self.index_tz = index_tz
+        self.index_name = index_name
+
+    @property
+    def nbytes(self) -> int:
+        return 8 * self.n_rows * (1 + len(self.columns))
+
+    def attach(self) -> pd.DataFrame:
+        """Rebuild the DataFrame over the shared segment (float columns are zero-copy views)."""
+        shm = _ATTACHED.get(self.shm_name)
+        if shm is None:
+            if sys.version_info >= (3, 13):
+                shm = shared_memory.SharedMemory(name=self.shm_name, track=False)
+            else:
+                shm = shared_memory.SharedMemory(name=self.shm_name)
+            _ATTACHED[self.shm_name] = shm
+        n, k = self.n_rows, len(self.columns)
+        index_values = np.ndarray((n,), dtype=np.int64, buffer=shm.buf)
+        values = np.ndarray((n, k), dtype=np.float64, buffer=shm.buf, offset=8 * n, order='F')
+
+        if self.index_dtype.startswith('datetime64'):
+            index = pd.DatetimeIndex(index_values.view(self.index_dtype), copy=False, name=self.index_name)
+            if self.index_tz:
+                index = index.tz_localize('UTC').tz_convert(self.index_tz)
+        else:
+            index = pd.Index(index_values, copy=False, name=self.index_name)
+
+        df = pd.DataFrame(values, index=index, columns=self.columns, copy=False)
+        for col, dtype in self.dtypes.items():
+            if dtype != 'float64':
+                df[col] = df[col].astype(dtype)
+        return df
+
+    def __repr__(self):
+        return f"SharedFrameHandle({self.shm_name}, rows={self.n_rows}, columns={self.columns})"
+
+
+def resolve_frame(frame):
+    """Accept a DataFrame, a SharedFrameHandle or None; return a DataFrame (or None)."""
+    if isinstance(frame, SharedFrameHandle):
+        return frame.attach()
+    return frame
+
+
+class SharedFrameStore:
+    """
+    Owner of published segments. Use as a context manager so segments are unlinked
+    when the parallel run finishes:
+
+        with SharedFrameStore() as store:
+            handle = store.publish(price_df)
+            pool.submit(worker, handle, ...)   # worker: df = handle.attach()
+    """
+
+    def __init__(self):
+        self._segments = {}
+
+    def publish(self, df: pd.DataFrame, columns: Optional[list] = None) -> SharedFrameHandle:
+        """Copy numeric columns of df into a new shared segment and return its handle."""
+        if df is None:
+            return None
+        if columns is None:
+            columns = [c for c in df.columns
+                       if pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_bool_dtype(df[c])]
+        n, k = len(df), len(columns)
+        name = f"pt_{os.getpid()}_{uuid.uuid4().hex[:12]}"
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(8 * n * (1 + k), 8))
+        self._segments[name] = shm
+
+        index = df.index
+        index_tz = None
+        if isinstance(index, pd.DatetimeIndex):
+            index_tz = str(index.tz) if index.tz is not None else None
+            index_dtype = str(index.tz_convert(None).dtype) if index_tz else str(index.dtype)
+            index_values = index.asi8
+        else:
+            index_dtype = 'int64'
+            index_values = np.asarray(index, dtype=np.int64)
+
+        np.ndarray((n,), dtype=np.int64, buffer=shm.buf)[:] = index_values
+        block = np.ndarray((n, k), dtype=np.float64, buffer=shm.buf, offset=8 * n, order='F')
+        for j, col in enumerate(columns):
+            block[:, j] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        return SharedFrameHandle(
+            name, n, list(columns), {c: str(df[c].dtype) for c in columns},
+            index_dtype, index_tz, index.name,
+        )
+
+    def close(self):
+        """Release and unlink every segment owned by this store."""
+        for name, shm in self._segments.items():
+            _ATTACHED.pop(name, None)
+            try:
+                shm.close()
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+            except BufferError:
+                # Views still alive in this process; unlink so the OS frees it once they go.
+                shm.unlink()
+        self._segments.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -1,11 +1,8 @@
 
-import ccxt
 import asyncio
 import os
 import sys
 from telegram import Bot
-import time
-from datetime import datetime
 
 # Add parent dir to path to find dns_patch or utils if needed
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -17,6 +14,8 @@ try:
 except ImportError:
     pass
 
+from utils.funding_monitor import FundingMonitor, run_monitor
+
 # Configuration
 TELEGRAM_TOKEN = os.environ.get("TELEGRAM_TOKEN", "YOUR_TOKEN_HERE")
 CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "YOUR_CHAT_ID")
@@ -38,34 +37,19 @@ async def send_telegram_message(bot, message):
         print(f"Failed to send telegram message: {e}")
 
 async def check_funding_signals():
+    """
+    Stream funding for every symbol in THRESHOLDS (plus FUNDING_MONITOR_SYMBOLS, Z-score only)
+    over one websocket and send debounced alerts, batched into one message per window.
+    """
     print("Starting Funding Rate Monitor...")
-    exchange = ccxt.binance({'enableRateLimit': True, 'options': {'defaultType': 'future'}})
-    
     bot = Bot(token=TELEGRAM_TOKEN)
-    
-    while True:
-        print(f"Checking funding rates at {datetime.now()}...")
-        for symbol, threshold in THRESHOLDS.items():
-            try:
-                funding = exchange.fetch_funding_rate(symbol)
-                rate = funding['fundingRate']
-                
-                print(f"  {symbol}: {rate:.4%}")
-                
-                if abs(rate) > threshold:
-                    direction = "LONG (Shorts paying)" if rate < 0 else "SHORT (Longs paying)"
-                    msg = (
-                        f"🚨 FUNDING SIGNAL: {symbol}\n"
-                        f"Rate: {rate:.4%} per 8hr\n"
-                        f"Signal: {direction}\n"
-                        f"Threshold: ±{threshold:.4%}"
-                    )
-                    await send_telegram_message(bot, msg)
-            except Exception as e:
-                print(f"Error {symbol}: {e}")
-        
-        # Sleep for 5 minutes
-        await asyncio.sleep(300)
+    extra = [s for s in os.environ.get("FUNDING_MONITOR_SYMBOLS", "").split(",") if s]
+    monitor = FundingMonitor(THRESHOLDS, universe=extra)
+
+    async def send(message):
+        await send_telegram_message(bot, message)
+
+    await run_monitor(monitor, send)
 
 if __name__ == "__main__":
     try:
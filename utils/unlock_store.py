@@ -0,0 +1,220 @@
+"""
+Persistent token unlock calendar (Strategy 3).
+UnlockStore keeps unlock events in sqlite, keyed by (symbol, unlock_date, recipient_type) and
+indexed by date, so the full calendar can be imported once from CSV/JSON dumps and queried by
+token and date range. load_unlocks() falls back to the built-in get_upcoming_unlocks() list when
+no store has been populated.
+
+    python -m utils.unlock_store import unlocks_2023.csv unlocks_2024.json --db data/unlocks.sqlite
+    python -m utils.unlock_store list --symbol ARB/USDT
+"""
+import os
+import sys
+import json
+import sqlite3
+import logging
+import argparse
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from utils.unlock_data_loader import get_upcoming_unlocks
+except ImportError:
+    from unlock_data_loader import get_upcoming_unlocks
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UNLOCK_DB_PATH = os.environ.get("UNLOCK_DB_PATH", "data/unlocks.sqlite")
+UNLOCK_COLUMNS = ['token', 'symbol', 'unlock_date', 'pct_supply', 'recipient_type']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS unlocks (
+    token TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    unlock_date TEXT NOT NULL,
+    pct_supply REAL,
+    recipient_type TEXT NOT NULL,
+    source TEXT,
+    PRIMARY KEY (symbol, unlock_date, recipient_type)
+);
+CREATE INDEX IF NOT EXISTS unlocks_by_date ON unlocks (unlock_date);
+"""
+
+# Column names seen in calendar dumps -> store columns
+_ALIASES = {
+    'date': 'unlock_date', 'unlock_time': 'unlock_date', 'timestamp': 'unlock_date',
+    'pair': 'symbol', 'ticker': 'token', 'category': 'recipient_type', 'recipient': 'recipient_type',
+    'pct_of_supply': 'pct_supply', 'percent_supply': 'pct_supply',
+}
+
+# Recipient labels seen in calendar dumps -> score_unlock_impact vocabulary
+# (team, investor, ecosystem, community, airdrop); other labels are kept as given.
+_RECIPIENT_TYPES = {
+    'team': 'team', 'core contributors': 'team', 'contributors': 'team', 'founders': 'team',
+    'advisors': 'team', 'employees': 'team',
+    'investor': 'investor', 'investors': 'investor', 'vc': 'investor', 'vcs': 'investor',
+    'backers': 'investor', 'private sale': 'investor', 'seed': 'investor', 'strategic': 'investor',
+    'ecosystem': 'ecosystem', 'foundation': 'ecosystem', 'treasury': 'ecosystem', 'dao': 'ecosystem',
+    'ecosystem fund': 'ecosystem', 'grants': 'ecosystem',
+    'community': 'community', 'public sale': 'community',
+    'airdrop': 'airdrop', 'airdrops': 'airdrop',
+}
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def normalize_unlocks(events: pd.DataFrame, quote: str = 'USDT') -> pd.DataFrame:
+    """
+    Store-shaped copy of a calendar dump: aliases renamed, token/symbol derived from each
+    other ('ARB' <-> 'ARB/USDT') and upper-cased, recipient labels mapped to the canonical
+    vocabulary ('investors', 'vc' -> 'investor'), dates parsed (UTC, day precision), rows
+    without a date dropped.
+    """
+    df = events.rename(columns={k: v for k, v in _ALIASES.items() if k in events.columns and v not in events.columns})
+    if 'symbol' not in df.columns and 'token' not in df.columns:
+        raise ValueError(f"Unlock events need a token or symbol column. Columns: {list(events.columns)}")
+    if 'symbol' not in df.columns:
+        df['symbol'] = df['token'].astype(str) + f'/{quote}'
+    if 'token' not in df.columns:
+        df['token'] = df['symbol'].astype(str).str.split('/').str[0]
+    df['token'] = df['token'].astype(str).str.strip().str.upper()
+    df['symbol'] = df['symbol'].astype(str).str.strip().str.upper()
+    if 'pct_supply' not in df.columns:
+        df['pct_supply'] = np.nan
+    if 'recipient_type' not in df.columns:
+        df['recipient_type'] = 'unknown'
+    recipient = df['recipient_type'].fillna('unknown').astype(str).str.strip().str.lower()
+    recipient = recipient.str.replace(r'[_\-]+', ' ', regex=True)
+    df['recipient_type'] = recipient.map(_RECIPIENT_TYPES).fillna(recipient)
+    raw = df['unlock_date']
+    epoch = pd.to_numeric(raw, errors='coerce')
+    dates = pd.to_datetime(raw.where(epoch.isna()), utc=True, format='mixed')
+    # Epoch seconds or milliseconds
+    dates = dates.fillna(pd.to_datetime(epoch * np.where(epoch < 1e11, 1000, 1), unit='ms', utc=True))
+    df['unlock_date'] = dates.dt.tz_localize(None).dt.normalize()
+    df = df.dropna(subset=['unlock_date'])
+    return df[UNLOCK_COLUMNS].reset_index(drop=True)
+
+
+def read_unlock_dump(path: str) -> pd.DataFrame:
+    """Events from a CSV file or a JSON file (list of records, or {'events': [...]})."""
+    if path.lower().endswith('.json'):
+        with open(path) as f:
+            raw = json.load(f)
+        if isinstance(raw, dict):
+            raw = raw.get('events', raw.get('data', []))
+        return pd.DataFrame(raw)
+    return pd.read_csv(path)
+
+
+class UnlockStore:
+    """sqlite unlock calendar; events() returns the same frame shape as get_upcoming_unlocks()."""
+
+    def __init__(self, db_path: str = DEFAULT_UNLOCK_DB_PATH):
+        self.db_path = db_path
+        _connect(db_path).close()
+
+    def upsert(self, events: pd.DataFrame, source: Optional[str] = None) -> int:
+        """Insert or replace events (any dump shape normalize_unlocks accepts). Returns rows written."""
+        df = normalize_unlocks(events)
+        if df.empty:
+            return 0
+        rows = list(zip(
+            df['token'].tolist(), df['symbol'].tolist(), df['unlock_date'].dt.strftime('%Y-%m-%d').tolist(),
+            [None if pd.isna(v) else float(v) for v in df['pct_supply']], df['recipient_type'].tolist(),
+            [source] * len(df),
+        ))
+        conn = _connect(self.db_path)
+        try:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO unlocks VALUES (?, ?, ?, ?, ?, ?)", rows)
+        finally:
+            conn.close()
+        return len(rows)
+
+    def import_file(self, path: str) -> int:
+        return self.upsert(read_unlock_dump(path), source=os.path.basename(path))
+
+    def events(self, symbols: Optional[list] = None, start=None, end=None) -> pd.DataFrame:
+        """Events ordered by symbol and date, optionally for some symbols and start <= date <= end."""
+        query = "SELECT token, symbol, unlock_date, pct_supply, recipient_type FROM unlocks WHERE 1 = 1"
+        params = []
+        if symbols:
+            query += f" AND symbol IN ({', '.join('?' * len(symbols))})"
+            params.extend(symbols)
+        if start is not None:
+            query += " AND unlock_date >= ?"
+            params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+        if end is not None:
+            query += " AND unlock_date <= ?"
+            params.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+        conn = _connect(self.db_path)
+        try:
+            df = pd.read_sql_query(query + " ORDER BY symbol, unlock_date", conn, params=params)
+        finally:
+            conn.close()
+        df['unlock_date'] = pd.to_datetime(df['unlock_date'])
+        return df
+
+    def symbols(self) -> list:
+        conn = _connect(self.db_path)
+        try:
+            return [row[0] for row in conn.execute("SELECT DISTINCT symbol FROM unlocks ORDER BY symbol")]
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        conn = _connect(self.db_path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM unlocks").fetchone()[0]
+        finally:
+            conn.close()
+
+
+def load_unlocks(db_path: Optional[str] = None, symbols: Optional[list] = None) -> pd.DataFrame:
+    """Events from the store at db_path (default UNLOCK_DB_PATH) or the built-in list if it is empty."""
+    db_path = db_path or DEFAULT_UNLOCK_DB_PATH
+    if os.path.exists(db_path):
+        store = UnlockStore(db_path)
+        if len(store):
+            return store.events(symbols=symbols)
+    events = get_upcoming_unlocks()
+    if symbols:
+        events = events[events['symbol'].isin(symbols)].reset_index(drop=True)
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the token unlock calendar store")
+    parser.add_argument("--db", default=DEFAULT_UNLOCK_DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Import CSV/JSON calendar dumps")
+    imp.add_argument("paths", nargs="+")
+    imp.add_argument("--with-defaults", action="store_true", help="Also store the built-in event list")
+    lst = sub.add_parser("list", help="Print stored events")
+    lst.add_argument("--symbol", action="append")
+    args = parser.parse_args()
+
+    store = UnlockStore(args.db)
+    if args.command == "import":
+        if args.with_defaults:
+            store.upsert(get_upcoming_unlocks(), source="built-in")
+        for path in args.paths:
+            print(f"{path}: {store.import_file(path)} events")
+        print(f"{len(store)} events for {len(store.symbols())} symbols in {args.db}")
+    else:
+        print(store.events(symbols=args.symbol).to_string(index=False))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
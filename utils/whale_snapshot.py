@@ -0,0 +1,169 @@
+"""
+Universe-wide whale score snapshots (Strategy 8).
+WhaleScoreSnapshotter pulls Smart Money netflow for every TOKEN_MAP symbol in one Nansen
+request when the refresh interval has elapsed, appends the scores to a time-indexed history
+CSV in the whale-signal cache directory and serves per-pair lookups from memory. The same
+history gives backtests a score series instead of a constant column.
+
+    python -m utils.whale_snapshot --interval 3600      # collect history on a schedule
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from utils.nansen_whale_tracker import NansenWhaleTracker, TOKEN_MAP, DEFAULT_CACHE_DIR
+except ImportError:
+    from nansen_whale_tracker import NansenWhaleTracker, TOKEN_MAP, DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILENAME = "whale_score_history.csv"
+DEFAULT_SNAPSHOT_INTERVAL_SEC = 3600
+HISTORY_COLUMNS = ['timestamp', 'symbol', 'score', 'net_flow_24h_usd', 'net_flow_7d_usd', 'market_cap_usd']
+
+
+class WhaleScoreSnapshotter:
+    """
+    One snapshot = scores for the whole universe at one time. refresh() is a no-op until
+    interval_sec has passed since the last attempt; failed or empty fetches keep the previous
+    scores. On start the latest stored snapshot is served if it is still within the interval.
+    """
+
+    def __init__(self, tracker: Optional[NansenWhaleTracker] = None, cache_dir: Optional[str] = None,
+                 interval_sec: float = DEFAULT_SNAPSHOT_INTERVAL_SEC, symbols: Optional[list] = None,
+                 threshold: float = 0.5, clock: Callable[[], float] = time.time):
+        self.tracker = tracker
+        self.cache_dir = cache_dir or (tracker.cache_dir if tracker is not None else DEFAULT_CACHE_DIR)
+        self.history_path = os.path.join(self.cache_dir, HISTORY_FILENAME)
+        self.interval_sec = interval_sec
+        self.symbols = symbols or list(TOKEN_MAP.keys())
+        self.threshold = threshold
+        self.clock = clock
+
+        self.scores = {}
+        self.snapshot_time = None
+        self.last_attempt = None
+        self._history = None
+        self._load_latest()
+
+    def _load_latest(self):
+        history = self.history()
+        if history.empty:
+            return
+        last_ts = history.index[-1]
+        if self.clock() - last_ts.timestamp() < self.interval_sec:
+            self.scores = {s: float(v) for s, v in history.iloc[-1].dropna().items()}
+            self.snapshot_time = last_ts
+            self.last_attempt = last_ts.timestamp()
+
+    def is_due(self) -> bool:
+        return self.last_attempt is None or self.clock() - self.last_attempt >= self.interval_sec
+
+    def refresh(self, force: bool = False) -> bool:
+        """Fetch a new snapshot when due. Returns True when new scores were stored."""
+        if self.tracker is None or not (force or self.is_due()):
+            return False
+        self.last_attempt = self.clock()
+        scores = self.tracker.get_accumulation_scores(symbols=self.symbols, threshold=self.threshold)
+        if not scores:
+            logger.warning("Whale snapshot: no scores returned; keeping previous snapshot")
+            return False
+        # Symbols with no Smart Money flow are absent from the response; record them as unscored
+        # (NaN) so the history neither carries an older score forward nor reads as a 0 score.
+        for sym in self.symbols:
+            scores.setdefault(sym, {'score': float('nan')})
+        ts = datetime.fromtimestamp(self.last_attempt, tz=timezone.utc)
+        self._append(ts, scores)
+        self.scores = {sym: float(s['score']) for sym, s in scores.items()}
+        self.snapshot_time = pd.Timestamp(ts)
+        logger.info(f"Whale snapshot {ts:%Y-%m-%d %H:%M}: {len(scores)} symbols")
+        return True
+
+    def _append(self, ts: datetime, scores: dict):
+        rows = pd.DataFrame([
+            {'timestamp': ts.isoformat(), 'symbol': sym, 'score': s.get('score'),
+             'net_flow_24h_usd': s.get('net_flow_24h_usd'), 'net_flow_7d_usd': s.get('net_flow_7d_usd'),
+             'market_cap_usd': s.get('market_cap_usd')}
+            for sym, s in scores.items()
+        ], columns=HISTORY_COLUMNS)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        write_header = not os.path.exists(self.history_path)
+        rows.to_csv(self.history_path, mode='a', header=write_header, index=False)
+        self._history = None
+
+    def score(self, symbol: str, refresh: bool = True) -> float:
+        """Latest score for symbol (NaN when unscored); refreshes the snapshot first if due."""
+        if refresh:
+            self.refresh()
+        return self.scores.get(symbol, float('nan'))
+
+    def history(self) -> pd.DataFrame:
+        """Stored scores as a DataFrame indexed by snapshot time (UTC), one column per symbol."""
+        if self._history is None:
+            if not os.path.exists(self.history_path):
+                return pd.DataFrame()
+            raw = pd.read_csv(self.history_path)
+            raw['timestamp'] = pd.to_datetime(raw['timestamp'], utc=True)
+            raw = raw.drop_duplicates(['timestamp', 'symbol'], keep='last')
+            self._history = raw.pivot(index='timestamp', columns='symbol', values='score').sort_index()
+        return self._history
+
+    def score_series(self, symbol: str, dates) -> pd.Series:
+        """
+        Score in effect at each of dates (latest snapshot at or before it); NaN before the
+        first snapshot, where that snapshot did not score symbol, or for symbols never captured.
+        Naive dates are taken as UTC.
+        """
+        index = pd.DatetimeIndex(dates)
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        history = self.history()
+        if history.empty or symbol not in history.columns:
+            return pd.Series(float('nan'), index=range(len(index)), name=symbol)
+        column = history[symbol]
+        positions = column.index.searchsorted(index, side='right') - 1
+        values = column.to_numpy()[positions.clip(min=0)]
+        values[positions < 0] = float('nan')
+        return pd.Series(values, index=range(len(index)), name=symbol)
+
+
+    def accumulation_scores(self, symbol: str, dates, fallback, live_score: Optional[float] = None) -> np.ndarray:
+        """
+        score_series(symbol, dates) as a writable float array, with fallback (e.g. the synthetic
+        proxy, same length) wherever no snapshot scored symbol. live_score overrides the last
+        date when it is > 0; otherwise the last date takes the fallback too.
+        """
+        scores = np.array(self.score_series(symbol, dates), dtype=float)
+        if live_score is not None and len(scores):
+            scores[-1] = live_score if live_score > 0 else np.nan
+        return np.where(np.isnan(scores), np.asarray(fallback, dtype=float), scores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect universe-wide whale score snapshots")
+    parser.add_argument("--interval", type=float, default=DEFAULT_SNAPSHOT_INTERVAL_SEC, help="Seconds between snapshots")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--once", action="store_true", help="Take one snapshot and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    snapshotter = WhaleScoreSnapshotter(NansenWhaleTracker(cache_dir=args.cache_dir), interval_sec=args.interval)
+    if args.once:
+        snapshotter.refresh(force=True)
+        print(snapshotter.scores)
+        return
+    while True:
+        snapshotter.refresh()
+        time.sleep(max(1.0, args.interval - (time.time() - (snapshotter.last_attempt or time.time()))))
+
+
+if __name__ == "__main__":
+    sys.exit(main())